@@ -61,6 +61,7 @@
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # Búsqueda de texto completo e índices GIN
     
     # Apps de terceros (librerías externas)
     'rest_framework',  # Django REST Framework para API REST
@@ -155,6 +156,31 @@
     }
 }
 
+# ==============================================================================
+# CACHÉ
+# ==============================================================================
+
+# 'default' es la caché local de cada proceso (la de Django por defecto),
+# suficiente para el throttling de DRF.
+# 'catalog' guarda los conteos por faceta del catálogo y debe ser compartida
+# por todos los workers: las señales del catálogo la invalidan al guardar, y
+# con una caché por proceso esa invalidación solo llegaría al worker que
+# atendió el cambio. Por defecto es una tabla de la base de datos, que hay
+# que crear con:
+#   python manage.py createcachetable
+# Para usar Redis (pip install redis):
+#   CATALOG_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   CATALOG_CACHE_LOCATION=redis://127.0.0.1:6379
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': config('CATALOG_CACHE_BACKEND', default='django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': config('CATALOG_CACHE_LOCATION', default='byeolpedia_catalog_cache'),
+    },
+}
+
 # ==============================================================================
 # AUTENTICACIÓN Y CONTRASEÑAS
 # ==============================================================================
@@ -250,6 +276,22 @@
     ],
 }
 
+# ==============================================================================
+# BÚSQUEDA DEL CATÁLOGO
+# ==============================================================================
+
+# Segundos tras los que cada proceso reconstruye entero su índice de
+# autocompletado en memoria (/api/catalog/autocomplete/). Los cambios hechos
+# en el propio proceso se aplican al momento; este TTL acota cuánto tarda
+# en verlos otro worker
+AUTOCOMPLETE_INDEX_TTL = config('AUTOCOMPLETE_INDEX_TTL', default=300, cast=int)
+
+# Segundos que se cachean los conteos por faceta (/api/catalog/photocards/facets/
+# y albums/facets/) en la caché compartida 'catalog' (ver CACHES). Los cambios
+# en el catálogo la invalidan de inmediato; el TTL solo acota lo que tarden
+# en verse las cargas con bulk_create, que no disparan señales
+FACETS_CACHE_TTL = config('FACETS_CACHE_TTL', default=300, cast=int)
+
 # ==============================================================================
 # JWT (JSON WEB TOKENS)
 # ==============================================================================
@@ -4,3 +4,7 @@
 class CatalogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'catalog'
+
+    def ready(self):
+        # Registrar las señales que mantienen los índices de búsqueda
+        from . import signals  # noqa: F401
@@ -0,0 +1,230 @@
+"""
+Índice de autocompletado en memoria para la caja de búsqueda.
+
+Guarda los nombres de grupos, miembros, álbumes y lightsticks en una lista
+ordenada de claves normalizadas; una consulta es un bisect + lectura
+secuencial del rango con ese prefijo, sin ir a la base de datos.
+
+Cada clave es una "cola" del nombre (todas sus palabras desde una dada,
+para que "sserafim" encuentre "LE SSERAFIM"), la versión sin espacios y,
+para el texto en hangul, su descomposición en jamo y en consonantes
+iniciales (ver catalog.hangul).
+
+El índice se construye perezosamente en cada proceso y las señales del
+catálogo lo actualizan de forma incremental: se quitan las claves que tenía
+cada entidad cambiada y se insertan las nuevas con bisect, sin recorrer la
+lista entera (solo los lotes grandes, como renombrar un grupo con muchos
+miembros, filtran y mezclan la lista en una pasada). Las búsquedas toman el
+mismo lock, así que nunca ven la lista a medio modificar. Como otros
+workers no reciben esas señales, se reconstruye entero cada AUTOCOMPLETE_INDEX_TTL segundos: una
+sola petición lo reconstruye y las demás siguen usando el índice anterior.
+"""
+
+import bisect
+import heapq
+import re
+import threading
+import time
+import unicodedata
+
+from django.conf import settings
+
+from .hangul import chosung, decompose, is_jamo, is_syllable
+from .models import Group, Member, Album, Lightstick
+
+KINDS = ('group', 'member', 'album', 'lightstick')
+
+
+def normalize(text):
+    """NFC + casefold y palabras separadas por un único espacio"""
+    # NFC y no NFKC: NFKC convierte los jamo de compatibilidad del teclado
+    # (ㅌ) en jamo conjuntos y romperíamos las búsquedas por 초성
+    text = unicodedata.normalize('NFC', text or '').casefold()
+    return ' '.join(re.findall(r'\w+', text))
+
+
+def has_hangul(text):
+    return any(is_syllable(char) or is_jamo(char) for char in text)
+
+
+def index_keys(*names):
+    """Claves de prefijo bajo las que se indexa una entidad"""
+    keys = set()
+    for name in names:
+        words = normalize(name).split()
+        for start in range(len(words)):
+            keys.add(' '.join(words[start:]))
+        if len(words) > 1:
+            keys.add(''.join(words))
+        hangul_words = [word for word in words if has_hangul(word)]
+        for start in range(len(hangul_words)):
+            tail = ''.join(hangul_words[start:])
+            keys.add(decompose(tail))
+            keys.add(chosung(tail))
+    keys.discard('')
+    return keys
+
+
+def query_key(text):
+    """Normaliza la consulta igual que las claves; el hangul se compara jamo a jamo"""
+    text = normalize(text)
+    if has_hangul(text) and not re.search(r'[a-z0-9]', text):
+        return decompose(text)
+    return text
+
+
+def catalog_entities(kind, pks=None):
+    """(tipo, id, nombre, contexto, nombres indexados) leídos de la base de datos"""
+    if kind == 'group':
+        queryset = Group.objects.only('id', 'name', 'korean_name')
+        rows = ((g.id, g.name, g.korean_name, (g.name, g.korean_name)) for g in _filter(queryset, pks))
+    elif kind == 'member':
+        queryset = Member.objects.select_related('group').only('id', 'stage_name', 'real_name', 'group__name')
+        rows = ((m.id, m.stage_name, m.group.name, (m.stage_name, m.real_name)) for m in _filter(queryset, pks))
+    elif kind == 'album':
+        queryset = Album.objects.select_related('group').only('id', 'title', 'group__name')
+        rows = ((a.id, a.title, a.group.name, (a.title,)) for a in _filter(queryset, pks))
+    else:
+        queryset = Lightstick.objects.select_related('group').only('id', 'name', 'version', 'group__name')
+        rows = ((s.id, s.name, s.group.name, (s.name, s.version)) for s in _filter(queryset, pks))
+    for pk, name, context, names in rows:
+        yield kind, str(pk), name, context, names
+
+
+def _filter(queryset, pks):
+    return queryset.iterator() if pks is None else queryset.filter(pk__in=pks)
+
+
+def make_entries(entities):
+    """Tuplas (clave, tipo, id, nombre, contexto) ordenables para la lista del índice"""
+    return [
+        (key, kind, pk, name, context)
+        for kind, pk, name, context, names in entities
+        for key in index_keys(*names)
+    ]
+
+
+def entries_by_entity(entries):
+    """{(tipo, id): [entradas]} para localizar las claves de una entidad sin recorrer la lista"""
+    by_entity = {}
+    for entry in entries:
+        by_entity.setdefault((entry[1], entry[2]), []).append(entry)
+    return by_entity
+
+
+class AutocompleteIndex:
+    """Lista ordenada de claves de prefijo -> entidades del catálogo"""
+
+    # Con más entradas cambiadas que esto, una pasada de filtrado y mezcla
+    # sale más barata que un insort/del (que desplaza la cola) por entrada
+    MERGE_THRESHOLD = 256
+
+    def __init__(self):
+        self._entries = None
+        self._by_entity = {}
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        # Una sola reconstrucción a la vez (build() recorre todo el catálogo)
+        self._build_lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'AUTOCOMPLETE_INDEX_TTL', 300)
+
+    def is_built(self):
+        return self._entries is not None
+
+    def build(self):
+        entries = []
+        for kind in KINDS:
+            entries.extend(make_entries(catalog_entities(kind)))
+        entries.sort()
+        by_entity = entries_by_entity(entries)
+        with self._lock:
+            self._entries = entries
+            self._by_entity = by_entity
+            self._built_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._entries = None
+            self._by_entity = {}
+
+    def _is_stale(self):
+        return self._entries is None or time.monotonic() - self._built_at > self.ttl
+
+    def _ensure_fresh(self):
+        """
+        Reconstruye el índice si ha caducado. Si otra petición ya lo está
+        reconstruyendo se sigue usando el anterior; solo se espera cuando
+        todavía no hay ninguno.
+        """
+        if not self._is_stale():
+            return
+        if not self._build_lock.acquire(blocking=self._entries is None):
+            return
+        try:
+            if self._is_stale():
+                self.build()
+        finally:
+            self._build_lock.release()
+
+    def search(self, text, limit=10, kinds=None):
+        self._ensure_fresh()
+
+        prefix = query_key(text)
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        with self._lock:
+            entries = self._entries or []
+            position = bisect.bisect_left(entries, (prefix,))
+            while position < len(entries) and len(results) < limit:
+                key, kind, pk, name, context = entries[position]
+                if not key.startswith(prefix):
+                    break
+                position += 1
+                if (kind, pk) in seen or (kinds and kind not in kinds):
+                    continue
+                seen.add((kind, pk))
+                results.append({'type': kind, 'id': pk, 'name': name, 'context': context})
+        return results
+
+    def refresh(self, kind, pks):
+        """Reindexa las entidades indicadas (las que ya no existen desaparecen)"""
+        if not self.is_built():
+            return
+        pks = [str(pk) for pk in pks]
+        self._replace(kind, pks, make_entries(catalog_entities(kind, pks)))
+
+    def remove(self, kind, pks):
+        if not self.is_built():
+            return
+        self._replace(kind, [str(pk) for pk in pks], [])
+
+    def _replace(self, kind, pks, new_entries):
+        """Sustituye las entradas de las entidades `pks` por `new_entries`"""
+        new_entries = sorted(new_entries)
+        with self._lock:
+            entries = self._entries
+            if entries is None:
+                return
+            old_entries = [entry for pk in pks for entry in self._by_entity.pop((kind, pk), ())]
+            if len(old_entries) + len(new_entries) > self.MERGE_THRESHOLD:
+                stale = set(old_entries)
+                kept = [entry for entry in entries if entry not in stale]
+                self._entries = list(heapq.merge(kept, new_entries))
+            else:
+                for entry in old_entries:
+                    position = bisect.bisect_left(entries, entry)
+                    if position < len(entries) and entries[position] == entry:
+                        del entries[position]
+                for entry in new_entries:
+                    bisect.insort(entries, entry)
+            for entity, grouped in entries_by_entity(new_entries).items():
+                self._by_entity[entity] = grouped
+
+
+autocomplete_index = AutocompleteIndex()
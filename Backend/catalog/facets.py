@@ -0,0 +1,107 @@
+"""
+Conteos por faceta para la barra lateral de filtros del catálogo.
+
+Cada faceta cuenta las filas que cumplen el resto de filtros (sin el suyo
+propio, para que al elegir un grupo sigan apareciendo los demás con su
+recuento). Todas las facetas se calculan con un GROUP BY por faceta unidos
+con UNION ALL, en una sola consulta, y el resultado se cachea por la clave
+normalizada de los filtros en la caché 'catalog', compartida por todos los
+workers (ver CACHES en settings), que las señales del catálogo invalidan.
+"""
+
+import hashlib
+import json
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import CharField, Count, F, Value
+from django.db.models.functions import Cast, ExtractYear
+
+# param: parámetro del FilterSet que se ignora al contar esta faceta
+# value / label: expresiones del valor agrupado y de su nombre visible
+Facet = namedtuple('Facet', ['param', 'value', 'label'])
+
+PHOTOCARD_FACETS = {
+    'group': Facet('group', F('group'), F('group__name')),
+    'member': Facet('member', F('member'), F('member__stage_name')),
+    'photocard_type': Facet('photocard_type', F('photocard_type'), F('photocard_type')),
+    'release_year': Facet('release_year', ExtractYear('release_date'), None),
+}
+
+ALBUM_FACETS = {
+    'group': Facet('group', F('group'), F('group__name')),
+    'album_type': Facet('album_type', F('album_type'), F('album_type')),
+    'release_year': Facet('release_year', ExtractYear('release_date'), None),
+}
+
+CACHE_ALIAS = 'catalog'
+VERSION_CACHE_KEY = 'catalog:facets:version'
+
+
+def filter_key(filterset_class, params):
+    """Parámetros del FilterSet (sin vacíos, paginación ni orden) ordenados y serializados"""
+    data = {}
+    for name in sorted(filterset_class.base_filters):
+        values = sorted({value.strip() for value in params.getlist(name) if value.strip()})
+        if values:
+            data[name] = values
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+
+def cache_key(model_name, key):
+    cache = caches[CACHE_ALIAS]
+    version = cache.get_or_set(VERSION_CACHE_KEY, 1, None)
+    digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+    return f'catalog:facets:{version}:{model_name}:{digest}'
+
+
+def invalidate_facets():
+    """Descarta todos los conteos cacheados (nueva versión de la clave)"""
+    cache = caches[CACHE_ALIAS]
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
+
+
+def count_facets(facets, filtered):
+    """
+    Calcula los conteos en una consulta.
+
+    `filtered(param)` devuelve el queryset filtrado sin el parámetro `param`.
+    Resultado: {faceta: [{'value', 'label', 'count'}, ...]} por recuento
+    descendente.
+    """
+    selects = []
+    for name, facet in facets.items():
+        value = Cast(facet.value, CharField())
+        label = Cast(facet.label, CharField()) if facet.label is not None else value
+        selects.append(
+            filtered(facet.param).order_by().annotate(
+                facet=Value(name, output_field=CharField()),
+                facet_value=value,
+                facet_label=label,
+            ).values('facet', 'facet_value', 'facet_label').annotate(
+                total=Count('pk')
+            ).values_list('facet', 'facet_value', 'facet_label', 'total')
+        )
+
+    counts = {name: [] for name in facets}
+    combined = selects[0].union(*selects[1:], all=True) if len(selects) > 1 else selects[0]
+    for name, value, label, total in combined:
+        if value is not None:
+            counts[name].append({'value': value, 'label': label, 'count': total})
+    for results in counts.values():
+        results.sort(key=lambda result: (-result['count'], result['label'] or ''))
+    return counts
+
+
+def cached_facets(model_name, key, compute):
+    cache = caches[CACHE_ALIAS]
+    full_key = cache_key(model_name, key)
+    counts = cache.get(full_key)
+    if counts is None:
+        counts = compute()
+        cache.set(full_key, counts, getattr(settings, 'FACETS_CACHE_TTL', 300))
+    return counts
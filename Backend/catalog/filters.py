@@ -1,10 +1,34 @@
+from datetime import date
+
 import django_filters
+from django_filters.constants import EMPTY_VALUES
+
 from .models import Group, Album, Photocard, Lightstick
 
 
+class YearFilter(django_filters.NumberFilter):
+    """
+    Año sobre un DateField como rango [1-ene, 1-ene del año siguiente).
+
+    Comparar la columna tal cual (en lugar de EXTRACT(year ...)) permite que
+    los índices por fecha sirvan el filtro.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        year = int(value)
+        if not date.min.year <= year < date.max.year:
+            return qs.none()
+        return self.get_method(qs)(**{
+            f'{self.field_name}__gte': date(year, 1, 1),
+            f'{self.field_name}__lt': date(year + 1, 1, 1),
+        })
+
+
 class GroupFilter(django_filters.FilterSet):
     """Filtros avanzados para grupos"""
-    debut_year = django_filters.NumberFilter(field_name='debut_date__year', lookup_expr='exact')
+    debut_year = YearFilter(field_name='debut_date')
     debut_after = django_filters.DateFilter(field_name='debut_date', lookup_expr='gte')
     debut_before = django_filters.DateFilter(field_name='debut_date', lookup_expr='lte')
     
@@ -15,7 +39,7 @@ class Meta:
 
 class AlbumFilter(django_filters.FilterSet):
     """Filtros avanzados para álbumes"""
-    release_year = django_filters.NumberFilter(field_name='release_date__year', lookup_expr='exact')
+    release_year = YearFilter(field_name='release_date')
     release_after = django_filters.DateFilter(field_name='release_date', lookup_expr='gte')
     release_before = django_filters.DateFilter(field_name='release_date', lookup_expr='lte')
     
@@ -26,7 +50,7 @@ class Meta:
 
 class PhotocardFilter(django_filters.FilterSet):
     """Filtros avanzados para photocards"""
-    release_year = django_filters.NumberFilter(field_name='release_date__year', lookup_expr='exact')
+    release_year = YearFilter(field_name='release_date')
     release_after = django_filters.DateFilter(field_name='release_date', lookup_expr='gte')
     release_before = django_filters.DateFilter(field_name='release_date', lookup_expr='lte')
     
@@ -37,7 +61,7 @@ class Meta:
 
 class LightstickFilter(django_filters.FilterSet):
     """Filtros avanzados para lightsticks"""
-    release_year = django_filters.NumberFilter(field_name='release_date__year', lookup_expr='exact')
+    release_year = YearFilter(field_name='release_date')
     release_after = django_filters.DateFilter(field_name='release_date', lookup_expr='gte')
     release_before = django_filters.DateFilter(field_name='release_date', lookup_expr='lte')
     
@@ -0,0 +1,81 @@
+"""
+Descomposición de hangul para la búsqueda por jamo y por consonante inicial (초성).
+
+Los nombres coreanos se guardan precalculados en columnas *_jamo y *_chosung
+con índice de prefijo, de modo que "ㅌㅇ" o una sílaba a medio escribir
+("트왕" mientras se teclea 트와이스) se resuelven con un LIKE 'x%' indexado.
+Se usan jamo de compatibilidad (U+3131-U+318E), los mismos que produce el
+teclado, y las vocales/consonantes compuestas se separan (ㅘ -> ㅗㅏ).
+"""
+
+SYLLABLE_BASE = 0xAC00
+SYLLABLE_LAST = 0xD7A3
+
+INITIALS = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+MEDIALS = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+FINALS = ['', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ',
+          'ㄿ', 'ㅀ', 'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+
+COMPOUND_JAMO = {
+    'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+    'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ',
+    'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ',
+}
+
+# Campos de origen por modelo; cada uno tiene sus columnas <campo>_jamo y <campo>_chosung
+HANGUL_FIELDS = {
+    'group': ('korean_name',),
+    'member': ('stage_name',),
+}
+
+
+def is_syllable(char):
+    return SYLLABLE_BASE <= ord(char) <= SYLLABLE_LAST
+
+
+def is_jamo(char):
+    return 0x3131 <= ord(char) <= 0x318E
+
+
+def decompose(text):
+    """Texto -> jamo sin separadores: '트와이스' -> 'ㅌㅡㅇㅗㅏㅇㅣㅅㅡ'. Ignora lo que no es hangul."""
+    jamo = []
+    for char in text or '':
+        if is_syllable(char):
+            index = ord(char) - SYLLABLE_BASE
+            jamo.append(INITIALS[index // 588])
+            jamo.append(MEDIALS[(index % 588) // 28])
+            jamo.append(FINALS[index % 28])
+        elif is_jamo(char):
+            jamo.append(char)
+    return ''.join(COMPOUND_JAMO.get(char, char) for char in ''.join(jamo))
+
+
+def chosung(text):
+    """Texto -> consonantes iniciales: '트와이스' -> 'ㅌㅇㅇㅅ'. Ignora lo que no es hangul."""
+    initials = []
+    for char in text or '':
+        if is_syllable(char):
+            initials.append(INITIALS[(ord(char) - SYLLABLE_BASE) // 588])
+        elif char in INITIALS:
+            initials.append(char)
+    return ''.join(initials)
+
+
+def is_chosung_query(text):
+    """True si la consulta solo tiene consonantes iniciales (p.ej. 'ㅌㅇㅇㅅ')"""
+    letters = [char for char in text if not char.isspace()]
+    return bool(letters) and all(char in INITIALS for char in letters)
+
+
+def hangul_columns(model_name):
+    """Columnas precalculadas de un modelo: ['korean_name_jamo', 'korean_name_chosung', ...]"""
+    return [f'{field}_{suffix}' for field in HANGUL_FIELDS[model_name] for suffix in ('jamo', 'chosung')]
+
+
+def fill_hangul_fields(instance):
+    """Rellena las columnas *_jamo/*_chosung de un Group o Member a partir de su nombre"""
+    for field in HANGUL_FIELDS[instance._meta.model_name]:
+        value = getattr(instance, field)
+        setattr(instance, f'{field}_jamo', decompose(value))
+        setattr(instance, f'{field}_chosung', chosung(value))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from catalog.hangul import HANGUL_FIELDS, fill_hangul_fields, hangul_columns
+from catalog.models import Group, Member, Album, Photocard, Lightstick
+from catalog.positions import assign_group_positions
+from catalog.search import refresh_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los índices de búsqueda del catálogo (texto completo y hangul)'
+
+    def handle(self, *args, **options):
+        for model in (Group, Member):
+            model_name = model._meta.model_name
+            objects = list(model.objects.only('pk', *HANGUL_FIELDS[model_name]))
+            for obj in objects:
+                fill_hangul_fields(obj)
+            model.objects.bulk_update(objects, hangul_columns(model_name), batch_size=500)
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {len(objects)} nombres coreanos descompuestos')
+
+        for model in (Group, Member, Album, Photocard, Lightstick):
+            updated = refresh_search_vectors(model)
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {updated} filas actualizadas')
+
+        assigned = assign_group_positions(Photocard)
+        self.stdout.write(f'photocards: {assigned} posiciones en su grupo asignadas')
+        self.stdout.write(self.style.SUCCESS('Índice de búsqueda reconstruido'))
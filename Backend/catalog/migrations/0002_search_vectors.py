@@ -0,0 +1,96 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:29
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Vectores iniciales con los campos y pesos de catalog.search.SEARCH_VECTORS
+# tal como eran al crear esta migración (sin importar el módulo, que puede cambiar)
+FILL_SEARCH_VECTORS = """
+UPDATE catalog_group SET search_vector =
+    setweight(to_tsvector('simple', COALESCE(name, '')), 'A')
+    || setweight(to_tsvector('simple', COALESCE(korean_name, '')), 'A')
+    || setweight(to_tsvector('simple', COALESCE(agency, '')), 'C');
+
+UPDATE catalog_member m SET search_vector =
+    setweight(to_tsvector('simple', COALESCE(m.stage_name, '')), 'A')
+    || setweight(to_tsvector('simple', COALESCE(m.real_name, '')), 'B')
+    || setweight(to_tsvector('simple', COALESCE(g.name, '')), 'C')
+FROM catalog_group g WHERE g.id = m.group_id;
+
+UPDATE catalog_album a SET search_vector =
+    setweight(to_tsvector('simple', COALESCE(a.title, '')), 'A')
+    || setweight(to_tsvector('simple', COALESCE(g.name, '')), 'B')
+FROM catalog_group g WHERE g.id = a.group_id;
+
+UPDATE catalog_photocard p SET search_vector =
+    setweight(to_tsvector('simple', COALESCE(p.name, '')), 'A')
+    || setweight(to_tsvector('simple', COALESCE((SELECT stage_name FROM catalog_member WHERE id = p.member_id), '')), 'B')
+    || setweight(to_tsvector('simple', COALESCE(g.name, '')), 'B')
+    || setweight(to_tsvector('simple', COALESCE(a.title, '')), 'C')
+FROM catalog_group g, catalog_albumversion v, catalog_album a
+WHERE g.id = p.group_id AND v.id = p.album_version_id AND a.id = v.album_id;
+
+UPDATE catalog_lightstick l SET search_vector =
+    setweight(to_tsvector('simple', COALESCE(l.name, '')), 'A')
+    || setweight(to_tsvector('simple', COALESCE(g.name, '')), 'B')
+    || setweight(to_tsvector('simple', COALESCE(l.version, '')), 'C')
+FROM catalog_group g WHERE g.id = l.group_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='album',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='lightstick',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='photocard',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='album',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='catalog_album_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='catalog_group_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='lightstick',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='catalog_lightstick_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='catalog_member_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='photocard',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='catalog_photocard_search_gin'),
+        ),
+        migrations.RunSQL(FILL_SEARCH_VECTORS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:32
+
+from django.db import migrations, models
+
+
+# Copia de catalog.hangul tal como era al crear esta migración (sin importar
+# el módulo, que puede cambiar)
+SYLLABLE_BASE = 0xAC00
+INITIALS = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+MEDIALS = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+FINALS = ['', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ',
+          'ㄿ', 'ㅀ', 'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+COMPOUND_JAMO = {
+    'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+    'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ',
+    'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ',
+}
+HANGUL_FIELDS = {'Group': 'korean_name', 'Member': 'stage_name'}
+
+
+def decompose(text):
+    jamo = []
+    for char in text or '':
+        if SYLLABLE_BASE <= ord(char) <= 0xD7A3:
+            index = ord(char) - SYLLABLE_BASE
+            jamo += [INITIALS[index // 588], MEDIALS[(index % 588) // 28], FINALS[index % 28]]
+        elif 0x3131 <= ord(char) <= 0x318E:
+            jamo.append(char)
+    return ''.join(COMPOUND_JAMO.get(char, char) for char in ''.join(jamo))
+
+
+def chosung(text):
+    initials = []
+    for char in text or '':
+        if SYLLABLE_BASE <= ord(char) <= 0xD7A3:
+            initials.append(INITIALS[(ord(char) - SYLLABLE_BASE) // 588])
+        elif char in INITIALS:
+            initials.append(char)
+    return ''.join(initials)
+
+
+def fill_hangul_columns(apps, schema_editor):
+    for model_name, field in HANGUL_FIELDS.items():
+        model = apps.get_model('catalog', model_name)
+        objects = list(model.objects.all())
+        for obj in objects:
+            value = getattr(obj, field)
+            setattr(obj, f'{field}_jamo', decompose(value))
+            setattr(obj, f'{field}_chosung', chosung(value))
+        model.objects.bulk_update(objects, [f'{field}_jamo', f'{field}_chosung'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='korean_name_chosung',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='korean_name_jamo',
+            field=models.CharField(blank=True, default='', editable=False, max_length=400),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='stage_name_chosung',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='stage_name_jamo',
+            field=models.CharField(blank=True, default='', editable=False, max_length=400),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['korean_name_jamo'], name='catalog_group_jamo_like', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['korean_name_chosung'], name='catalog_group_chosung_like', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['stage_name_jamo'], name='catalog_member_jamo_like', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['stage_name_chosung'], name='catalog_member_chosung_like', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(fill_hangul_columns, migrations.RunPython.noop),
+    ]
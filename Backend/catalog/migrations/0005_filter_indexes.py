@@ -0,0 +1,77 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_hangul_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='album',
+            index=models.Index(fields=['-release_date', 'id'], name='catalog_album_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='album',
+            index=models.Index(fields=['group', '-release_date', 'id'], name='catalog_album_group_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='album',
+            index=models.Index(fields=['album_type', '-release_date', 'id'], name='catalog_album_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['name', 'id'], name='catalog_group_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['group_type', 'name'], name='catalog_group_type_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['agency', 'name'], name='catalog_group_agency_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['debut_date'], name='catalog_group_debut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lightstick',
+            index=models.Index(fields=['-release_date', 'id'], name='catalog_ls_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lightstick',
+            index=models.Index(fields=['group', '-release_date', 'id'], name='catalog_ls_group_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lightstick',
+            index=models.Index(fields=['version', '-release_date', 'id'], name='catalog_ls_version_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['group', 'stage_name'], name='catalog_member_group_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='photocard',
+            index=models.Index(fields=['-release_date', 'id'], name='catalog_pc_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='photocard',
+            index=models.Index(fields=['group', '-release_date', 'id'], name='catalog_pc_group_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='photocard',
+            index=models.Index(fields=['member', '-release_date', 'id'], name='catalog_pc_member_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='photocard',
+            index=models.Index(fields=['album_version', '-release_date', 'id'], name='catalog_pc_version_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='photocard',
+            index=models.Index(fields=['photocard_type', '-release_date', 'id'], name='catalog_pc_type_date_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:15
+
+from django.db import migrations, models
+
+
+# Posiciones iniciales como catalog.positions.assign_group_positions al crear
+# esta migración (sin importar el módulo, que puede cambiar): todas las
+# photocards están sin posición, así que se numeran desde 0 dentro de cada grupo
+FILL_GROUP_POSITIONS = """
+UPDATE catalog_photocard p SET group_position = numbered.position
+FROM (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY group_id ORDER BY release_date, id) - 1 AS position
+    FROM catalog_photocard
+) numbered
+WHERE numbered.id = p.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photocard',
+            name='group_position',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='photocard',
+            constraint=models.UniqueConstraint(fields=('group', 'group_position'), name='catalog_pc_group_position_uniq'),
+        ),
+        migrations.RunSQL(FILL_GROUP_POSITIONS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:00
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_group_positions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='catalog_group_lower_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lightstick',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='catalog_ls_lower_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='photocard',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='catalog_pc_lower_name_idx'),
+        ),
+    ]
@@ -1,5 +1,8 @@
 import uuid
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class Group(models.Model):
@@ -11,11 +14,31 @@ class Group(models.Model):
     group_type = models.CharField(max_length=50)
     logo_image = models.URLField(blank=True, null=True)
 
+    # tsvector ponderado mantenido por catalog.signals (ver catalog.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # korean_name descompuesto en jamo y consonantes iniciales (ver catalog.hangul)
+    korean_name_jamo = models.CharField(max_length=400, blank=True, default='', editable=False)
+    korean_name_chosung = models.CharField(max_length=100, blank=True, default='', editable=False)
+
     def __str__(self):
         return self.name
 
     class Meta:
         db_table = 'catalog_group'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='catalog_group_search_gin'),
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='catalog_group_name_trgm'),
+            GinIndex(fields=['korean_name'], opclasses=['gin_trgm_ops'], name='catalog_group_korean_trgm'),
+            models.Index(fields=['korean_name_jamo'], opclasses=['varchar_pattern_ops'], name='catalog_group_jamo_like'),
+            models.Index(fields=['korean_name_chosung'], opclasses=['varchar_pattern_ops'], name='catalog_group_chosung_like'),
+            # Filtros de GroupFilter con la ordenación por defecto (name)
+            models.Index(fields=['name', 'id'], name='catalog_group_name_idx'),
+            models.Index(fields=['group_type', 'name'], name='catalog_group_type_name_idx'),
+            models.Index(fields=['agency', 'name'], name='catalog_group_agency_name_idx'),
+            models.Index(fields=['debut_date'], name='catalog_group_debut_idx'),
+            # Búsqueda sin mayúsculas por nombre del importador (collection.importer)
+            models.Index(Lower('name'), name='catalog_group_lower_name_idx'),
+        ]
 
 
 class Member(models.Model):
@@ -28,11 +51,23 @@ class Member(models.Model):
     is_active = models.BooleanField(default=True)
     profile_image = models.URLField(blank=True, null=True)
 
+    search_vector = SearchVectorField(null=True, editable=False)
+    stage_name_jamo = models.CharField(max_length=400, blank=True, default='', editable=False)
+    stage_name_chosung = models.CharField(max_length=100, blank=True, default='', editable=False)
+
     def __str__(self):
         return f"{self.stage_name} ({self.group.name})"
 
     class Meta:
         db_table = 'catalog_member'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='catalog_member_search_gin'),
+            GinIndex(fields=['stage_name'], opclasses=['gin_trgm_ops'], name='catalog_member_stage_trgm'),
+            GinIndex(fields=['real_name'], opclasses=['gin_trgm_ops'], name='catalog_member_real_trgm'),
+            models.Index(fields=['stage_name_jamo'], opclasses=['varchar_pattern_ops'], name='catalog_member_jamo_like'),
+            models.Index(fields=['stage_name_chosung'], opclasses=['varchar_pattern_ops'], name='catalog_member_chosung_like'),
+            models.Index(fields=['group', 'stage_name'], name='catalog_member_group_name_idx'),
+        ]
 
 
 class Album(models.Model):
@@ -43,11 +78,20 @@ class Album(models.Model):
     album_type = models.CharField(max_length=50)
     cover_image = models.URLField(blank=True, null=True)
 
+    search_vector = SearchVectorField(null=True, editable=False)
+
     def __str__(self):
         return f"{self.title} - {self.group.name}"
 
     class Meta:
         db_table = 'catalog_album'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='catalog_album_search_gin'),
+            # Filtros de AlbumFilter con la ordenación por defecto (-release_date, id)
+            models.Index(fields=['-release_date', 'id'], name='catalog_album_date_idx'),
+            models.Index(fields=['group', '-release_date', 'id'], name='catalog_album_group_date_idx'),
+            models.Index(fields=['album_type', '-release_date', 'id'], name='catalog_album_type_date_idx'),
+        ]
 
 
 class AlbumVersion(models.Model):
@@ -74,11 +118,30 @@ class Photocard(models.Model):
     release_date = models.DateField()
     photocard_type = models.CharField(max_length=50)
 
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Posición fija y densa dentro del grupo (bit de la photocard en los
+    # bitmaps de posesión, ver catalog.positions y collection.bitmaps)
+    group_position = models.PositiveIntegerField(null=True, editable=False)
+
     def __str__(self):
         return f"{self.name} - {self.group.name}"
 
     class Meta:
         db_table = 'catalog_photocard'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='catalog_photocard_search_gin'),
+            # Filtros de PhotocardFilter con la ordenación por defecto (-release_date, id)
+            models.Index(fields=['-release_date', 'id'], name='catalog_pc_date_idx'),
+            models.Index(fields=['group', '-release_date', 'id'], name='catalog_pc_group_date_idx'),
+            models.Index(fields=['member', '-release_date', 'id'], name='catalog_pc_member_date_idx'),
+            models.Index(fields=['album_version', '-release_date', 'id'], name='catalog_pc_version_date_idx'),
+            models.Index(fields=['photocard_type', '-release_date', 'id'], name='catalog_pc_type_date_idx'),
+            # Búsqueda sin mayúsculas por nombre del importador (collection.importer)
+            models.Index(Lower('name'), name='catalog_pc_lower_name_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'group_position'], name='catalog_pc_group_position_uniq'),
+        ]
 
 
 class Lightstick(models.Model):
@@ -89,8 +152,19 @@ class Lightstick(models.Model):
     image = models.URLField(blank=True, null=True)
     release_date = models.DateField()
 
+    search_vector = SearchVectorField(null=True, editable=False)
+
     def __str__(self):
         return f"{self.name} - {self.group.name}"
 
     class Meta:
         db_table = 'catalog_lightstick'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='catalog_lightstick_search_gin'),
+            # Filtros de LightstickFilter con la ordenación por defecto (-release_date, id)
+            models.Index(fields=['-release_date', 'id'], name='catalog_ls_date_idx'),
+            models.Index(fields=['group', '-release_date', 'id'], name='catalog_ls_group_date_idx'),
+            models.Index(fields=['version', '-release_date', 'id'], name='catalog_ls_version_date_idx'),
+            # Búsqueda sin mayúsculas por nombre del importador (collection.importer)
+            models.Index(Lower('name'), name='catalog_ls_lower_name_idx'),
+        ]
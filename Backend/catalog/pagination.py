@@ -0,0 +1,136 @@
+import base64
+import json
+import operator
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Model, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetOptInPagination(PageNumberPagination):
+    """
+    Paginación por página (por defecto) con modo cursor opcional.
+
+    Con ?pagination=cursor la lista se pagina por keyset sobre la ordenación
+    activa (la de OrderingFilter, o -search_rank si hay búsqueda) más el id
+    como desempate, p.ej. (-release_date, id). Cada página
+    filtra con WHERE sobre la última fila vista en lugar de OFFSET y no
+    ejecuta COUNT(*), así que la página 5000 cuesta lo mismo que la primera.
+    La respuesta devuelve solo `next` y `results`; `next` lleva el cursor.
+
+    En los dos modos ?page_size= cambia el tamaño de página, hasta
+    max_page_size para que una petición no serialice una tabla entera.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor no válido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.keys = self.get_keys(request, queryset, view)
+        queryset = queryset.order_by(*self.keys)
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            try:
+                queryset = queryset.filter(self.after(self.decode_cursor(encoded)))
+            except (ValidationError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_keys(self, request, queryset, view):
+        """Ordenación ya aplicada por los filtros (o la de la vista) + id como desempate"""
+        ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if not ordering:
+            ordering = getattr(view, 'ordering', None) or []
+        if isinstance(ordering, str):
+            ordering = [ordering]
+
+        keys = [field for field in ordering if field.lstrip('-') not in ('id', 'pk')]
+        return keys + ['id']
+
+    def after(self, values):
+        """
+        Condición "fila posterior al cursor" para claves compuestas.
+
+        Se expande como (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..., respetando
+        la dirección de cada clave y los NULL de PostgreSQL (al final en ASC,
+        al principio en DESC).
+        """
+        if len(values) != len(self.keys):
+            raise NotFound(self.invalid_cursor_message)
+
+        clauses = []
+        equal = Q()
+        for key, value in zip(self.keys, values):
+            field = key.lstrip('-')
+            descending = key.startswith('-')
+            if value is None:
+                if descending:
+                    clauses.append(equal & Q(**{f'{field}__isnull': False}))
+                equal &= Q(**{f'{field}__isnull': True})
+            else:
+                step = Q(**{f"{field}__{'lt' if descending else 'gt'}": value})
+                if not descending:
+                    step |= Q(**{f'{field}__isnull': True})
+                clauses.append(equal & step)
+                equal &= Q(**{field: value})
+        return reduce(operator.or_, clauses)
+
+    def encode_cursor(self, obj):
+        values = []
+        for key in self.keys:
+            value = operator.attrgetter(key.lstrip('-').replace('__', '.'))(obj)
+            if isinstance(value, Model):
+                value = value.pk
+            values.append(None if value is None else str(value))
+        payload = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(payload).decode('ascii')
+
+    def decode_cursor(self, encoded):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        url = replace_query_param(url, self.mode_query_param, 'cursor')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
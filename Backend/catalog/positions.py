@@ -0,0 +1,43 @@
+"""
+Posiciones densas de las photocards dentro de su grupo (group_position).
+
+Cada photocard recibe la siguiente posición libre de su grupo al crearse y
+la conserva, así que un conjunto de photocards de un grupo se puede guardar
+como un bitmap (bit N = photocard en la posición N, ver collection.bitmaps).
+Las posiciones de photocards borradas no se reutilizan. Las señales del
+catálogo asignan la posición al guardar; las cargas con bulk_create deben
+llamar a assign_group_positions (o al comando rebuild_search_index).
+"""
+
+from django.db import transaction
+from django.db.models import Max
+
+
+@transaction.atomic
+def assign_group_positions(model, queryset=None):
+    """
+    Asigna posición a las photocards de `queryset` que no tienen, al final de
+    su grupo. Acepta modelos históricos para poder usarse desde migraciones.
+    """
+    if queryset is None:
+        queryset = model.objects.all()
+    pending = list(
+        queryset.filter(group_position__isnull=True).order_by('group', 'release_date', 'pk').only('pk', 'group')
+    )
+    if not pending:
+        return 0
+
+    # Grupos bloqueados (en orden) para que dos altas simultáneas no repitan posición
+    group_ids = {photocard.group_id for photocard in pending}
+    group_model = model._meta.get_field('group').related_model
+    list(group_model.objects.select_for_update(no_key=True).filter(pk__in=group_ids).order_by('pk').values_list('pk'))
+    last = dict(
+        model.objects.filter(group__in=group_ids).values('group').annotate(
+            last=Max('group_position'),
+        ).order_by().values_list('group', 'last')
+    )
+    for photocard in pending:
+        position = last.get(photocard.group_id)
+        photocard.group_position = last[photocard.group_id] = 0 if position is None else position + 1
+    model.objects.bulk_update(pending, ['group_position'], batch_size=1000)
+    return len(pending)
@@ -0,0 +1,217 @@
+"""
+Búsqueda de texto completo (PostgreSQL) para el catálogo.
+
+Cada modelo buscable guarda un tsvector ponderado en `search_vector`
+(con índice GIN) que incluye también los nombres de sus relaciones
+(grupo, miembro, álbum). El filtro FullTextSearchFilter sustituye a
+SearchFilter: mantiene el parámetro ?search= pero resuelve la búsqueda con
+el índice y ordena por relevancia en lugar de encadenar ILIKE '%...%'.
+
+El modo difuso (?search_mode=fuzzy) usa similitud de trigramas (pg_trgm)
+sobre los `fuzzy_search_fields` de la vista, con índices GIN gin_trgm_ops,
+para tolerar errores de romanización ("Chaeyeong" -> "Chaeyoung").
+
+El modo hangul (?search_mode=hangul) busca por prefijo en las columnas
+precalculadas *_chosung (si la consulta son solo consonantes iniciales,
+"ㅌㅇ") o *_jamo (texto coreano, aunque la última sílaba esté a medias) de
+los `hangul_search_fields` de la vista. Ver catalog.hangul.
+"""
+
+import operator
+import re
+from functools import reduce
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramSimilarity, TrigramWordSimilarity
+)
+from django.apps import apps
+from django.db.models import CharField, F, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Cast, Greatest
+from rest_framework import filters
+
+from .hangul import chosung, decompose, is_chosung_query
+
+# 'simple' no aplica stemming ni stopwords: adecuado para nombres propios
+# romanizados y hangul
+SEARCH_CONFIG = 'simple'
+
+
+def _vector(*weighted_fields):
+    vector = None
+    for field, weight in weighted_fields:
+        part = SearchVector(field, weight=weight, config=SEARCH_CONFIG)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+# Campos y pesos por modelo (A = más relevante). Cubren al menos los
+# search_fields que tenía cada vista con SearchFilter.
+SEARCH_VECTORS = {
+    'group': lambda: _vector(('name', 'A'), ('korean_name', 'A'), ('agency', 'C')),
+    'member': lambda: _vector(('stage_name', 'A'), ('real_name', 'B'), ('group__name', 'C')),
+    'album': lambda: _vector(('title', 'A'), ('group__name', 'B')),
+    'photocard': lambda: _vector(
+        ('name', 'A'), ('member__stage_name', 'B'), ('group__name', 'B'),
+        ('album_version__album__title', 'C'),
+    ),
+    'lightstick': lambda: _vector(('name', 'A'), ('group__name', 'B'), ('version', 'C')),
+}
+
+
+def refresh_search_vectors(model, queryset=None):
+    """
+    Recalcula search_vector en una sola sentencia UPDATE.
+
+    Los JOINs no están permitidos en UPDATE, así que el vector se calcula en
+    una subconsulta correlacionada por pk. Acepta modelos históricos para
+    poder usarse desde migraciones.
+    """
+    vector = model.objects.filter(pk=OuterRef('pk')).annotate(
+        vector=SEARCH_VECTORS[model._meta.model_name]()
+    ).values('vector')[:1]
+    if queryset is None:
+        queryset = model.objects.all()
+    return queryset.update(search_vector=Subquery(vector))
+
+
+# Columnas (nombre, contexto) que devuelve la búsqueda unificada por modelo
+UNIFIED_COLUMNS = {
+    'group': ('name', 'korean_name'),
+    'member': ('stage_name', 'group__name'),
+    'album': ('title', 'group__name'),
+    'photocard': ('name', 'group__name'),
+    'lightstick': ('name', 'group__name'),
+}
+
+
+def unified_search(terms, limit=5, kinds=None):
+    """
+    Busca en todo el catálogo con una única consulta.
+
+    Cada modelo aporta un SELECT con sus `limit` mejores filas según ts_rank
+    (servido por su índice GIN) y se combinan con UNION ALL, así que el coste
+    es el de cinco búsquedas indexadas en un solo viaje a la base de datos,
+    sin COUNT ni paginación. Devuelve los resultados agrupados por tipo.
+    """
+    query = build_search_query(terms)
+    kinds = [kind for kind in (kinds or SEARCH_VECTORS) if kind in UNIFIED_COLUMNS]
+    grouped = {kind: [] for kind in kinds}
+    if query is None or not kinds:
+        return grouped
+
+    selects = []
+    for kind in kinds:
+        name, context = UNIFIED_COLUMNS[kind]
+        model = apps.get_model('catalog', kind)
+        selects.append(
+            model.objects.filter(search_vector=query).annotate(
+                kind=Value(kind, output_field=CharField()),
+                entity_id=F('id'),
+                label=F(name),
+                context=Cast(F(context), CharField()),
+                rank=Cast(SearchRank(F('search_vector'), query), FloatField()),
+            ).values_list('kind', 'entity_id', 'label', 'context', 'rank').order_by('-rank', 'label')[:limit]
+        )
+
+    combined = selects[0].union(*selects[1:], all=True) if len(selects) > 1 else selects[0]
+    for kind, entity_id, label, context, rank in combined:
+        grouped[kind].append({'id': str(entity_id), 'name': label, 'context': context, 'rank': rank})
+    for results in grouped.values():
+        results.sort(key=lambda result: -result['rank'])
+    return grouped
+
+
+def build_search_query(terms):
+    """
+    Convierte los términos de ?search= en un tsquery de prefijos ('twi:* & ce:*').
+
+    Solo se conservan caracteres de palabra, así que la entrada del usuario
+    nunca llega a interpretarse como operadores de tsquery.
+    """
+    tokens = [token for term in terms for token in re.findall(r'\w+', term)]
+    if not tokens:
+        return None
+    raw = ' & '.join(f'{token}:*' for token in tokens)
+    return SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    ?search= sobre el tsvector indexado, ordenado por relevancia.
+
+    Debe ir después de OrderingFilter en filter_backends: si el cliente no
+    pide ?ordering= explícito, el ranking pasa a ser el primer criterio y la
+    ordenación por defecto de la vista queda como desempate. Los modelos sin
+    search_vector siguen usando SearchFilter.
+
+    Con ?search_mode=fuzzy o ?search_mode=hangul se busca en los
+    `fuzzy_search_fields` / `hangul_search_fields` de la vista.
+    """
+    search_mode_param = 'search_mode'
+
+    def filter_queryset(self, request, queryset, view):
+        mode = request.query_params.get(self.search_mode_param)
+        fuzzy_fields = getattr(view, 'fuzzy_search_fields', None)
+        if fuzzy_fields and mode == 'fuzzy':
+            return self.filter_fuzzy(request, queryset, fuzzy_fields)
+        hangul_fields = getattr(view, 'hangul_search_fields', None)
+        if hangul_fields and mode == 'hangul':
+            return self.filter_hangul(request, queryset, hangul_fields)
+
+        model_name = queryset.model._meta.model_name
+        if model_name not in SEARCH_VECTORS:
+            return super().filter_queryset(request, queryset, view)
+
+        query = build_search_query(self.get_search_terms(request))
+        if query is None:
+            return queryset
+
+        # ts_rank devuelve real; se pasa a double precision para que el valor
+        # sobreviva exacto al viaje por el cursor de KeysetOptInPagination
+        queryset = queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+        )
+        return self.order_by_rank(request, queryset)
+
+    def filter_fuzzy(self, request, queryset, fields):
+        """
+        Coincidencia por trigramas: `%` (similitud global) o `<%` (similitud
+        con alguna palabra del campo), ambos servidos por los índices GIN
+        gin_trgm_ops. El ranking es la mejor puntuación entre campos.
+        """
+        term = ' '.join(self.get_search_terms(request))
+        if not term:
+            return queryset
+
+        match = reduce(operator.or_, (
+            Q(**{f'{field}__trigram_similar': term}) | Q(**{f'{field}__trigram_word_similar': term})
+            for field in fields
+        ))
+        scores = []
+        for field in fields:
+            scores += [TrigramSimilarity(field, term), TrigramWordSimilarity(term, field)]
+
+        queryset = queryset.filter(match).annotate(
+            search_rank=Cast(Greatest(*scores), FloatField())
+        )
+        return self.order_by_rank(request, queryset)
+
+    def filter_hangul(self, request, queryset, fields):
+        """Prefijo sobre <campo>_chosung o <campo>_jamo (LIKE 'x%' con índice varchar_pattern_ops)"""
+        term = ''.join(self.get_search_terms(request))
+        if is_chosung_query(term):
+            suffix, value = 'chosung', chosung(term)
+        else:
+            suffix, value = 'jamo', decompose(term)
+        if not value:
+            return queryset.none()
+
+        match = reduce(operator.or_, (
+            Q(**{f'{field}_{suffix}__startswith': value}) for field in fields
+        ))
+        return queryset.filter(match)
+
+    def order_by_rank(self, request, queryset):
+        if request.query_params.get(filters.OrderingFilter.ordering_param):
+            return queryset
+        return queryset.order_by('-search_rank', *queryset.query.order_by)
@@ -2,6 +2,17 @@
 from .models import Group, Member, Album, AlbumVersion, Photocard, Lightstick
 
 
+class OwnershipMixin:
+    """Añade owned_quantity y wishlist_priority cuando la vista los pasa en context['ownership']"""
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        ownership = self.context.get('ownership')
+        if ownership is not None:
+            data.update(ownership[instance.pk])
+        return data
+
+
 class MemberSerializer(serializers.ModelSerializer):
     """Serializer para miembros de grupos"""
     
@@ -21,6 +32,9 @@ class Meta:
                  'logo_image', 'members', 'album_count')
     
     def get_album_count(self, obj):
+        # Las vistas anotan album_total; sin anotación se cuenta como antes
+        if hasattr(obj, 'album_total'):
+            return obj.album_total
         return obj.albums.count()
 
 
@@ -34,6 +48,8 @@ class Meta:
                  'logo_image', 'member_count')
     
     def get_member_count(self, obj):
+        if hasattr(obj, 'active_member_total'):
+            return obj.active_member_total
         return obj.members.filter(is_active=True).count()
 
 
@@ -46,6 +62,8 @@ class Meta:
         fields = ('id', 'version_name', 'cover_image', 'number_of_photocards', 'photocards_count')
     
     def get_photocards_count(self, obj):
+        if hasattr(obj, 'photocard_total'):
+            return obj.photocard_total
         return obj.photocards.count()
 
 
@@ -61,6 +79,8 @@ class Meta:
                  'group', 'versions', 'total_photocards')
     
     def get_total_photocards(self, obj):
+        if hasattr(obj, 'photocard_total'):
+            return obj.photocard_total
         return Photocard.objects.filter(album_version__album=obj).count()
 
 
@@ -87,7 +107,7 @@ class Meta:
                  'group', 'album_version', 'member')
 
 
-class PhotocardListSerializer(serializers.ModelSerializer):
+class PhotocardListSerializer(OwnershipMixin, serializers.ModelSerializer):
     """Serializer simplificado para lista de photocards"""
     group_name = serializers.CharField(source='group.name', read_only=True)
     member_name = serializers.CharField(source='member.stage_name', read_only=True)
@@ -106,7 +126,7 @@ class Meta:
         fields = ('id', 'name', 'version', 'image', 'release_date', 'group_name', 'group')
 
 
-class LightstickListSerializer(serializers.ModelSerializer):
+class LightstickListSerializer(OwnershipMixin, serializers.ModelSerializer):
     """Serializer simplificado para lista de lightsticks"""
     group_name = serializers.CharField(source='group.name', read_only=True)
     
@@ -0,0 +1,130 @@
+"""
+Señales del catálogo: mantienen los índices de búsqueda al día.
+
+Los cambios en un grupo, miembro o álbum se propagan a las filas que
+incluyen su nombre en el tsvector (p.ej. renombrar un grupo actualiza sus
+photocards). Los nombres coreanos se descomponen en jamo/초성 antes de
+guardar, el índice de autocompletado en memoria se actualiza y los conteos
+por faceta cacheados se invalidan al confirmar la transacción. Las cargas
+masivas con bulk_create no disparan señales y deben llamar a
+refresh_search_vectors / fill_hangul_fields / assign_group_positions o al
+comando rebuild_search_index.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .autocomplete import autocomplete_index
+from .facets import invalidate_facets
+from .hangul import fill_hangul_fields
+from .positions import assign_group_positions
+from .models import Group, Member, Album, Photocard, Lightstick
+from .search import refresh_search_vectors
+
+
+@receiver(pre_save, sender=Group)
+@receiver(pre_save, sender=Member)
+def fill_hangul(sender, instance, **kwargs):
+    fill_hangul_fields(instance)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_search_vectors(Group, Group.objects.filter(pk=instance.pk))
+    for model in (Member, Album, Photocard, Lightstick):
+        refresh_search_vectors(model, model.objects.filter(group_id=instance.pk))
+
+
+@receiver(post_save, sender=Member)
+def member_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_search_vectors(Member, Member.objects.filter(pk=instance.pk))
+    refresh_search_vectors(Photocard, Photocard.objects.filter(member_id=instance.pk))
+
+
+@receiver(post_save, sender=Album)
+def album_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_search_vectors(Album, Album.objects.filter(pk=instance.pk))
+    refresh_search_vectors(Photocard, Photocard.objects.filter(album_version__album_id=instance.pk))
+
+
+@receiver(post_save, sender=Photocard)
+@receiver(post_save, sender=Lightstick)
+def collectible_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_search_vectors(sender, sender.objects.filter(pk=instance.pk))
+
+
+@receiver(pre_save, sender=Photocard)
+def release_group_position(sender, instance, raw=False, **kwargs):
+    # Al cambiar de grupo la photocard recibe una posición nueva en el destino
+    if raw or instance._state.adding or instance.group_position is None:
+        return
+    old_group_id = sender.objects.filter(pk=instance.pk).values_list('group_id', flat=True).first()
+    if old_group_id != instance.group_id:
+        instance.group_position = None
+
+
+@receiver(post_save, sender=Photocard)
+def photocard_saved_position(sender, instance, raw=False, **kwargs):
+    if raw or instance.group_position is not None:
+        return
+    assign_group_positions(sender, sender.objects.filter(pk=instance.pk))
+    instance.refresh_from_db(fields=['group_position'])
+
+
+@receiver(post_save, sender=Group)
+def group_saved_autocomplete(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    group_id = instance.pk
+
+    def refresh():
+        # El nombre del grupo es el contexto de sus miembros, álbumes y lightsticks
+        autocomplete_index.refresh('group', [group_id])
+        for kind, model in (('member', Member), ('album', Album), ('lightstick', Lightstick)):
+            autocomplete_index.refresh(kind, model.objects.filter(group_id=group_id).values_list('pk', flat=True))
+
+    transaction.on_commit(refresh)
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_save, sender=Album)
+@receiver(post_save, sender=Lightstick)
+def entity_saved_autocomplete(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    kind, pk = sender._meta.model_name, instance.pk
+    transaction.on_commit(lambda: autocomplete_index.refresh(kind, [pk]))
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Member)
+@receiver(post_delete, sender=Album)
+@receiver(post_delete, sender=Lightstick)
+def entity_deleted_autocomplete(sender, instance, **kwargs):
+    # Django pone pk a None tras borrar: se captura ahora
+    kind, pk = sender._meta.model_name, instance.pk
+    transaction.on_commit(lambda: autocomplete_index.remove(kind, [pk]))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=Member)
+@receiver(post_save, sender=Album)
+@receiver(post_save, sender=Photocard)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Member)
+@receiver(post_delete, sender=Album)
+@receiver(post_delete, sender=Photocard)
+def catalog_changed_facets(sender, **kwargs):
+    if kwargs.get('raw'):
+        return
+    transaction.on_commit(invalidate_facets)
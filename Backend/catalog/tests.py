@@ -1,3 +1,758 @@
+import base64
+import threading
+import time
+from datetime import date
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .autocomplete import AutocompleteIndex
+from .filters import GroupFilter, AlbumFilter, PhotocardFilter, LightstickFilter
+from .models import Group, Member, Album, AlbumVersion, Photocard, Lightstick
+from .pagination import KeysetOptInPagination
+
+
+class AnonymousAPITestCase(TestCase):
+    """
+    Las peticiones anónimas de todos los tests comparten el límite de
+    AnonRateThrottle (por IP, en la caché local): se vacía antes de cada test.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+class FilterIndexTests(TestCase):
+    """
+    Cada combinación de filtros documentada en API.md, con la ordenación por
+    defecto de su vista, debe resolverse con un índice y no con Seq Scan.
+
+    Con tan pocas filas el planificador siempre preferiría recorrer la tabla,
+    así que se desactiva el Seq Scan: si aun así aparece es que ningún índice
+    sirve para la consulta. Además se rellenan las tablas con filas de otros
+    valores y se analizan, para que entre índices los costes no empaten y el
+    plan no dependa de las estadísticas que hayan dejado otros tests.
+    """
+
+    FILLER_ROWS = 2000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20),
+            agency='JYP Entertainment', group_type='Girl Group',
+        )
+        cls.member = Member.objects.create(
+            group=cls.group, stage_name='Nayeon', real_name='Im Na-yeon',
+            birth_date=date(1995, 9, 22), position='Vocalist',
+        )
+        cls.album = Album.objects.create(
+            group=cls.group, title='Formula of Love', release_date=date(2021, 11, 12), album_type='Full Album',
+        )
+        cls.version = AlbumVersion.objects.create(album=cls.album, version_name='Break It')
+        Photocard.objects.create(
+            group=cls.group, album_version=cls.version, member=cls.member, name='Nayeon Break It',
+            release_date=date(2021, 11, 12), photocard_type='Album',
+        )
+        Lightstick.objects.create(
+            group=cls.group, name='Candybong ∞', version='Ver. 3', release_date=date(2021, 12, 1),
+        )
+        cls.create_filler()
+
+    @classmethod
+    def create_filler(cls):
+        # Un valor distinto por fila en cada columna filtrable y fechas anteriores a 1910,
+        # lejos de las de las filas reales
+        dates = [date.fromordinal(date(1800, 1, 1).toordinal() + 20 * i) for i in range(cls.FILLER_ROWS)]
+        groups = Group.objects.bulk_create(
+            Group(
+                name=f'Group {i}', korean_name=f'그룹 {i}', debut_date=dates[i],
+                agency=f'Agency {i}', group_type=f'Type {i}',
+            )
+            for i in range(cls.FILLER_ROWS)
+        )
+        members = Member.objects.bulk_create(
+            Member(group=group, stage_name=f'Member {i}', real_name=f'Member {i}', birth_date=dates[i], position='Vocalist')
+            for i, group in enumerate(groups)
+        )
+        albums = Album.objects.bulk_create(
+            Album(group=group, title=f'Album {i}', release_date=dates[i], album_type=f'Type {i}')
+            for i, group in enumerate(groups)
+        )
+        versions = AlbumVersion.objects.bulk_create(
+            AlbumVersion(album=album, version_name=f'Version {i}') for i, album in enumerate(albums)
+        )
+        Photocard.objects.bulk_create(
+            Photocard(
+                group=groups[i], album_version=versions[i], member=members[i], name=f'Photocard {i}',
+                release_date=dates[i], photocard_type=f'Type {i}',
+            )
+            for i in range(cls.FILLER_ROWS)
+        )
+        Lightstick.objects.bulk_create(
+            Lightstick(group=group, name=f'Lightstick {i}', version=f'Ver. {i + 10}', release_date=dates[i])
+            for i, group in enumerate(groups)
+        )
+        with connection.cursor() as cursor:
+            for model in (Group, Member, Album, AlbumVersion, Photocard, Lightstick):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, filterset_class, data, ordering, index):
+        queryset = filterset_class(data, queryset=filterset_class._meta.model.objects.all()).qs
+        plan = queryset.order_by(*ordering).explain()
+        table = filterset_class._meta.model._meta.db_table
+        self.assertNotIn(f'Seq Scan on {table}', plan, f'{data}:\n{plan}')
+        self.assertIn(index, plan, f'{data}:\n{plan}')
+
+    def test_group_filters(self):
+        ordering = ['name', 'id']
+        cases = [
+            ({'group_type': 'Girl Group'}, 'catalog_group_type_name_idx'),
+            ({'agency': 'JYP Entertainment'}, 'catalog_group_agency_name_idx'),
+            ({'debut_year': '2015'}, 'catalog_group_debut_idx'),
+            ({'debut_after': '2015-01-01', 'debut_before': '2016-01-01'}, 'catalog_group_debut_idx'),
+        ]
+        for data, index in cases:
+            with self.subTest(data=data):
+                self.assertUsesIndex(GroupFilter, data, ordering, index)
+
+    def test_album_filters(self):
+        ordering = ['-release_date', 'id']
+        cases = [
+            ({}, 'catalog_album_date_idx'),
+            ({'group': str(self.group.pk)}, 'catalog_album_group_date_idx'),
+            ({'album_type': 'Full Album'}, 'catalog_album_type_date_idx'),
+            ({'release_year': '2021'}, 'catalog_album_date_idx'),
+            ({'release_after': '2021-01-01'}, 'catalog_album_date_idx'),
+        ]
+        for data, index in cases:
+            with self.subTest(data=data):
+                self.assertUsesIndex(AlbumFilter, data, ordering, index)
+
+    def test_photocard_filters(self):
+        ordering = ['-release_date', 'id']
+        cases = [
+            ({}, 'catalog_pc_date_idx'),
+            ({'group': str(self.group.pk)}, 'catalog_pc_group_date_idx'),
+            ({'member': str(self.member.pk)}, 'catalog_pc_member_date_idx'),
+            ({'album_version': str(self.version.pk)}, 'catalog_pc_version_date_idx'),
+            ({'photocard_type': 'Album'}, 'catalog_pc_type_date_idx'),
+            ({'release_year': '2021'}, 'catalog_pc_date_idx'),
+            ({'group': str(self.group.pk), 'release_year': '2021'}, 'catalog_pc_group_date_idx'),
+        ]
+        for data, index in cases:
+            with self.subTest(data=data):
+                self.assertUsesIndex(PhotocardFilter, data, ordering, index)
+
+    def test_lightstick_filters(self):
+        ordering = ['-release_date', 'id']
+        cases = [
+            ({}, 'catalog_ls_date_idx'),
+            ({'group': str(self.group.pk)}, 'catalog_ls_group_date_idx'),
+            ({'version': 'Ver. 3'}, 'catalog_ls_version_date_idx'),
+            ({'release_year': '2021'}, 'catalog_ls_date_idx'),
+        ]
+        for data, index in cases:
+            with self.subTest(data=data):
+                self.assertUsesIndex(LightstickFilter, data, ordering, index)
+
+    def test_year_filter_is_a_date_range(self):
+        queryset = PhotocardFilter({'release_year': '2021'}, queryset=Photocard.objects.all()).qs
+        sql = str(queryset.query)
+        self.assertNotIn('EXTRACT', sql.upper())
+        self.assertEqual(queryset.count(), 1)
+        self.assertFalse(PhotocardFilter({'release_year': '2020'}, queryset=Photocard.objects.all()).qs.exists())
+
+
+class KeysetPaginationTests(AnonymousAPITestCase):
+    """Recorrer todas las páginas con ?pagination=cursor devuelve cada fila una vez"""
+
+    @classmethod
+    def setUpTestData(cls):
+        group = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20),
+            agency='JYP Entertainment', group_type='Girl Group',
+        )
+        album = Album.objects.create(
+            group=group, title='Formula of Love', release_date=date(2021, 11, 12), album_type='Full Album',
+        )
+        version = AlbumVersion.objects.create(album=album, version_name='Break It')
+        # Fechas, imágenes y relevancias repetidas para que el desempate por id cuente
+        for i in range(11):
+            Photocard.objects.create(
+                group=group, album_version=version, name='Twice Twice' if i % 3 == 0 else f'Card {i}',
+                image=None if i % 2 else f'https://example.com/{i % 4}.jpg',
+                release_date=date(2021, 1 + i % 3, 1), photocard_type='Album',
+            )
+        cls.ids = set(Photocard.objects.values_list('pk', flat=True))
+
+    def walk(self, url):
+        client = APIClient()
+        ids, pages = [], 0
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.data['results']]
+            url, pages = response.data['next'], pages + 1
+        self.assertEqual(len(ids), len(set(ids)), 'filas repetidas')
+        return ids, pages
+
+    def test_walk_default_and_ordering(self):
+        for query in ('', '&ordering=name', '&ordering=-name', '&ordering=release_date'):
+            with self.subTest(query=query):
+                ids, pages = self.walk(f'/api/catalog/photocards/?pagination=cursor&page_size=3{query}')
+                self.assertEqual(set(ids), {str(pk) for pk in self.ids})
+                self.assertEqual(pages, 4)
+
+    def test_walk_search_rank(self):
+        cards = {str(pk) for pk in Photocard.objects.filter(name__startswith='Card').values_list('pk', flat=True)}
+        everything = {str(pk) for pk in self.ids}
+        for query, wanted in (('search=card', cards), ('search=twice', everything)):
+            with self.subTest(query=query):
+                ids, pages = self.walk(f'/api/catalog/photocards/?pagination=cursor&page_size=2&{query}')
+                self.assertEqual(pages, (len(wanted) + 1) // 2)
+                self.assertEqual(set(ids), wanted)
+
+    def test_walk_nullable_ordering(self):
+        # image es NULL en la mitad de las filas: van al final en ASC y al principio en DESC
+        factory = APIRequestFactory()
+        for ordering in ('image', '-image'):
+            with self.subTest(ordering=ordering):
+                queryset = Photocard.objects.order_by(ordering)
+                ids, cursor = [], None
+                while True:
+                    params = {'pagination': 'cursor', 'page_size': 2} | ({'cursor': cursor} if cursor else {})
+                    paginator = KeysetOptInPagination()
+                    ids += [obj.pk for obj in paginator.paginate_queryset(queryset, Request(factory.get('/', params)))]
+                    link = paginator.get_next_link()
+                    if link is None:
+                        break
+                    cursor = parse_qs(urlparse(link).query)['cursor'][0]
+                self.assertEqual(len(ids), len(set(ids)))
+                self.assertEqual(ids, list(queryset.order_by(ordering, 'id').values_list('pk', flat=True)))
+
+    def test_bad_cursor(self):
+        client = APIClient()
+        encode = lambda text: base64.urlsafe_b64encode(text.encode()).decode()
+        for cursor in ('no-es-un-cursor', encode('{"a": 1}'), encode('["2021-01-01"]'), encode('["ayer", "x"]')):
+            with self.subTest(cursor=cursor):
+                response = client.get('/api/catalog/photocards/', {'pagination': 'cursor', 'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+class AutocompleteRebuildTests(TestCase):
+    """Al caducar el índice una sola petición lo reconstruye y las demás usan el anterior"""
+
+    def test_single_rebuild(self):
+        index = AutocompleteIndex()
+        index._entries = [('twice', 'group', '1', 'TWICE', '트와이스')]
+        index._built_at = time.monotonic() - index.ttl - 1
+        started, release = threading.Event(), threading.Event()
+
+        def slow_build():
+            started.set()
+            release.wait(5)
+            index._entries = [('itzy', 'group', '2', 'ITZY', '있지')]
+            index._built_at = time.monotonic()
+
+        with mock.patch.object(index, 'build', side_effect=slow_build) as build:
+            builder = threading.Thread(target=index.search, args=('twi',))
+            builder.start()
+            self.assertTrue(started.wait(5))
+            # Mientras se reconstruye, las demás búsquedas no esperan y ven el índice anterior
+            self.assertEqual([row['name'] for row in index.search('twi')], ['TWICE'])
+            release.set()
+            builder.join(5)
+            self.assertEqual([row['name'] for row in index.search('itz')], ['ITZY'])
+        self.assertEqual(build.call_count, 1)
+
+
+class AutocompleteUpdateTests(TestCase):
+    """Guardar o borrar una entidad solo toca sus claves: el resto de la lista no se reconstruye"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.twice = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20),
+            agency='JYP Entertainment', group_type='Girl Group',
+        )
+        cls.itzy = Group.objects.create(
+            name='ITZY', korean_name='있지', debut_date=date(2019, 2, 12),
+            agency='JYP Entertainment', group_type='Girl Group',
+        )
+        cls.nayeon = Member.objects.create(
+            group=cls.twice, stage_name='Nayeon', real_name='Im Na-yeon',
+            birth_date=date(1995, 9, 22), position='Vocalist',
+        )
+
+    def setUp(self):
+        self.index = AutocompleteIndex()
+        self.index.build()
+
+    def names(self, text):
+        return [row['name'] for row in self.index.search(text)]
+
+    def test_refresh_updates_in_place(self):
+        entries = self.index._entries
+        Group.objects.filter(pk=self.itzy.pk).update(name='ITZY Remix', korean_name='있지 리믹스')
+        with mock.patch('catalog.autocomplete.heapq.merge') as merge:
+            self.index.refresh('group', [self.itzy.pk])
+        merge.assert_not_called()
+        self.assertIs(self.index._entries, entries)
+        self.assertEqual(entries, sorted(entries))
+        self.assertEqual(self.names('remix'), ['ITZY Remix'])
+        self.assertEqual(self.names('있지 리'), ['ITZY Remix'])
+        self.assertEqual(self.names('twi'), ['TWICE'])
+        self.assertEqual(self.names('naye'), ['Nayeon'])
+
+    def test_remove(self):
+        self.index.remove('member', [self.nayeon.pk])
+        self.assertEqual(self.names('naye'), [])
+        self.assertEqual(self.names('twi'), ['TWICE'])
+        self.assertNotIn(('member', self.nayeon.pk), self.index._by_entity)
+
+    def test_large_batch_matches_build(self):
+        Group.objects.filter(pk=self.itzy.pk).update(name='ITZY Japan')
+        self.index.MERGE_THRESHOLD = 0
+        self.index.refresh('group', [self.twice.pk, self.itzy.pk])
+        rebuilt = AutocompleteIndex()
+        rebuilt.build()
+        self.assertEqual(self.index._entries, rebuilt._entries)
+        self.assertEqual(self.index._by_entity, rebuilt._by_entity)
+
+
+class FullTextSearchTests(AnonymousAPITestCase):
+    """?search= sobre el tsvector: prefijos, orden por relevancia y vectores al día con las relaciones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.twice = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20),
+            agency='JYP Entertainment', group_type='Girl Group',
+        )
+        cls.itzy = Group.objects.create(
+            name='ITZY', korean_name='있지', debut_date=date(2019, 2, 12),
+            agency='JYP Entertainment', group_type='Girl Group',
+        )
+        cls.nayeon = Member.objects.create(
+            group=cls.twice, stage_name='Nayeon', real_name='Im Na-yeon',
+            birth_date=date(1995, 9, 22), position='Vocalist',
+        )
+        cls.album = Album.objects.create(
+            group=cls.twice, title='Formula of Love', release_date=date(2021, 11, 12), album_type='Full Album',
+        )
+        version = AlbumVersion.objects.create(album=cls.album, version_name='Break It')
+        other_album = Album.objects.create(
+            group=cls.twice, title='Fancy You', release_date=date(2019, 4, 22), album_type='Mini Album',
+        )
+        other_version = AlbumVersion.objects.create(album=other_album, version_name='A')
+        # 'love' en el nombre (peso A) en una photocard antigua y solo en el
+        # título del álbum (peso C) en otra más reciente
+        cls.by_name = Photocard.objects.create(
+            group=cls.twice, album_version=other_version, member=cls.nayeon, name='Lovely Nayeon',
+            release_date=date(2019, 4, 22), photocard_type='Album',
+        )
+        cls.by_album = Photocard.objects.create(
+            group=cls.twice, album_version=version, name='Break It Selfie',
+            release_date=date(2021, 11, 12), photocard_type='Album',
+        )
+
+    def names(self, url, field='name'):
+        response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200)
+        return [row[field] for row in response.data['results']]
+
+    def test_prefix_matching(self):
+        self.assertEqual(self.names('/api/catalog/groups/?search=twi'), ['TWICE'])
+        self.assertEqual(self.names('/api/catalog/groups/?search=트와'), ['TWICE'])
+        self.assertEqual(self.names('/api/catalog/members/?search=na', 'stage_name'), ['Nayeon'])
+        self.assertEqual(self.names('/api/catalog/albums/?search=formu lo', 'title'), ['Formula of Love'])
+        # Varios términos se combinan con AND
+        self.assertEqual(self.names('/api/catalog/photocards/?search=break selfie'), ['Break It Selfie'])
+        self.assertEqual(self.names('/api/catalog/groups/?search=twi itzy'), [])
+
+    def test_operators_are_not_interpreted(self):
+        for term in ('twi:* | itzy', "twi')&!(", '&|!'):
+            with self.subTest(term=term):
+                response = APIClient().get('/api/catalog/groups/', {'search': term})
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names('/api/catalog/groups/?search=%26%7C!'), ['ITZY', 'TWICE'])
+
+    def test_rank_then_explicit_ordering(self):
+        # Sin ?ordering= manda la relevancia; con él, la ordenación pedida
+        self.assertEqual(self.names('/api/catalog/photocards/?search=love'), ['Lovely Nayeon', 'Break It Selfie'])
+        self.assertEqual(
+            self.names('/api/catalog/photocards/?search=love&ordering=-release_date'),
+            ['Break It Selfie', 'Lovely Nayeon'],
+        )
+        self.assertEqual(
+            self.names('/api/catalog/photocards/?search=love&ordering=name'), ['Break It Selfie', 'Lovely Nayeon'],
+        )
+
+    def test_vectors_follow_related_renames(self):
+        self.twice.name = 'Twicelights'
+        self.twice.save()
+        self.nayeon.stage_name = 'Nabongs'
+        self.nayeon.save()
+        self.album.title = 'Eyes Wide Open'
+        self.album.save()
+        self.assertEqual(self.names('/api/catalog/members/?search=twicelights', 'stage_name'), ['Nabongs'])
+        self.assertEqual(self.names('/api/catalog/photocards/?search=nabongs'), ['Lovely Nayeon'])
+        self.assertEqual(self.names('/api/catalog/photocards/?search=eyes wide'), ['Break It Selfie'])
+        self.assertEqual(
+            sorted(self.names('/api/catalog/photocards/?search=twicelights')), ['Break It Selfie', 'Lovely Nayeon'],
+        )
+        self.assertEqual(self.names('/api/catalog/photocards/?search=formula'), [])
+
+
+class FuzzySearchTests(AnonymousAPITestCase):
+    """?search_mode=fuzzy tolera errores de romanización en grupos y miembros"""
+
+    @classmethod
+    def setUpTestData(cls):
+        twice = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20),
+            agency='JYP Entertainment', group_type='Girl Group',
+        )
+        Group.objects.create(
+            name='LE SSERAFIM', korean_name='르세라핌', debut_date=date(2022, 5, 2),
+            agency='Source Music', group_type='Girl Group',
+        )
+        for stage_name, real_name in (('Chaeyoung', 'Son Chae-young'), ('Jihyo', 'Park Ji-soo'), ('Mina', 'Myoui Mina')):
+            Member.objects.create(
+                group=twice, stage_name=stage_name, real_name=real_name,
+                birth_date=date(1999, 4, 23), position='Vocalist',
+            )
+
+    def names(self, url, field):
+        response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200)
+        return [row[field] for row in response.data['results']]
+
+    def test_typo_in_group_name(self):
+        for term, name in (('twise', 'TWICE'), ('TWCE', 'TWICE'), ('le serafim', 'LE SSERAFIM'), ('lesserafim', 'LE SSERAFIM')):
+            with self.subTest(term=term):
+                self.assertEqual(self.names(f'/api/catalog/groups/?search_mode=fuzzy&search={term}', 'name')[:1], [name])
+
+    def test_typo_in_member_name(self):
+        self.assertEqual(self.names('/api/catalog/members/?search_mode=fuzzy&search=Chaeyeong', 'stage_name'), ['Chaeyoung'])
+        self.assertEqual(self.names('/api/catalog/members/?search_mode=fuzzy&search=jihio', 'stage_name')[:1], ['Jihyo'])
+        # Coincidencia con una palabra del nombre real
+        self.assertEqual(self.names('/api/catalog/members/?search_mode=fuzzy&search=myoi', 'stage_name'), ['Mina'])
+
+    def test_exact_search_does_not_tolerate_typos(self):
+        self.assertEqual(self.names('/api/catalog/members/?search=Chaeyeong', 'stage_name'), [])
+        self.assertEqual(self.names('/api/catalog/groups/?search=zzzz&search_mode=fuzzy', 'name'), [])
+
+
+class HangulSearchTests(AnonymousAPITestCase):
+    """?search_mode=hangul busca por consonantes iniciales o por jamo, aunque la sílaba esté a medias"""
+
+    @classmethod
+    def setUpTestData(cls):
+        twice = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20),
+            agency='JYP Entertainment', group_type='Girl Group',
+        )
+        Group.objects.create(
+            name='TXT', korean_name='투모로우바이투게더', debut_date=date(2019, 3, 4),
+            agency='BIGHIT MUSIC', group_type='Boy Group',
+        )
+        nayeon = Member.objects.create(
+            group=twice, stage_name='나연', real_name='임나연', birth_date=date(1995, 9, 22), position='Vocalist',
+        )
+        Member.objects.create(
+            group=twice, stage_name='나은', real_name='손나은', birth_date=date(1994, 2, 10), position='Vocalist',
+        )
+        album = Album.objects.create(
+            group=twice, title='Formula of Love', release_date=date(2021, 11, 12), album_type='Full Album',
+        )
+        version = AlbumVersion.objects.create(album=album, version_name='Break It')
+        Photocard.objects.create(
+            group=twice, album_version=version, member=nayeon, name='Nayeon Break It',
+            release_date=date(2021, 11, 12), photocard_type='Album',
+        )
+
+    def names(self, path, term, field):
+        response = APIClient().get(path, {'search_mode': 'hangul', 'search': term})
+        self.assertEqual(response.status_code, 200)
+        return sorted(row[field] for row in response.data['results'])
+
+    def test_chosung(self):
+        self.assertEqual(self.names('/api/catalog/groups/', 'ㅌㅇㅇㅅ', 'name'), ['TWICE'])
+        self.assertEqual(self.names('/api/catalog/groups/', 'ㅌ', 'name'), ['TWICE', 'TXT'])
+        self.assertEqual(self.names('/api/catalog/members/', 'ㄴㅇ', 'stage_name'), ['나연', '나은'])
+        self.assertEqual(self.names('/api/catalog/photocards/', 'ㄴㅇ', 'name'), ['Nayeon Break It'])
+
+    def test_partial_jamo(self):
+        # 트왕: la última sílaba aún se está escribiendo (트와 + ㅇ de 이)
+        self.assertEqual(self.names('/api/catalog/groups/', '트왕', 'name'), ['TWICE'])
+        # 트와잇: la ㅅ final de 잇 aún puede pasar a ser la inicial de 스
+        self.assertEqual(self.names('/api/catalog/groups/', '트와잇', 'name'), ['TWICE'])
+        self.assertEqual(self.names('/api/catalog/groups/', '투모', 'name'), ['TXT'])
+        self.assertEqual(self.names('/api/catalog/members/', '나여', 'stage_name'), ['나연'])
+        self.assertEqual(self.names('/api/catalog/members/', '나', 'stage_name'), ['나연', '나은'])
+
+    def test_no_match(self):
+        self.assertEqual(self.names('/api/catalog/groups/', 'ㅎㅎ', 'name'), [])
+        self.assertEqual(self.names('/api/catalog/groups/', '트와스', 'name'), [])
+        # Sin hangul en la consulta no hay nada que buscar
+        self.assertEqual(self.names('/api/catalog/groups/', 'twice', 'name'), [])
+
+
+class UnifiedSearchTests(AnonymousAPITestCase):
+    """/api/catalog/search/ agrupa por tipo los mejores resultados de cada modelo en una consulta"""
+
+    @classmethod
+    def setUpTestData(cls):
+        twice = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20),
+            agency='JYP Entertainment', group_type='Girl Group',
+        )
+        Member.objects.create(
+            group=twice, stage_name='Nayeon', real_name='Im Na-yeon', birth_date=date(1995, 9, 22), position='Vocalist',
+        )
+        album = Album.objects.create(
+            group=twice, title='Formula of Love', release_date=date(2021, 11, 12), album_type='Full Album',
+        )
+        version = AlbumVersion.objects.create(album=album, version_name='Break It')
+        for i in range(8):
+            Photocard.objects.create(
+                group=twice, album_version=version, name=f'Twice Card {i}',
+                release_date=date(2021, 11, 12), photocard_type='Album',
+            )
+        Lightstick.objects.create(group=twice, name='Candybong ∞', version='Ver. 3', release_date=date(2021, 12, 1))
+
+    def search(self, **params):
+        response = APIClient().get('/api/catalog/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_grouped_by_type(self):
+        with self.assertNumQueries(1):
+            results = self.search(q='twice')
+        self.assertEqual(set(results), {'group', 'member', 'album', 'photocard', 'lightstick'})
+        self.assertEqual([row['name'] for row in results['group']], ['TWICE'])
+        # Los demás coinciden por el nombre del grupo, que es su contexto
+        self.assertEqual([row['name'] for row in results['member']], ['Nayeon'])
+        self.assertEqual([row['context'] for row in results['album']], ['TWICE'])
+        self.assertEqual(len(results['photocard']), 5)
+        self.assertEqual([row['name'] for row in results['lightstick']], ['Candybong ∞'])
+        for rows in results.values():
+            self.assertEqual([row['rank'] for row in rows], sorted((row['rank'] for row in rows), reverse=True))
+
+    def test_limit_per_type(self):
+        for limit, photocards in (('2', 2), ('7', 7), ('50', 8), ('0', 1), ('x', 5)):
+            with self.subTest(limit=limit):
+                results = self.search(q='twice', limit=limit)
+                self.assertEqual(len(results['photocard']), photocards)
+                self.assertEqual(len(results['group']), 1)
+
+    def test_types(self):
+        results = self.search(q='twice', types='group,photocard,nope')
+        self.assertEqual(set(results), {'group', 'photocard'})
+
+    def test_empty_query(self):
+        for query in ('', '   ', '&|!'):
+            with self.subTest(query=query), self.assertNumQueries(0):
+                results = self.search(q=query)
+            self.assertTrue(results)
+            self.assertFalse(any(results.values()))
+        self.assertFalse(any(self.search(q='zzzz').values()))
+
+
+class FacetCountTests(AnonymousAPITestCase):
+    """Cada faceta se cuenta sin su propio filtro y los conteos cacheados se invalidan al cambiar el catálogo"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.twice = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20),
+            agency='JYP Entertainment', group_type='Girl Group',
+        )
+        cls.itzy = Group.objects.create(
+            name='ITZY', korean_name='있지', debut_date=date(2019, 2, 12),
+            agency='JYP Entertainment', group_type='Girl Group',
+        )
+        cls.nayeon = Member.objects.create(
+            group=cls.twice, stage_name='Nayeon', real_name='Im Na-yeon',
+            birth_date=date(1995, 9, 22), position='Vocalist',
+        )
+        yeji = Member.objects.create(
+            group=cls.itzy, stage_name='Yeji', real_name='Hwang Ye-ji', birth_date=date(2000, 5, 26), position='Leader',
+        )
+        twice_album = Album.objects.create(
+            group=cls.twice, title='Formula of Love', release_date=date(2021, 11, 12), album_type='Full Album',
+        )
+        itzy_album = Album.objects.create(
+            group=cls.itzy, title='Checkmate', release_date=date(2022, 7, 15), album_type='Mini Album',
+        )
+        cls.version = AlbumVersion.objects.create(album=twice_album, version_name='Break It')
+        itzy_version = AlbumVersion.objects.create(album=itzy_album, version_name='A')
+        for group, version, member, release_date, photocard_type in (
+            (cls.twice, cls.version, cls.nayeon, date(2021, 11, 12), 'Album'),
+            (cls.twice, cls.version, None, date(2022, 1, 5), 'Album'),
+            (cls.twice, cls.version, cls.nayeon, date(2022, 1, 5), 'POB'),
+            (cls.itzy, itzy_version, yeji, date(2022, 7, 15), 'Album'),
+            (cls.itzy, itzy_version, None, date(2022, 7, 15), 'POB'),
+        ):
+            Photocard.objects.create(
+                group=group, album_version=version, member=member, name='Card',
+                release_date=release_date, photocard_type=photocard_type,
+            )
+
+    def facets(self, path, **params):
+        response = APIClient().get(path, params)
+        self.assertEqual(response.status_code, 200)
+        return {
+            name: [(row['label'], row['count']) for row in rows]
+            for name, rows in response.data['facets'].items()
+        }
+
+    def test_each_facet_ignores_its_own_filter(self):
+        facets = self.facets('/api/catalog/photocards/facets/', group=self.twice.pk, photocard_type='Album')
+        # grupo: solo con photocard_type=Album; tipo: solo con group=TWICE
+        self.assertEqual(facets['group'], [('TWICE', 2), ('ITZY', 1)])
+        self.assertEqual(facets['photocard_type'], [('Album', 2), ('POB', 1)])
+        # miembro y año: con los dos filtros (las photocards sin miembro no cuentan)
+        self.assertEqual(facets['member'], [('Nayeon', 1)])
+        self.assertEqual(facets['release_year'], [('2021', 1), ('2022', 1)])
+
+    def test_unfiltered_and_albums(self):
+        facets = self.facets('/api/catalog/photocards/facets/')
+        self.assertEqual(facets['group'], [('TWICE', 3), ('ITZY', 2)])
+        self.assertEqual(facets['release_year'], [('2022', 4), ('2021', 1)])
+        facets = self.facets('/api/catalog/albums/facets/', group=self.itzy.pk)
+        self.assertEqual(facets['group'], [('ITZY', 1), ('TWICE', 1)])
+        self.assertEqual(facets['album_type'], [('Mini Album', 1)])
+
+    def test_invalid_filter(self):
+        response = APIClient().get('/api/catalog/photocards/facets/', {'release_year': 'ayer'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_catalog_save_invalidates_cached_counts(self):
+        path = '/api/catalog/photocards/facets/'
+        self.assertEqual(self.facets(path, group=self.twice.pk)['photocard_type'], [('Album', 2), ('POB', 1)])
+        # bulk_create no dispara señales: la respuesta sigue saliendo de la caché
+        Photocard.objects.bulk_create([Photocard(
+            group=self.twice, album_version=self.version, name='Card',
+            release_date=date(2022, 1, 5), photocard_type='POB',
+        )])
+        self.assertEqual(self.facets(path, group=self.twice.pk)['photocard_type'], [('Album', 2), ('POB', 1)])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.nayeon.position = 'Lead Vocalist'
+            self.nayeon.save()
+        self.assertEqual(self.facets(path, group=self.twice.pk)['photocard_type'], [('Album', 2), ('POB', 2)])
+
+
+class CatalogQueryCountTests(AnonymousAPITestCase):
+    """
+    Las listas y los detalles del catálogo cargan sus relaciones y conteos
+    anotados en un número fijo de consultas: el mismo con páginas de 1 y de
+    100 filas.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        groups = Group.objects.bulk_create([
+            Group(
+                name=f'Group {i}', korean_name=f'그룹 {i}', debut_date=date(2015, 10, 20),
+                agency='JYP Entertainment', group_type='Girl Group',
+            )
+            for i in range(100)
+        ])
+        members = Member.objects.bulk_create([
+            Member(
+                group=group, stage_name=f'Member {i}-{j}', real_name=f'Member {i}-{j}',
+                birth_date=date(1995, 9, 22), position='Vocalist', is_active=j == 0,
+            )
+            for i, group in enumerate(groups) for j in range(2)
+        ])
+        albums = Album.objects.bulk_create([
+            Album(group=group, title=f'Album {i}', release_date=date(2021, 11, 12), album_type='Full Album')
+            for i, group in enumerate(groups)
+        ])
+        versions = AlbumVersion.objects.bulk_create([
+            AlbumVersion(album=album, version_name=f'Version {j}') for album in albums for j in range(2)
+        ])
+        Photocard.objects.bulk_create([
+            Photocard(
+                group=version.album.group, album_version=version, member=members[2 * (i // 2)],
+                name=f'Photocard {i}-{j}', release_date=date(2021, 11, 12), photocard_type='Album',
+            )
+            for i, version in enumerate(versions) for j in range(3)
+        ])
+        Lightstick.objects.bulk_create([
+            Lightstick(group=group, name=f'Lightstick {i}', version='Ver. 1', release_date=date(2021, 12, 1))
+            for i, group in enumerate(groups)
+        ])
+        cls.group, cls.album, cls.version = groups[0], albums[0], versions[0]
+        cls.member = members[0]
+        cls.photocard = Photocard.objects.filter(album_version=cls.version).first()
+        cls.lightstick = Lightstick.objects.filter(group=cls.group).first()
+
+    def queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response.data, [query['sql'] for query in queries]
+
+    def assertConstantQueries(self, url, expected):
+        for size in (1, 100):
+            with mock.patch.object(PageNumberPagination, 'page_size', size):
+                data, queries = self.queries(url)
+            self.assertEqual(len(data['results']), min(size, data['count']), url)
+            self.assertEqual(len(queries), expected, f'{url} (page_size={size}):\n' + '\n'.join(queries))
+        return data['results']
+
+    def test_lists(self):
+        for url in ('/api/catalog/groups/', '/api/catalog/members/', '/api/catalog/albums/',
+                    '/api/catalog/album-versions/', '/api/catalog/photocards/', '/api/catalog/lightsticks/',
+                    f'/api/catalog/groups/{self.group.pk}/albums/', f'/api/catalog/groups/{self.group.pk}/photocards/',
+                    f'/api/catalog/groups/{self.group.pk}/lightsticks/', f'/api/catalog/albums/{self.album.pk}/photocards/',
+                    f'/api/catalog/album-versions/{self.version.pk}/photocards/',
+                    f'/api/catalog/members/{self.member.pk}/photocards/'):
+            with self.subTest(url=url):
+                # COUNT(*) de la paginación y la página
+                self.assertConstantQueries(url, 2)
+
+    def test_details(self):
+        for url, expected in (
+            (f'/api/catalog/groups/{self.group.pk}/', 2),
+            (f'/api/catalog/members/{self.member.pk}/', 1),
+            (f'/api/catalog/albums/{self.album.pk}/', 3),
+            (f'/api/catalog/album-versions/{self.version.pk}/', 1),
+            (f'/api/catalog/photocards/{self.photocard.pk}/', 1),
+            (f'/api/catalog/lightsticks/{self.lightstick.pk}/', 1),
+        ):
+            with self.subTest(url=url):
+                data, queries = self.queries(url)
+                self.assertEqual(len(queries), expected, '\n'.join(queries))
+
+    def test_annotated_counts(self):
+        # Los conteos salen de anotaciones en la misma consulta de la página
+        results = self.assertConstantQueries('/api/catalog/groups/', 2)
+        self.assertEqual({row['member_count'] for row in results}, {1})
+        results = self.assertConstantQueries('/api/catalog/album-versions/', 2)
+        self.assertEqual({row['photocards_count'] for row in results}, {3})
 
-# Create your tests here.
+        data, queries = self.queries(f'/api/catalog/groups/{self.group.pk}/')
+        self.assertEqual((data['album_count'], len(data['members'])), (1, 2))
+        data, queries = self.queries(f'/api/catalog/albums/{self.album.pk}/')
+        self.assertEqual(data['total_photocards'], 6)
+        self.assertEqual([version['photocards_count'] for version in data['versions']], [3, 3])
+        self.assertEqual(data['group']['member_count'], 1)
+        data, queries = self.queries(f'/api/catalog/album-versions/{self.version.pk}/')
+        self.assertEqual(data['photocards_count'], 3)
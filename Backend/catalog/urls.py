@@ -18,6 +18,7 @@
     
     # Álbumes
     path('albums/', views.AlbumListView.as_view(), name='album-list'),
+    path('albums/facets/', views.AlbumFacetsView.as_view(), name='album-facets'),
     path('albums/<uuid:pk>/', views.AlbumDetailView.as_view(), name='album-detail'),
     path('albums/<uuid:album_id>/photocards/', views.AlbumPhotocardsView.as_view(), name='album-photocards'),
     
@@ -28,8 +29,13 @@
     
     # Photocards
     path('photocards/', views.PhotocardListView.as_view(), name='photocard-list'),
+    path('photocards/facets/', views.PhotocardFacetsView.as_view(), name='photocard-facets'),
     path('photocards/<uuid:pk>/', views.PhotocardDetailView.as_view(), name='photocard-detail'),
     
+    # Búsqueda
+    path('autocomplete/', views.autocomplete_view, name='autocomplete'),
+    path('search/', views.unified_search_view, name='search'),
+    
     # Lightsticks
     path('lightsticks/', views.LightstickListView.as_view(), name='lightstick-list'),
     path('lightsticks/<uuid:pk>/', views.LightstickDetailView.as_view(), name='lightstick-detail'),
@@ -1,5 +1,10 @@
 from rest_framework import generics, permissions, filters
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.response import Response
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
 from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
 from .models import Group, Member, Album, AlbumVersion, Photocard, Lightstick
 from .serializers import (
     GroupSerializer,
@@ -14,35 +19,112 @@
     LightstickListSerializer
 )
 from .filters import GroupFilter, AlbumFilter, PhotocardFilter, LightstickFilter
+from .autocomplete import KINDS, autocomplete_index
+from .facets import ALBUM_FACETS, PHOTOCARD_FACETS, cached_facets, count_facets, filter_key
+from .pagination import KeysetOptInPagination
+from .search import FullTextSearchFilter, UNIFIED_COLUMNS, unified_search
+
+
+# Planes de carga por serializer: cada vista declara los JOINs que necesita su
+# serializer para que una página cueste un número fijo de consultas.
+
+def group_list_queryset():
+    """Grupos con member_count anotado para GroupListSerializer"""
+    return Group.objects.defer('search_vector').annotate(
+        active_member_total=Count('members', filter=Q(members__is_active=True))
+    )
+
+
+def album_version_queryset():
+    """Versiones con photocards_count anotado para AlbumVersionSerializer"""
+    return AlbumVersion.objects.annotate(photocard_total=Count('photocards'))
+
+
+def album_photocard_total():
+    """Subconsulta con el total de photocards de un álbum (todas sus versiones)"""
+    totals = Photocard.objects.filter(
+        album_version__album=OuterRef('pk')
+    ).order_by().values('album_version__album').annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(totals, output_field=IntegerField()), 0)
+
+
+def photocard_list_queryset():
+    """Photocards con lo que lee PhotocardListSerializer (group.name, member.stage_name)"""
+    return Photocard.objects.select_related('group', 'member').only(
+        'id', 'name', 'image', 'photocard_type', 'release_date',
+        'group__name', 'member__stage_name'
+    )
+
+
+def lightstick_list_queryset():
+    """Lightsticks con lo que lee LightstickListSerializer (group.name)"""
+    return Lightstick.objects.select_related('group').only(
+        'id', 'name', 'version', 'image', 'release_date', 'group__name'
+    )
+
+
+def album_list_queryset():
+    """Álbumes con lo que lee AlbumListSerializer (group.name)"""
+    return Album.objects.select_related('group').only(
+        'id', 'title', 'release_date', 'album_type', 'cover_image', 'group__name'
+    )
+
+
+class OwnershipOverlayMixin:
+    """
+    Con ?with_ownership=1 y un usuario autenticado, cada fila de la página
+    lleva owned_quantity y wishlist_priority de ese usuario, leídos con una
+    consulta para toda la página (ver collection.ownership).
+    """
+    ownership_query_param = 'with_ownership'
+
+    def with_ownership(self):
+        return (
+            self.request.user.is_authenticated
+            and self.request.query_params.get(self.ownership_query_param) in ('1', 'true')
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        if args and kwargs.get('many') and self.with_ownership():
+            from collection.ownership import ownership_overlay
+            kind = self.get_serializer_class().Meta.model._meta.model_name
+            kwargs['context'] = self.get_serializer_context() | {
+                'ownership': ownership_overlay(self.request.user, kind, [obj.pk for obj in args[0]]),
+            }
+        return super().get_serializer(*args, **kwargs)
 
 
 class GroupListView(generics.ListAPIView):
     """Vista para listar grupos"""
-    queryset = Group.objects.all()
+    queryset = group_list_queryset()
     serializer_class = GroupListSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_class = GroupFilter
     search_fields = ['name', 'korean_name']
+    fuzzy_search_fields = ['name', 'korean_name']
+    hangul_search_fields = ['korean_name']
     ordering_fields = ['name', 'debut_date']
     ordering = ['name']
 
 
 class GroupDetailView(generics.RetrieveAPIView):
     """Vista para ver detalles de un grupo"""
-    queryset = Group.objects.all()
+    queryset = Group.objects.prefetch_related('members').annotate(album_total=Count('albums'))
     serializer_class = GroupSerializer
     permission_classes = [permissions.AllowAny]
 
 
 class MemberListView(generics.ListAPIView):
     """Vista para listar miembros"""
-    queryset = Member.objects.all()
+    queryset = Member.objects.defer('search_vector')
     serializer_class = MemberSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['group', 'position', 'is_active']
     search_fields = ['stage_name', 'real_name']
+    fuzzy_search_fields = ['stage_name', 'real_name']
+    hangul_search_fields = ['stage_name']
     ordering_fields = ['stage_name', 'birth_date']
     ordering = ['group', 'stage_name']
 
@@ -56,26 +138,71 @@ class MemberDetailView(generics.RetrieveAPIView):
 
 class AlbumListView(generics.ListAPIView):
     """Vista para listar álbumes"""
-    queryset = Album.objects.all()
+    queryset = album_list_queryset()
     serializer_class = AlbumListSerializer
+    pagination_class = KeysetOptInPagination
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_class = AlbumFilter
     search_fields = ['title', 'group__name']
+    hangul_search_fields = ['group__korean_name']
     ordering_fields = ['title', 'release_date']
     ordering = ['-release_date']
 
 
+class CatalogFacetsView(generics.GenericAPIView):
+    """
+    Conteos por faceta de una lista del catálogo (ver catalog.facets).
+
+    Acepta los mismos parámetros que el FilterSet de la lista; ?search=,
+    ?ordering= y la paginación se ignoran.
+    """
+    permission_classes = [permissions.AllowAny]
+    facets = {}
+
+    def get(self, request, *args, **kwargs):
+        key = filter_key(self.filterset_class, request.query_params)
+        counts = cached_facets(
+            self.queryset.model._meta.model_name, key, lambda: self.count_facets(request)
+        )
+        return Response({'facets': counts})
+
+    def count_facets(self, request):
+        filterset = self.filterset_class(request.query_params, queryset=self.get_queryset(), request=request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+
+        def filtered(param):
+            # Igual que FilterSet.filter_queryset, pero sin el filtro de la faceta
+            queryset = filterset.queryset
+            for name, value in filterset.form.cleaned_data.items():
+                if name != param:
+                    queryset = filterset.filters[name].filter(queryset, value)
+            return queryset
+
+        return count_facets(self.facets, filtered)
+
+
+class AlbumFacetsView(CatalogFacetsView):
+    """Conteos por grupo, tipo y año de lanzamiento para la lista de álbumes"""
+    queryset = Album.objects.all()
+    filterset_class = AlbumFilter
+    facets = ALBUM_FACETS
+
+
 class AlbumDetailView(generics.RetrieveAPIView):
     """Vista para ver detalles de un álbum"""
-    queryset = Album.objects.all()
+    queryset = Album.objects.prefetch_related(
+        Prefetch('group', queryset=group_list_queryset()),
+        Prefetch('versions', queryset=album_version_queryset()),
+    ).annotate(photocard_total=album_photocard_total())
     serializer_class = AlbumSerializer
     permission_classes = [permissions.AllowAny]
 
 
 class AlbumVersionListView(generics.ListAPIView):
     """Vista para listar versiones de álbumes"""
-    queryset = AlbumVersion.objects.all()
+    queryset = album_version_queryset()
     serializer_class = AlbumVersionSerializer
     permission_classes = [permissions.AllowAny]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -87,45 +214,56 @@ class AlbumVersionListView(generics.ListAPIView):
 
 class AlbumVersionDetailView(generics.RetrieveAPIView):
     """Vista para ver detalles de una versión de álbum"""
-    queryset = AlbumVersion.objects.all()
+    queryset = album_version_queryset()
     serializer_class = AlbumVersionSerializer
     permission_classes = [permissions.AllowAny]
 
 
-class PhotocardListView(generics.ListAPIView):
+class PhotocardListView(OwnershipOverlayMixin, generics.ListAPIView):
     """Vista para listar photocards"""
-    queryset = Photocard.objects.all()
+    queryset = photocard_list_queryset()
     serializer_class = PhotocardListSerializer
+    pagination_class = KeysetOptInPagination
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_class = PhotocardFilter
     search_fields = ['name', 'group__name', 'member__stage_name']
+    hangul_search_fields = ['member__stage_name', 'group__korean_name']
     ordering_fields = ['name', 'release_date']
     ordering = ['-release_date']
 
 
+class PhotocardFacetsView(CatalogFacetsView):
+    """Conteos por grupo, miembro, tipo y año de lanzamiento para la lista de photocards"""
+    queryset = Photocard.objects.all()
+    filterset_class = PhotocardFilter
+    facets = PHOTOCARD_FACETS
+
+
 class PhotocardDetailView(generics.RetrieveAPIView):
     """Vista para ver detalles de una photocard"""
-    queryset = Photocard.objects.all()
+    queryset = Photocard.objects.select_related('group', 'member', 'album_version__album')
     serializer_class = PhotocardSerializer
     permission_classes = [permissions.AllowAny]
 
 
-class LightstickListView(generics.ListAPIView):
+class LightstickListView(OwnershipOverlayMixin, generics.ListAPIView):
     """Vista para listar lightsticks"""
-    queryset = Lightstick.objects.all()
+    queryset = lightstick_list_queryset()
     serializer_class = LightstickListSerializer
+    pagination_class = KeysetOptInPagination
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_class = LightstickFilter
     search_fields = ['name', 'group__name', 'version']
+    hangul_search_fields = ['group__korean_name']
     ordering_fields = ['name', 'release_date']
     ordering = ['-release_date']
 
 
 class LightstickDetailView(generics.RetrieveAPIView):
     """Vista para ver detalles de un lightstick"""
-    queryset = Lightstick.objects.all()
+    queryset = Lightstick.objects.select_related('group')
     serializer_class = LightstickSerializer
     permission_classes = [permissions.AllowAny]
 
@@ -137,54 +275,94 @@ class GroupAlbumsView(generics.ListAPIView):
     
     def get_queryset(self):
         group_id = self.kwargs['group_id']
-        return Album.objects.filter(group_id=group_id)
+        return album_list_queryset().filter(group_id=group_id).order_by('-release_date')
 
 
-class GroupPhotocardsView(generics.ListAPIView):
+class GroupPhotocardsView(OwnershipOverlayMixin, generics.ListAPIView):
     """Vista para listar photocards de un grupo específico"""
     serializer_class = PhotocardListSerializer
     permission_classes = [permissions.AllowAny]
     
     def get_queryset(self):
         group_id = self.kwargs['group_id']
-        return Photocard.objects.filter(group_id=group_id)
+        return photocard_list_queryset().filter(group_id=group_id).order_by('-release_date')
 
 
-class GroupLightsticksView(generics.ListAPIView):
+class GroupLightsticksView(OwnershipOverlayMixin, generics.ListAPIView):
     """Vista para listar lightsticks de un grupo específico"""
     serializer_class = LightstickListSerializer
     permission_classes = [permissions.AllowAny]
     
     def get_queryset(self):
         group_id = self.kwargs['group_id']
-        return Lightstick.objects.filter(group_id=group_id)
+        return lightstick_list_queryset().filter(group_id=group_id).order_by('-release_date')
 
 
-class AlbumPhotocardsView(generics.ListAPIView):
+class AlbumPhotocardsView(OwnershipOverlayMixin, generics.ListAPIView):
     """Vista para listar photocards de un álbum específico"""
     serializer_class = PhotocardListSerializer
     permission_classes = [permissions.AllowAny]
     
     def get_queryset(self):
         album_id = self.kwargs['album_id']
-        return Photocard.objects.filter(album_version__album_id=album_id)
+        return photocard_list_queryset().filter(album_version__album_id=album_id).order_by('-release_date')
 
 
-class AlbumVersionPhotocardsView(generics.ListAPIView):
+class AlbumVersionPhotocardsView(OwnershipOverlayMixin, generics.ListAPIView):
     """Vista para listar photocards de una versión de álbum específica"""
     serializer_class = PhotocardListSerializer
     permission_classes = [permissions.AllowAny]
     
     def get_queryset(self):
         version_id = self.kwargs['version_id']
-        return Photocard.objects.filter(album_version_id=version_id)
+        return photocard_list_queryset().filter(album_version_id=version_id).order_by('-release_date')
 
 
-class MemberPhotocardsView(generics.ListAPIView):
+class MemberPhotocardsView(OwnershipOverlayMixin, generics.ListAPIView):
     """Vista para listar photocards de un miembro específico"""
     serializer_class = PhotocardListSerializer
     permission_classes = [permissions.AllowAny]
     
     def get_queryset(self):
         member_id = self.kwargs['member_id']
-        return Photocard.objects.filter(member_id=member_id)
+        return photocard_list_queryset().filter(member_id=member_id).order_by('-release_date')
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def autocomplete_view(request):
+    """
+    Sugerencias para la caja de búsqueda desde el índice en memoria.
+
+    ?q= prefijo a buscar, ?types=group,member para limitar tipos y ?limit=
+    (máximo 50). No consulta la base de datos ni autentica al usuario.
+    """
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+    kinds = [kind for kind in request.query_params.get('types', '').split(',') if kind in KINDS]
+    results = autocomplete_index.search(request.query_params.get('q', ''), limit=limit, kinds=kinds)
+    return Response({'results': results})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def unified_search_view(request):
+    """
+    Búsqueda en todo el catálogo (grupos, miembros, álbumes, photocards y
+    lightsticks) con una sola consulta. ?q= texto, ?types= para limitar tipos
+    y ?limit= resultados por tipo (máximo 20).
+    """
+    try:
+        limit = min(max(int(request.query_params.get('limit', 5)), 1), 20)
+    except ValueError:
+        limit = 5
+    types = request.query_params.get('types')
+    kinds = [kind for kind in types.split(',') if kind in UNIFIED_COLUMNS] if types else None
+    query = request.query_params.get('q', '')
+    return Response({
+        'query': query,
+        'results': unified_search([query], limit=limit, kinds=kinds),
+    })
@@ -4,3 +4,7 @@
 class CollectionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'collection'
+
+    def ready(self):
+        # Registrar las señales que mantienen los contadores por usuario
+        from . import signals  # noqa: F401
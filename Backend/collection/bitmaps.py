@@ -0,0 +1,70 @@
+"""
+Bitmaps de posesión por usuario y grupo.
+
+El bit N de un bitmap es la photocard del grupo con group_position = N (ver
+catalog.positions). UserGroupSummary.owned_bitmap guarda las photocards
+distintas que tiene el usuario en cada grupo y lo mantiene
+collection.summary con cada alta, cambio o baja; el bitmap del catálogo de
+cada grupo se lee en cada llamada de las posiciones del índice único
+(group, group_position), sin caché, para que nunca vaya por detrás del
+catálogo. Completitud, intersección y diferencia son entonces operaciones
+con enteros de Python en lugar de JOINs.
+"""
+
+from catalog.models import Photocard
+from .models import UserGroupSummary
+
+
+def from_bytes(data):
+    return int.from_bytes(bytes(data or b''), 'little')
+
+
+def to_bytes(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def from_positions(positions):
+    bits = 0
+    for position in positions:
+        bits |= 1 << position
+    return bits
+
+
+def positions(bits):
+    """Posiciones de los bits a 1, de menor a mayor"""
+    result = []
+    while bits:
+        low = bits & -bits
+        result.append(low.bit_length() - 1)
+        bits ^= low
+    return result
+
+
+def catalog_bitmaps(group_ids):
+    """{group_id: bitmap con todas las photocards del grupo}, en una consulta"""
+    bitmaps = dict.fromkeys(group_ids, 0)
+    if bitmaps:
+        rows = Photocard.objects.filter(
+            group__in=bitmaps, group_position__isnull=False,
+        ).values_list('group', 'group_position')
+        for group_id, position in rows:
+            bitmaps[group_id] |= 1 << position
+    return bitmaps
+
+
+def owned_bitmaps(user, group_ids=None):
+    """{group_id: bitmap con las photocards del grupo que tiene el usuario}, en una consulta"""
+    rows = UserGroupSummary.objects.filter(user=user)
+    if group_ids is not None:
+        rows = rows.filter(group__in=group_ids)
+    return {group_id: from_bytes(data) for group_id, data in rows.values_list('group', 'owned_bitmap')}
+
+
+def completion(owned, catalog):
+    """(photocards del catálogo que tiene el usuario, photocards del catálogo)"""
+    return (owned & catalog).bit_count(), catalog.bit_count()
+
+
+def missing(owned, catalog):
+    """Bitmap con las photocards del catálogo que no tiene el usuario"""
+    return catalog & ~owned
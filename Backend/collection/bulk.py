@@ -0,0 +1,152 @@
+"""
+Altas, cambios y bajas de la colección en lote
+(POST /api/collection/collectibles/bulk/).
+
+Cada operación es un objeto con `action` ('create', 'update' o 'delete'), el
+`id` del objeto de la colección para update/delete y los campos de
+UserCollectibleCreateSerializer. Las photocards, lightsticks y objetos de la
+colección referenciados (bloqueados con FOR UPDATE) se leen con una consulta
+por modelo antes de validar, y las escrituras se hacen con bulk_create,
+bulk_update y un único DELETE en la misma transacción. Los contadores
+(collection.summary) se actualizan después con un solo
+apply_collectible_changes.
+
+Si alguna operación no es válida no se escribe nada y se devuelven los
+errores de cada una por su posición en la lista.
+"""
+
+import uuid
+
+from django.db import transaction
+from rest_framework import serializers
+
+from catalog.models import Photocard, Lightstick
+from .models import UserCollectible
+from .serializers import UserCollectibleCreateSerializer
+from .summary import apply_collectible_changes, collectible_state, manual_changes
+
+MAX_OPERATIONS = 500
+
+ACTIONS = ('create', 'update', 'delete')
+
+
+class BulkCollectibleSerializer(UserCollectibleCreateSerializer):
+    """
+    Valida operaciones con los objetos del catálogo ya leídos (context['catalog']).
+    Una misma instancia valida todos los elementos con validate_item, así que
+    los campos se construyen una sola vez por lote.
+    """
+    photocard = serializers.UUIDField(required=False, allow_null=True)
+    lightstick = serializers.UUIDField(required=False, allow_null=True)
+
+    def validate_item(self, data):
+        """(datos validados, None) o (None, errores) para un elemento"""
+        try:
+            return self.run_validation(data), None
+        except serializers.ValidationError as exc:
+            return None, serializers.as_serializer_error(exc)
+
+    def _catalog_object(self, model, pk, message):
+        if pk is None:
+            return None
+        obj = self.context['catalog'][model].get(pk)
+        if obj is None:
+            raise serializers.ValidationError(message)
+        return obj
+
+    def validate_photocard(self, value):
+        return self._catalog_object(Photocard, value, 'Photocard no encontrada')
+
+    def validate_lightstick(self, value):
+        return self._catalog_object(Lightstick, value, 'Lightstick no encontrado')
+
+
+def as_uuid(value):
+    """UUID del valor recibido, o None si no lo es"""
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def _referenced_ids(operations, field):
+    ids = {as_uuid(operation.get(field)) for operation in operations if isinstance(operation, dict)}
+    ids.discard(None)
+    return ids
+
+
+@transaction.atomic
+def run_operations(user, operations):
+    """
+    Valida y aplica las operaciones del usuario. Devuelve (resultados, errores):
+    resultados [{'index', 'action', 'id'}] si todo es válido, o errores
+    [{'index', 'errors'}] sin haber escrito nada.
+    """
+    catalog = {
+        Photocard: Photocard.objects.in_bulk(_referenced_ids(operations, 'photocard')),
+        Lightstick: Lightstick.objects.in_bulk(_referenced_ids(operations, 'lightstick')),
+    }
+    existing = UserCollectible.objects.select_for_update().filter(user=user).in_bulk(_referenced_ids(operations, 'id'))
+    context = {'catalog': catalog}
+    creator = BulkCollectibleSerializer(context=context)
+    updater = BulkCollectibleSerializer(partial=True, context=context)
+
+    validated, errors, seen = [], [], set()
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('action') not in ACTIONS:
+            errors.append({'index': index, 'errors': {'action': [f"Debe ser una de: {', '.join(ACTIONS)}"]}})
+            continue
+        action = operation['action']
+        if action == 'create':
+            serializer = creator
+            instance = None
+        else:
+            instance = existing.get(as_uuid(operation.get('id')))
+            if instance is None:
+                errors.append({'index': index, 'errors': {'id': ['Objeto no encontrado en la colección']}})
+                continue
+            if instance.pk in seen:
+                errors.append({'index': index, 'errors': {'id': ['Objeto repetido en el lote']}})
+                continue
+            seen.add(instance.pk)
+            if action == 'delete':
+                validated.append((index, action, instance, None))
+                continue
+            serializer = updater
+        data, error = serializer.validate_item(operation)
+        if error:
+            errors.append({'index': index, 'errors': error})
+        else:
+            validated.append((index, action, instance, data))
+
+    if errors:
+        return [], errors
+
+    created, updated, deleted, changes, update_fields, results = [], [], [], [], set(), []
+    for index, action, instance, data in validated:
+        if action == 'create':
+            instance = UserCollectible(user=user, **data)
+            created.append(instance)
+            changes.append((None, collectible_state(instance)))
+        elif action == 'update':
+            old = collectible_state(instance)
+            for field, value in data.items():
+                setattr(instance, field, value)
+            update_fields.update(data)
+            updated.append(instance)
+            changes.append((old, collectible_state(instance)))
+        else:
+            deleted.append(instance.pk)
+            changes.append((collectible_state(instance), None))
+        results.append({'index': index, 'action': action, 'id': instance.pk})
+
+    if created:
+        UserCollectible.objects.bulk_create(created)
+    if updated and update_fields:
+        UserCollectible.objects.bulk_update(updated, sorted(update_fields))
+    if deleted:
+        with manual_changes():
+            UserCollectible.objects.filter(pk__in=deleted).delete()
+    apply_collectible_changes(changes)
+
+    return results, []
@@ -0,0 +1,47 @@
+"""
+Sincronización de los grupos favoritos (PUT /api/collection/favorites/sync/).
+
+El cliente envía el conjunto completo de grupos que quiere tener como
+favoritos y la diferencia se aplica con un INSERT ... ON CONFLICT DO NOTHING
+y un único DELETE, en la misma transacción. Repetir la petición no cambia
+nada, y dos peticiones simultáneas no chocan con la restricción única
+(user, group): la que llega tarde simplemente no inserta la fila.
+
+Las escrituras van dentro de manual_changes(), así que las señales no
+aplican un delta por fila; al final se recuenta favorite_group_count con el
+usuario bloqueado (ver collection.summary.recount_counter).
+"""
+
+from django.db import transaction
+
+from catalog.models import Group
+from .bulk import as_uuid
+from .models import UserFavoriteGroup
+from .summary import manual_changes, recount_counter
+
+MAX_GROUPS = 500
+
+
+def sync_favorite_groups(user, group_ids):
+    """
+    Deja como favoritos del usuario exactamente los grupos `group_ids`.
+    Devuelve los errores ({'group_ids': [...]}) sin escribir nada si algún id
+    no es válido o no existe, o None.
+    """
+    ids = {as_uuid(group_id) for group_id in group_ids}
+    invalid = [str(group_id) for group_id in group_ids if as_uuid(group_id) is None]
+    if invalid:
+        return {'group_ids': [f'Id no válido: {group_id}' for group_id in invalid]}
+    existing = set(Group.objects.filter(pk__in=ids).values_list('pk', flat=True))
+    if existing != ids:
+        return {'group_ids': [f'Grupo no encontrado: {group_id}' for group_id in sorted(map(str, ids - existing))]}
+
+    with transaction.atomic():
+        with manual_changes():
+            UserFavoriteGroup.objects.filter(user=user).exclude(group__in=existing).delete()
+            UserFavoriteGroup.objects.bulk_create(
+                [UserFavoriteGroup(user=user, group_id=group_id) for group_id in existing],
+                ignore_conflicts=True,
+            )
+        recount_counter(user.pk, 'favorite_group_count')
+    return None
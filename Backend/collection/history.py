@@ -0,0 +1,76 @@
+"""
+Historial del valor y del gasto de la colección (GET /api/collection/history/).
+
+Se lee solo de UserSpendingRollup, que collection.summary mantiene con cada
+alta, cambio o baja: el coste depende de los días o meses con adquisiciones
+del rango, no del número de objetos de la colección. El valor de cada
+periodo es el gasto acumulado hasta él (como total_value, la suma de
+purchase_price de los objetos que se conservan), partiendo del acumulado
+anterior al rango, que sale de las filas mensuales.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Sum
+
+from .models import UserSpendingRollup
+from .summary import ROLLUP_PERIODS, summary_for
+
+# Desglose (?by=) -> campos de UserSpendingRollup que lo identifican
+BREAKDOWNS = {
+    None: (),
+    'source': ('source',),
+    'group': ('group', 'group__name'),
+}
+
+
+def _rows(user, period, fields, **filters):
+    # 'user' es fijo: sin desglose queda un único grupo
+    return UserSpendingRollup.objects.filter(user=user, period=period, **filters).values('user', *fields).annotate(
+        total_spent=Sum('spent'), total_entries=Sum('entries'),
+    ).order_by()
+
+
+def _opening_values(user, period, fields, start):
+    """Gasto acumulado antes de `start` por desglose: meses completos más, por días, el inicio de su mes"""
+    month = ROLLUP_PERIODS['month'](start)
+    opening = defaultdict(Decimal)
+    partials = [_rows(user, 'month', fields[:1], date__lt=month)]
+    if period == 'day' and month < start:
+        partials.append(_rows(user, 'day', fields[:1], date__gte=month, date__lt=start))
+    for rows in partials:
+        for row in rows:
+            opening[tuple(row[field] for field in fields[:1])] += row['total_spent']
+    return opening
+
+
+def collection_history(user, period='month', by=None, start=None, end=None):
+    """
+    Gasto, objetos adquiridos y valor acumulado por día o mes (y origen o
+    grupo si `by`), en orden de fecha, entre `start` y `end` (incluidos).
+    """
+    summary_for(user)
+    fields = BREAKDOWNS[by]
+    filters = {}
+    if start is not None:
+        start = ROLLUP_PERIODS[period](start)
+        filters['date__gte'] = start
+    if end is not None:
+        filters['date__lte'] = end
+
+    rows = _rows(user, period, ('date', *fields), **filters).order_by('date', *fields[:1])
+    values = _opening_values(user, period, fields, start) if start is not None else defaultdict(Decimal)
+
+    results = []
+    for row in rows:
+        key = tuple(row[field] for field in fields[:1])
+        values[key] += row['total_spent']
+        entry = {'date': row['date'], 'spent': row['total_spent'], 'entries': row['total_entries'], 'value': values[key]}
+        if by == 'source':
+            entry['source'] = row['source']
+        elif by == 'group':
+            entry['group_id'] = row['group']
+            entry['group_name'] = row['group__name']
+        results.append(entry)
+    return results
@@ -0,0 +1,197 @@
+"""
+Importación de una colección existente desde CSV o NDJSON
+(POST /api/collection/import/ y el comando import_collection).
+
+Cada fila es un objeto de la colección con los campos del alta individual
+(`source`, `acquisition_date`, `purchase_price`, `quantity`, `photo`). El
+objeto del catálogo se indica con su id (`photocard` / `lightstick`) o por
+nombre: `name` y `group`, más `album` (photocards) o `version`
+(lightsticks) si hace falta desambiguar. `collectible_type` es opcional:
+sin él ni id, `album` o `version`, el nombre se busca en los dos catálogos.
+
+El fichero se lee fila a fila y se procesa en bloques: cada bloque resuelve
+sus photocards y lightsticks con una consulta por modelo, valida las filas,
+las inserta con bulk_create y actualiza los contadores en una transacción.
+La memoria depende del tamaño del bloque, no del fichero. Las filas con
+errores se saltan y se informan con su número de línea.
+"""
+
+import codecs
+import csv
+import json
+from collections import defaultdict, namedtuple
+from itertools import islice
+
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from catalog.models import Photocard, Lightstick
+from .bulk import BulkCollectibleSerializer, as_uuid
+from .models import UserCollectible
+from .summary import apply_collectible_changes, collectible_state
+
+FORMATS = ('csv', 'ndjson')
+
+CHUNK_SIZE = 500
+
+# processed / imported: filas acumuladas; errors: [{'line', 'errors'}] del último bloque
+ImportProgress = namedtuple('ImportProgress', ['processed', 'imported', 'errors'])
+
+# Campo que desambigua cada tipo por nombre (ruta desde el modelo)
+NAME_LOOKUPS = {
+    'photocard': (Photocard, 'album', 'album_version__album__title'),
+    'lightstick': (Lightstick, 'version', 'version'),
+}
+
+
+def format_for(filename):
+    """Formato según la extensión del fichero (None si no se reconoce)"""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return {'csv': 'csv', 'ndjson': 'ndjson', 'jsonl': 'ndjson'}.get(extension)
+
+
+def read_rows(stream, fmt):
+    """(línea, fila) del fichero binario `stream`, de una en una; fila None si no es válida"""
+    text = codecs.getreader('utf-8-sig')(stream)
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def _clean(row):
+    """Fila sin valores vacíos, con los valores como texto sin espacios alrededor"""
+    return {
+        key.strip(): value.strip() if isinstance(value, str) else value
+        for key, value in row.items()
+        if key and value not in ('', None)
+    }
+
+
+def _collectible_type(row):
+    """Tipo de la fila, o None si solo tiene nombre y grupo (se busca en photocards y lightsticks)"""
+    if row.get('collectible_type'):
+        return row['collectible_type']
+    if row.get('lightstick') or row.get('version'):
+        return 'lightstick'
+    if row.get('photocard') or row.get('album') or not row.get('name'):
+        return 'photocard'
+    return None
+
+
+def _name_key(row, extra):
+    return (
+        str(row.get('name', '')).lower(),
+        str(row.get('group', '')).lower(),
+        str(row[extra]).lower() if row.get(extra) else None,
+    )
+
+
+def _catalog_by_name(model, path, keys):
+    """
+    {(nombre, grupo): [(desambiguador, objeto), ...]} para las claves pedidas,
+    en una consulta servida por los índices sobre LOWER(name) del catálogo
+    """
+    matches = defaultdict(list)
+    if not keys:
+        return matches
+    objects = model.objects.annotate(
+        import_name=Lower('name'), import_group=Lower('group__name'), import_extra=Lower(path),
+    ).filter(
+        import_name__in={name for name, group, extra in keys},
+        import_group__in={group for name, group, extra in keys},
+    )
+    for obj in objects:
+        matches[obj.import_name, obj.import_group].append((obj.import_extra, obj))
+    return matches
+
+
+def _resolve(kinds, row, by_name):
+    """(tipo, id) del objeto del catálogo que corresponde a la fila por nombre entre `kinds`, o un error"""
+    candidates = []
+    for kind in kinds:
+        model, extra, path = NAME_LOOKUPS[kind]
+        name, group, wanted = _name_key(row, extra)
+        candidates += [
+            (kind, extra, obj) for value, obj in by_name[kind][name, group] if wanted is None or value == wanted
+        ]
+    if not candidates:
+        field = kinds[0] if len(kinds) == 1 else 'name'
+        return None, None, {field: [f'"{row.get("name")}" de "{row.get("group")}" no está en el catálogo']}
+    if len(candidates) > 1:
+        found = {(kind, extra) for kind, extra, obj in candidates}
+        field, hint = found.pop() if len(found) == 1 else ('name', 'collectible_type')
+        return None, None, {field: [f'"{row.get("name")}" tiene varias coincidencias: indica {hint} o el id']}
+    kind, extra, obj = candidates[0]
+    return kind, obj.pk, None
+
+
+def _import_chunk(user, chunk):
+    """Valida e inserta un bloque de (línea, fila). Devuelve (importadas, errores)"""
+    rows, errors = [], []
+    for line, row in chunk:
+        if row is None:
+            errors.append({'line': line, 'errors': {'non_field_errors': ['Fila no válida']}})
+            continue
+        row = _clean(row)
+        row['collectible_type'] = _collectible_type(row)
+        rows.append((line, row))
+
+    catalog = {
+        Photocard: Photocard.objects.in_bulk({as_uuid(row.get('photocard')) for line, row in rows} - {None}),
+        Lightstick: Lightstick.objects.in_bulk({as_uuid(row.get('lightstick')) for line, row in rows} - {None}),
+    }
+    by_name = {}
+    for kind, (model, extra, path) in NAME_LOOKUPS.items():
+        keys = {
+            _name_key(row, extra) for line, row in rows
+            if row['collectible_type'] in (kind, None) and not row.get(kind) and row.get('name')
+        }
+        by_name[kind] = _catalog_by_name(model, path, keys)
+        for value_and_objects in by_name[kind].values():
+            catalog[model].update((obj.pk, obj) for value, obj in value_and_objects)
+
+    objects = []
+    serializer = BulkCollectibleSerializer(context={'catalog': catalog})
+    for line, row in rows:
+        kind = row['collectible_type']
+        if (kind is None or kind in NAME_LOOKUPS and not row.get(kind)) and row.get('name'):
+            kind, pk, error = _resolve([kind] if kind else list(NAME_LOOKUPS), row, by_name)
+            if error:
+                errors.append({'line': line, 'errors': error})
+                continue
+            row['collectible_type'], row[kind] = kind, pk
+        data, error = serializer.validate_item(row)
+        if error:
+            errors.append({'line': line, 'errors': error})
+        else:
+            objects.append(UserCollectible(user=user, **data))
+
+    if objects:
+        with transaction.atomic():
+            UserCollectible.objects.bulk_create(objects)
+            apply_collectible_changes([(None, collectible_state(obj)) for obj in objects])
+    return len(objects), sorted(errors, key=lambda error: error['line'])
+
+
+def import_collection(user, rows, chunk_size=CHUNK_SIZE):
+    """
+    Importa las filas (de read_rows) en la colección del usuario, un bloque
+    por transacción, y devuelve un ImportProgress tras cada bloque.
+    """
+    processed = imported = 0
+    rows = iter(rows)
+    while chunk := list(islice(rows, max(chunk_size, 1))):
+        count, errors = _import_chunk(user, chunk)
+        processed += len(chunk)
+        imported += count
+        yield ImportProgress(processed, imported, errors)
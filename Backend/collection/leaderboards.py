@@ -0,0 +1,110 @@
+"""
+Clasificaciones de coleccionistas (GET /api/collection/leaderboards/<métrica>/).
+
+Contar y ordenar la colección de todos los usuarios en cada petición no
+escala, así que los puestos se materializan en LeaderboardEntry: el comando
+refresh_leaderboards (pensado para ejecutarse periódicamente) calcula cada
+clasificación con RANK() sobre los contadores por usuario, que ya se
+mantienen con cada cambio (ver collection.summary), y sustituye sus filas en
+una transacción. Las lecturas son el principio del índice (métrica, grupo,
+puesto) para el top y una búsqueda por (métrica, grupo, usuario) para el
+puesto propio.
+
+Los puestos no se recalculan con cada cambio de la colección (un objeto
+más puede mover a muchos usuarios); entre dos ejecuciones pueden ir por
+detrás de los contadores, y cada fila guarda cuándo se calculó.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import Rank
+from django.utils import timezone
+
+from .bitmaps import catalog_bitmaps
+from .models import LeaderboardEntry, UserCollectionSummary, UserGroupSummary, UserItemSummary
+from .summary import rebuild_summaries
+
+MAX_LIMIT = 100
+
+
+def _summary_scores(score):
+    return UserCollectionSummary.objects.annotate(score=score).filter(score__gt=0).values('user', 'score')
+
+
+def _group_photocard_scores():
+    return UserGroupSummary.objects.filter(photocard_count__gt=0).values('user', 'group', score=F('photocard_count'))
+
+
+def _completion_scores():
+    # Photocards distintas de cada grupo: el total del catálogo es el mismo
+    # para todos, así que ordenar por ellas es ordenar por completitud
+    return UserItemSummary.objects.filter(photocard__isnull=False, copies__gt=0).values(
+        'user', group=F('photocard__group'),
+    ).annotate(score=Count('pk')).order_by()
+
+
+# Métrica -> puntuaciones por usuario de la clasificación global y de la de cada grupo
+LEADERBOARDS = {
+    'photocards': {'global': lambda: _summary_scores(F('photocard_count')), 'group': _group_photocard_scores},
+    'collection': {'global': lambda: _summary_scores(F('photocard_count') + F('lightstick_count'))},
+    'completion': {'group': _completion_scores},
+}
+
+
+def _ensure_summaries(chunk_size=500):
+    """Reconstruye los contadores de los usuarios que aún no tienen (si no, no aparecerían)"""
+    user_ids = list(
+        get_user_model().objects.filter(collection_summary__isnull=True).order_by('pk').values_list('pk', flat=True)
+    )
+    for start in range(0, len(user_ids), chunk_size):
+        rebuild_summaries(user_ids[start:start + chunk_size])
+
+
+@transaction.atomic
+def _refresh(metric, scope, scores, now, batch_size):
+    """Sustituye las filas de una clasificación; las lecturas ven las anteriores hasta el COMMIT"""
+    LeaderboardEntry.objects.filter(metric=metric, group__isnull=scope == 'global').delete()
+    ranked = scores.annotate(rank=Window(
+        Rank(), partition_by=[F('group')] if scope == 'group' else None, order_by=F('score').desc(),
+    ))
+    total, batch = 0, []
+    for row in ranked.iterator(chunk_size=batch_size):
+        batch.append(LeaderboardEntry(
+            metric=metric, group_id=row.get('group'), user_id=row['user'],
+            score=row['score'], rank=row['rank'], refreshed_at=now,
+        ))
+        if len(batch) == batch_size:
+            LeaderboardEntry.objects.bulk_create(batch)
+            total, batch = total + len(batch), []
+    LeaderboardEntry.objects.bulk_create(batch)
+    return total + len(batch)
+
+
+def refresh_leaderboards(metrics=None, batch_size=2000):
+    """Recalcula las clasificaciones de `metrics` (todas por defecto); devuelve {(métrica, ámbito): filas}"""
+    _ensure_summaries()
+    now = timezone.now()
+    return {
+        (metric, scope): _refresh(metric, scope, scores(), now, batch_size)
+        for metric in metrics or LEADERBOARDS
+        for scope, scores in LEADERBOARDS[metric].items()
+    }
+
+
+def leaderboard(metric, group_id=None, user=None, limit=20):
+    """
+    Los `limit` primeros puestos y el de `user` (o None si no aparece) en dos
+    búsquedas por índice; en la completitud, con el porcentaje sobre el
+    catálogo del grupo (ver collection.bitmaps).
+    """
+    entries = LeaderboardEntry.objects.filter(metric=metric, group=group_id)
+    top = list(entries.order_by('rank', 'user').values(
+        'rank', 'score', 'refreshed_at', 'user', username=F('user__username'), collector_name=F('user__collector_name'),
+    )[:limit])
+    mine = entries.filter(user=user).values('rank', 'score', 'refreshed_at').first() if user is not None else None
+    if metric == 'completion':
+        total = catalog_bitmaps([group_id])[group_id].bit_count()
+        for row in top + ([mine] if mine else []):
+            row['completion_percentage'] = round(row['score'] / total * 100, 2) if total else 0.0
+    return top, mine
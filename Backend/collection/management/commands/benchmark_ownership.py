@@ -0,0 +1,84 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from catalog.models import Photocard
+from collection.bitmaps import catalog_bitmaps, completion, missing, owned_bitmaps
+from collection.models import UserCollectible, UserGroupSummary
+from collection.summary import summary_for
+
+
+def orm_ownership(user, group_ids):
+    """{group_id: (tiene, total, le faltan)} recontando las filas de la colección"""
+    owned = dict(
+        UserCollectible.objects.filter(
+            user=user, collectible_type='photocard', quantity__gt=0, photocard__group__in=group_ids,
+        ).values('photocard__group').annotate(total=Count('photocard', distinct=True)).order_by()
+        .values_list('photocard__group', 'total')
+    )
+    totals = dict(
+        Photocard.objects.filter(group__in=group_ids).values('group').annotate(total=Count('pk')).order_by()
+        .values_list('group', 'total')
+    )
+    lacking = dict(
+        Photocard.objects.filter(group__in=group_ids).exclude(
+            pk__in=UserCollectible.objects.filter(
+                user=user, collectible_type='photocard', quantity__gt=0,
+            ).values('photocard'),
+        ).values('group').annotate(total=Count('pk')).order_by().values_list('group', 'total')
+    )
+    return {
+        group_id: (owned.get(group_id, 0), totals.get(group_id, 0), lacking.get(group_id, 0))
+        for group_id in group_ids
+    }
+
+
+def bitmap_ownership(user, group_ids):
+    """{group_id: (tiene, total, le faltan)} con los bitmaps de posesión y del catálogo"""
+    owned = owned_bitmaps(user, group_ids)
+    catalog = catalog_bitmaps(group_ids)
+    results = {}
+    for group_id in group_ids:
+        bits = owned.get(group_id, 0)
+        results[group_id] = (*completion(bits, catalog[group_id]), missing(bits, catalog[group_id]).bit_count())
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara la completitud y las photocards que faltan por grupo calculadas con '
+        'los bitmaps de posesión y recontando la colección con el ORM'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', help='Email o nombre de usuario')
+        parser.add_argument('--repeat', type=int, default=20, help='Repeticiones de cada cálculo')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        user = (
+            User.objects.filter(email=options['user']).first()
+            or User.objects.filter(username=options['user']).first()
+        )
+        if user is None:
+            raise CommandError(f"Usuario no encontrado: {options['user']}")
+        summary_for(user)
+        group_ids = list(UserGroupSummary.objects.filter(user=user).values_list('group', flat=True))
+        if not group_ids:
+            raise CommandError(f'{user.username} no tiene photocards')
+
+        timings = {}
+        results = {}
+        for name, compute in (('ORM', orm_ownership), ('bitmaps', bitmap_ownership)):
+            results[name] = compute(user, group_ids)
+            start = time.perf_counter()
+            for _ in range(max(options['repeat'], 1)):
+                compute(user, group_ids)
+            timings[name] = (time.perf_counter() - start) / max(options['repeat'], 1) * 1000
+            self.stdout.write(f'{name}: {timings[name]:.2f} ms por cálculo ({len(group_ids)} grupos)')
+
+        if results['ORM'] != results['bitmaps']:
+            raise CommandError('Los resultados no coinciden: ejecuta rebuild_collection_summaries')
+        self.stdout.write(self.style.SUCCESS(f"Bitmaps {timings['ORM'] / timings['bitmaps']:.1f}x más rápidos"))
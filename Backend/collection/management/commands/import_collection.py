@@ -0,0 +1,40 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from collection.importer import CHUNK_SIZE, FORMATS, format_for, import_collection, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Importa en la colección de un usuario un fichero CSV o NDJSON (ver collection.importer)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', help='Email o nombre de usuario')
+        parser.add_argument('path', help='Fichero a importar')
+        parser.add_argument('--format', choices=FORMATS, help='Formato del fichero (por defecto, según la extensión)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Filas por bloque')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        user = (
+            User.objects.filter(email=options['user']).first()
+            or User.objects.filter(username=options['user']).first()
+        )
+        if user is None:
+            raise CommandError(f"Usuario no encontrado: {options['user']}")
+        fmt = options['format'] or format_for(options['path'])
+        if fmt is None:
+            raise CommandError(f"Formato no reconocido (usa --format {'/'.join(FORMATS)})")
+
+        step = None
+        with open(options['path'], 'rb') as stream:
+            for step in import_collection(user, read_rows(stream, fmt), chunk_size=options['chunk_size']):
+                for error in step.errors:
+                    self.stdout.write(self.style.WARNING(
+                        f"Línea {error['line']}: {json.dumps(error['errors'], ensure_ascii=False)}"
+                    ))
+                self.stdout.write(f'{step.processed} filas procesadas, {step.imported} importadas')
+
+        imported = step.imported if step else 0
+        self.stdout.write(self.style.SUCCESS(f'{imported} objetos importados en la colección de {user.username}'))
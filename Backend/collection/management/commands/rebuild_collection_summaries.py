@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from collection.summary import rebuild_summaries, verify_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recalcula (o verifica con --verify) los contadores de colección de todos los usuarios'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='Solo comprueba los contadores, sin modificarlos')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Usuarios por bloque')
+        parser.add_argument('--workers', type=int, default=4, help='Bloques procesados en paralelo')
+
+    def handle(self, *args, **options):
+        user_ids = list(get_user_model().objects.order_by('pk').values_list('pk', flat=True))
+        size = max(options['chunk_size'], 1)
+        chunks = [user_ids[start:start + size] for start in range(0, len(user_ids), size)]
+        task = verify_summaries if options['verify'] else rebuild_summaries
+
+        def run(chunk):
+            # Cada hilo usa su propia conexión; se cierra al acabar el bloque
+            try:
+                return task(chunk)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as pool:
+            results = list(pool.map(run, chunks))
+
+        if not options['verify']:
+            self.stdout.write(self.style.SUCCESS(f'Contadores recalculados para {sum(results)} usuarios'))
+            return
+
+        wrong = [user_id for result in results for user_id in result]
+        for user_id in wrong[:20]:
+            self.stdout.write(f'Contadores incorrectos: usuario {user_id}')
+        if wrong:
+            raise CommandError(f'{len(wrong)} usuarios con contadores incorrectos (ejecuta el comando sin --verify)')
+        self.stdout.write(self.style.SUCCESS(f'Contadores correctos para {len(user_ids)} usuarios'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from collection.leaderboards import LEADERBOARDS, refresh_leaderboards
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula las clasificaciones de coleccionistas desde los contadores de colección '
+        '(para ejecutarlo periódicamente, p.ej. con cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('metrics', nargs='*', help=f"Métricas ({', '.join(LEADERBOARDS)}; todas por defecto)")
+        parser.add_argument('--batch-size', type=int, default=2000, help='Filas insertadas por consulta')
+
+    def handle(self, *args, **options):
+        unknown = [metric for metric in options['metrics'] if metric not in LEADERBOARDS]
+        if unknown:
+            raise CommandError(f"Métricas no válidas: {', '.join(unknown)}")
+        results = refresh_leaderboards(options['metrics'] or None, batch_size=max(options['batch_size'], 1))
+        for (metric, scope), total in results.items():
+            self.stdout.write(f'{metric} ({scope}): {total} puestos')
+        self.stdout.write(self.style.SUCCESS('Clasificaciones actualizadas'))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+# Alinea collection_collection con el modelo, que se había desviado de 0001.
+# PÉRDIDA DE DATOS: borra las columnas condition e is_duplicate con sus
+# valores; al revertir se recrean vacías. Haz copia de collection_collection
+# antes de aplicarla si esos valores importan.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collection', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='usercollectible',
+            name='condition',
+        ),
+        migrations.RemoveField(
+            model_name='usercollectible',
+            name='is_duplicate',
+        ),
+        migrations.AddField(
+            model_name='usercollectible',
+            name='quantity',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AlterField(
+            model_name='usercollectible',
+            name='purchase_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_filter_indexes'),
+        ('collection', '0002_sync_collectible_fields'),
+        ('users', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCollectionSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='collection_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('photocard_count', models.IntegerField(default=0)),
+                ('lightstick_count', models.IntegerField(default=0)),
+                ('album_count', models.IntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('wishlist_count', models.IntegerField(default=0)),
+                ('favorite_group_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'collection_summary',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserAlbumSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('photocard_count', models.IntegerField(default=0)),
+                ('album', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='catalog.album')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='album_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'collection_album_summary',
+                'unique_together': {('user', 'album')},
+            },
+        ),
+        migrations.CreateModel(
+            name='UserGroupSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('photocard_count', models.IntegerField(default=0)),
+                ('group', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='catalog.group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'collection_group_summary',
+                'unique_together': {('user', 'group')},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_filter_indexes'),
+        ('collection', '0003_collection_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usercollectible',
+            index=models.Index(fields=['user', 'photocard', 'lightstick'], include=('quantity',), name='collection_user_item_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_item_summaries(apps, schema_editor):
+    """Copias por (usuario, objeto) de las colecciones existentes"""
+    UserCollectible = apps.get_model('collection', 'UserCollectible')
+    UserItemSummary = apps.get_model('collection', 'UserItemSummary')
+    for field in ('photocard', 'lightstick'):
+        copies = UserCollectible.objects.filter(
+            collectible_type=field, **{f'{field}__isnull': False}
+        ).values('user', field).annotate(total=Sum('quantity')).order_by()
+        UserItemSummary.objects.bulk_create(
+            (
+                UserItemSummary(user_id=user_id, copies=total, **{f'{field}_id': key})
+                for user_id, key, total in copies.values_list('user', field, 'total').iterator() if total > 0
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_filter_indexes'),
+        ('collection', '0004_duplicates_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserItemSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('copies', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'collection_item_summary',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='wishlistitem',
+            index=models.Index(fields=['photocard', 'user'], name='collection_item_pc_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wishlistitem',
+            index=models.Index(fields=['lightstick', 'user'], name='collection_item_ls_user_idx'),
+        ),
+        migrations.AddField(
+            model_name='useritemsummary',
+            name='lightstick',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='catalog.lightstick'),
+        ),
+        migrations.AddField(
+            model_name='useritemsummary',
+            name='photocard',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='catalog.photocard'),
+        ),
+        migrations.AddField(
+            model_name='useritemsummary',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_summaries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='useritemsummary',
+            index=models.Index(condition=models.Q(('copies__gt', 1)), fields=['photocard', 'user'], name='collection_spare_pc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useritemsummary',
+            index=models.Index(condition=models.Q(('copies__gt', 1)), fields=['lightstick', 'user'], name='collection_spare_ls_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='useritemsummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('photocard__isnull', False)), fields=('user', 'photocard'), name='collection_item_summary_pc_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='useritemsummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('lightstick__isnull', False)), fields=('user', 'lightstick'), name='collection_item_summary_ls_uniq'),
+        ),
+        migrations.RunPython(backfill_item_summaries, migrations.RunPython.noop),
+    ]
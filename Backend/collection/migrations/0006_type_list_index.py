@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_filter_indexes'),
+        ('collection', '0005_trade_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usercollectible',
+            index=models.Index(fields=['user', 'collectible_type', '-acquisition_date', 'id'], name='collection_user_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wishlistitem',
+            index=models.Index(fields=['user', 'collectible_type', '-priority', '-added_at', 'id'], name='collection_item_type_prio_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:15
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def backfill_owned_bitmaps(apps, schema_editor):
+    """Bitmaps de las photocards que ya tiene cada usuario en los grupos con contador"""
+    UserItemSummary = apps.get_model('collection', 'UserItemSummary')
+    UserGroupSummary = apps.get_model('collection', 'UserGroupSummary')
+    bits = defaultdict(int)
+    owned = UserItemSummary.objects.filter(
+        photocard__isnull=False, copies__gt=0, photocard__group_position__isnull=False,
+    ).values_list('user', 'photocard__group', 'photocard__group_position')
+    for user_id, group_id, position in owned.iterator():
+        bits[user_id, group_id] |= 1 << position
+
+    rows = []
+    for row in UserGroupSummary.objects.only('pk', 'user', 'group').iterator():
+        value = bits.get((row.user_id, row.group_id))
+        if value:
+            row.owned_bitmap = value.to_bytes((value.bit_length() + 7) // 8, 'little')
+            rows.append(row)
+    UserGroupSummary.objects.bulk_update(rows, ['owned_bitmap'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_group_positions'),
+        ('collection', '0006_type_list_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usergroupsummary',
+            name='owned_bitmap',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.RunPython(backfill_owned_bitmaps, migrations.RunPython.noop),
+    ]
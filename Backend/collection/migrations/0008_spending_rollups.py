@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, F, Sum, When
+from django.db.models.functions import TruncMonth
+
+
+def backfill_spending_rollups(apps, schema_editor):
+    """Gasto por día y por mes de los usuarios que ya tienen contadores"""
+    UserCollectible = apps.get_model('collection', 'UserCollectible')
+    UserCollectionSummary = apps.get_model('collection', 'UserCollectionSummary')
+    UserSpendingRollup = apps.get_model('collection', 'UserSpendingRollup')
+    group = Case(
+        When(collectible_type='photocard', then='photocard__group'),
+        When(collectible_type='lightstick', then='lightstick__group'),
+    )
+    collectibles = UserCollectible.objects.filter(user__in=UserCollectionSummary.objects.values('user'))
+    rows = []
+    for period, date in (('day', F('acquisition_date')), ('month', TruncMonth('acquisition_date'))):
+        totals = collectibles.values('user', 'source', period_date=date, group_key=group).annotate(
+            spent=Sum('purchase_price'), entries=Count('pk'),
+        ).order_by()
+        rows.extend(
+            UserSpendingRollup(
+                user_id=row['user'], period=period, date=row['period_date'], source=row['source'],
+                group_id=row['group_key'], spent=row['spent'] or 0, entries=row['entries'],
+            )
+            for row in totals.iterator()
+        )
+    UserSpendingRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_group_positions'),
+        ('collection', '0007_ownership_bitmaps'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSpendingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Día'), ('month', 'Mes')], max_length=5)),
+                ('date', models.DateField()),
+                ('source', models.CharField(max_length=100)),
+                ('spent', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('entries', models.IntegerField(default=0)),
+                ('group', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='catalog.group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spending_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'collection_spending_rollup',
+                'constraints': [models.UniqueConstraint(fields=('user', 'period', 'date', 'source', 'group'), name='collection_spending_rollup_uniq', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunPython(backfill_spending_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_group_positions'),
+        ('collection', '0008_spending_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('photocards', 'Photocards'), ('collection', 'Tamaño de la colección'), ('completion', 'Completitud por grupo')], max_length=20)),
+                ('score', models.IntegerField()),
+                ('rank', models.IntegerField()),
+                ('refreshed_at', models.DateTimeField()),
+                ('group', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='catalog.group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'collection_leaderboard',
+                'indexes': [models.Index(fields=['metric', 'group', 'rank', 'user'], name='collection_board_rank_idx'), models.Index(condition=models.Q(('group__isnull', True)), fields=['metric', 'rank', 'user'], name='collection_board_global_idx')],
+                'constraints': [models.UniqueConstraint(fields=('metric', 'group', 'user'), name='collection_leaderboard_user_uniq', nulls_distinct=False)],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+"""
+Photocards que le faltan a un usuario de un grupo, álbum o versión de álbum
+(GET /api/collection/missing/<groups|albums|versions>/<id>/).
+
+La diferencia se calcula en la base de datos con un anti-join (NOT EXISTS)
+contra UserItemSummary, que tiene una fila por objeto distinto que posee el
+usuario y un índice único (user, photocard): cada photocard del ámbito es
+una búsqueda en ese índice y nunca se lee la colección entera. La
+completitud por álbum sale de la misma comparación agrupada por álbum. Los
+bitmaps de collection.bitmaps solo se usan para los porcentajes de
+completitud por grupo; la lista sale siempre de la base de datos, incluidas
+las photocards que aún no tienen group_position.
+"""
+
+from django.db.models import Count, Exists, F, OuterRef
+
+from catalog.models import Photocard
+from .models import UserItemSummary
+
+# Ámbito de la URL -> ruta desde Photocard
+SCOPES = {
+    'groups': 'group',
+    'albums': 'album_version__album',
+    'versions': 'album_version',
+}
+
+
+def scope_photocards(queryset, scope, pk):
+    """Photocards de `queryset` que pertenecen al grupo, álbum o versión `pk`"""
+    return queryset.filter(**{SCOPES[scope]: pk})
+
+
+def _owned(user):
+    return Exists(UserItemSummary.objects.filter(user=user, photocard=OuterRef('pk')))
+
+
+def missing_photocards(user, queryset):
+    """Photocards de `queryset` de las que el usuario no tiene ninguna copia"""
+    return queryset.filter(~_owned(user))
+
+
+def album_completion(user, scope, pk):
+    """Photocards del catálogo y del usuario por álbum dentro del ámbito, en una consulta"""
+    albums = scope_photocards(Photocard.objects.all(), scope, pk).values(
+        album=F('album_version__album'),
+        album_title=F('album_version__album__title'),
+        album_release_date=F('album_version__album__release_date'),
+    ).annotate(
+        total=Count('pk'),
+        owned=Count('pk', filter=_owned(user)),
+    ).order_by('album_release_date', 'album_title')
+
+    return [
+        {
+            'album_id': str(row['album']),
+            'album_title': row['album_title'],
+            'total_photocards': row['total'],
+            'user_photocards': row['owned'],
+            'missing_photocards': row['total'] - row['owned'],
+            'completion_percentage': round(row['owned'] / row['total'] * 100, 2),
+        }
+        for row in albums
+    ]
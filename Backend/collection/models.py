@@ -33,6 +33,14 @@ def __str__(self):
 
     class Meta:
         db_table = 'collection_collection'
+        indexes = [
+            # Agrupar por objeto del catálogo (duplicados) sin leer la tabla
+            models.Index(fields=['user', 'photocard', 'lightstick'], include=['quantity'], name='collection_user_item_idx'),
+            # Lista por tipo con la ordenación por defecto (+ id para la paginación por cursor)
+            models.Index(
+                fields=['user', 'collectible_type', '-acquisition_date', 'id'], name='collection_user_type_date_idx',
+            ),
+        ]
 
 
 class WishlistItem(models.Model):
@@ -58,6 +66,15 @@ def __str__(self):
 
     class Meta:
         db_table = 'collection_item'
+        indexes = [
+            # Índice invertido objeto -> usuarios que lo buscan (ver collection.trades)
+            models.Index(fields=['photocard', 'user'], name='collection_item_pc_user_idx'),
+            models.Index(fields=['lightstick', 'user'], name='collection_item_ls_user_idx'),
+            # Lista por tipo con la ordenación por defecto (+ id para la paginación por cursor)
+            models.Index(
+                fields=['user', 'collectible_type', '-priority', '-added_at', 'id'], name='collection_item_type_prio_idx',
+            ),
+        ]
 
 
 class UserFavoriteGroup(models.Model):
@@ -71,3 +88,171 @@ class Meta:
 
     def __str__(self):
         return f"{self.user.username} - {self.group.name}"
+
+
+class UserCollectionSummary(models.Model):
+    """
+    Contadores de la colección de un usuario, mantenidos por collection.signals
+    (ver collection.summary) para que las estadísticas no recuenten la colección.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='collection_summary')
+    photocard_count = models.IntegerField(default=0)
+    lightstick_count = models.IntegerField(default=0)
+    album_count = models.IntegerField(default=0)
+    total_value = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    wishlist_count = models.IntegerField(default=0)
+    favorite_group_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.photocard_count} photocards"
+
+    class Meta:
+        db_table = 'collection_summary'
+
+
+class UserGroupSummary(models.Model):
+    """Photocards de un grupo que tiene un usuario (para la completitud por grupo)"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='group_summaries')
+    # Sin cascada: al borrar el grupo las bajas de sus photocards llevan el
+    # contador a cero y eliminan la fila (ver collection.summary)
+    group = models.ForeignKey('catalog.Group', on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    photocard_count = models.IntegerField(default=0)
+    # Photocards distintas del grupo que tiene, un bit por group_position (ver collection.bitmaps)
+    owned_bitmap = models.BinaryField(default=bytes)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.group_id}: {self.photocard_count}"
+
+    class Meta:
+        db_table = 'collection_group_summary'
+        unique_together = ('user', 'group')
+
+
+class UserAlbumSummary(models.Model):
+    """Photocards de un álbum que tiene un usuario (album_count cuenta los que tienen al menos una)"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='album_summaries')
+    album = models.ForeignKey('catalog.Album', on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    photocard_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.album_id}: {self.photocard_count}"
+
+    class Meta:
+        db_table = 'collection_album_summary'
+        unique_together = ('user', 'album')
+
+
+class UserItemSummary(models.Model):
+    """
+    Copias de cada objeto del catálogo que tiene un usuario (suma de quantity).
+
+    Se mantiene para todos los usuarios (ver collection.summary); las filas con
+    más de una copia forman el índice invertido objeto -> usuarios con
+    repetidos que usa el emparejamiento de intercambios (collection.trades).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='item_summaries')
+    photocard = models.ForeignKey(Photocard, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+    lightstick = models.ForeignKey(Lightstick, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+    copies = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.photocard_id or self.lightstick_id}: {self.copies}"
+
+    class Meta:
+        db_table = 'collection_item_summary'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'photocard'], condition=models.Q(photocard__isnull=False),
+                name='collection_item_summary_pc_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'lightstick'], condition=models.Q(lightstick__isnull=False),
+                name='collection_item_summary_ls_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['photocard', 'user'], condition=models.Q(copies__gt=1), name='collection_spare_pc_idx',
+            ),
+            models.Index(
+                fields=['lightstick', 'user'], condition=models.Q(copies__gt=1), name='collection_spare_ls_idx',
+            ),
+        ]
+
+
+class UserSpendingRollup(models.Model):
+    """
+    Gasto (suma de purchase_price) y objetos adquiridos por un usuario en un
+    día o un mes, por origen y grupo. Lo mantiene collection.summary con cada
+    alta, cambio o baja, así que el historial de la colección lee estas filas
+    en lugar de agrupar la colección entera.
+    """
+    PERIODS = [
+        ('day', 'Día'),
+        ('month', 'Mes'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='spending_rollups')
+    period = models.CharField(max_length=5, choices=PERIODS)
+    # Día de adquisición, o el primer día del mes para las filas mensuales
+    date = models.DateField()
+    source = models.CharField(max_length=100)
+    # Grupo de la photocard o el lightstick (sin cascada, como UserGroupSummary)
+    group = models.ForeignKey('catalog.Group', on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+    spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    entries = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.period} {self.date}: {self.spent}"
+
+    class Meta:
+        db_table = 'collection_spending_rollup'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'period', 'date', 'source', 'group'], nulls_distinct=False,
+                name='collection_spending_rollup_uniq',
+            ),
+        ]
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Puesto de un usuario en una clasificación (global o de un grupo), ya
+    ordenada. La recalcula el comando refresh_leaderboards desde los
+    contadores por usuario (ver collection.leaderboards); el top y el puesto
+    de cada usuario se leen por índice.
+    """
+    METRICS = [
+        ('photocards', 'Photocards'),
+        ('collection', 'Tamaño de la colección'),
+        ('completion', 'Completitud por grupo'),
+    ]
+
+    metric = models.CharField(max_length=20, choices=METRICS)
+    # Nulo en las clasificaciones globales
+    group = models.ForeignKey(
+        'catalog.Group', on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, null=True, related_name='+',
+    )
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    score = models.IntegerField()
+    rank = models.IntegerField()
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.metric} {self.group_id or 'global'} #{self.rank}: {self.user_id}"
+
+    class Meta:
+        db_table = 'collection_leaderboard'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['metric', 'group', 'user'], nulls_distinct=False, name='collection_leaderboard_user_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['metric', 'group', 'rank', 'user'], name='collection_board_rank_idx'),
+            # group IS NULL no sirve para recorrer el índice anterior en orden de puesto
+            models.Index(
+                fields=['metric', 'rank', 'user'], condition=models.Q(group__isnull=True), name='collection_board_global_idx',
+            ),
+        ]
@@ -0,0 +1,41 @@
+"""
+Marcas "lo tengo / lo busco" para las listas del catálogo
+(?with_ownership=1, ver catalog.views.OwnershipOverlayMixin).
+
+Para los objetos de una página se leen las copias (UserItemSummary) y la
+prioridad en la wishlist con una sola consulta (UNION ALL de las dos
+tablas, cada una por su índice (user, objeto)), en lugar de una por fila
+o de descargar la colección entera.
+"""
+
+from django.db.models import DecimalField, F, IntegerField, Value
+
+from .models import UserItemSummary, WishlistItem
+
+
+def empty_ownership():
+    return {'owned_quantity': 0, 'wishlist_priority': None}
+
+
+def ownership_overlay(user, field, ids):
+    """{id: {'owned_quantity', 'wishlist_priority'}} de los objetos `ids` ('photocard' o 'lightstick')"""
+    ids = list(ids)
+    if not ids:
+        return {}
+    # Cada columna con el tipo de la suya en la otra rama (priority es decimal)
+    owned = UserItemSummary.objects.filter(user=user, **{f'{field}__in': ids}).annotate(
+        item=F(field), owned_quantity=F('copies'),
+        wishlist_priority=Value(None, output_field=DecimalField(max_digits=3, decimal_places=1)),
+    ).values_list('item', 'owned_quantity', 'wishlist_priority')
+    wanted = WishlistItem.objects.filter(user=user, **{f'{field}__in': ids}).annotate(
+        item=F(field), owned_quantity=Value(None, output_field=IntegerField()), wishlist_priority=F('priority'),
+    ).values_list('item', 'owned_quantity', 'wishlist_priority')
+
+    overlay = {pk: empty_ownership() for pk in ids}
+    for pk, copies, priority in owned.union(wanted, all=True):
+        if copies is not None:
+            overlay[pk]['owned_quantity'] = copies
+        if priority is not None:
+            current = overlay[pk]['wishlist_priority']
+            overlay[pk]['wishlist_priority'] = priority if current is None else max(current, priority)
+    return overlay
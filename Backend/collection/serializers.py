@@ -139,6 +139,55 @@ def create(self, validated_data):
         return super().create(validated_data)
 
 
+class DuplicateSerializer(serializers.Serializer):
+    """Serializer para un objeto del catálogo repetido en la colección"""
+    collectible_type = serializers.SerializerMethodField()
+    photocard = serializers.UUIDField(allow_null=True)
+    lightstick = serializers.UUIDField(allow_null=True)
+    name = serializers.CharField()
+    group_name = serializers.CharField()
+    copies = serializers.IntegerField()
+    duplicates = serializers.SerializerMethodField()
+    entries = serializers.IntegerField()
+
+    def get_collectible_type(self, obj):
+        return 'photocard' if obj['photocard'] else 'lightstick'
+
+    def get_duplicates(self, obj):
+        return obj['copies'] - 1
+
+
+class TradeMatchSerializer(serializers.Serializer):
+    """Serializer para un usuario con el que hay intercambio en las dos direcciones"""
+    user = serializers.UUIDField()
+    username = serializers.CharField()
+    give = serializers.IntegerField()
+    get = serializers.IntegerField()
+    gives = serializers.ListField()
+    gets = serializers.ListField()
+
+
+class SpendingHistorySerializer(serializers.Serializer):
+    """Serializer para un periodo del historial de gasto (origen o grupo solo con ?by=)"""
+    date = serializers.DateField()
+    source = serializers.CharField(required=False)
+    group_id = serializers.UUIDField(required=False)
+    group_name = serializers.CharField(required=False)
+    spent = serializers.DecimalField(max_digits=12, decimal_places=2)
+    entries = serializers.IntegerField()
+    value = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class LeaderboardEntrySerializer(serializers.Serializer):
+    """Serializer para un puesto de una clasificación (completion_percentage solo en la de completitud)"""
+    rank = serializers.IntegerField()
+    user = serializers.UUIDField()
+    username = serializers.CharField()
+    collector_name = serializers.CharField()
+    score = serializers.IntegerField()
+    completion_percentage = serializers.FloatField(required=False)
+
+
 class CollectionStatsSerializer(serializers.Serializer):
     """Serializer para estadísticas de la colección del usuario"""
     total_albums = serializers.IntegerField()
@@ -0,0 +1,106 @@
+"""
+Señales de la colección: mantienen los contadores por usuario
+(ver collection.summary) en la misma transacción que cada escritura.
+Dentro de manual_changes() no hacen nada: quien escribe actualiza los contadores.
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from catalog.models import Photocard
+from .models import UserCollectible, WishlistItem, UserFavoriteGroup
+from .summary import (
+    apply_collectible_changes, apply_counter_change, changes_are_manual, collectible_state, move_photocard,
+    photocard_keys,
+)
+
+# Campos de Photocard que deciden en qué contadores de grupo y álbum cuenta
+PLACEMENT_FIELDS = ('group', 'album_version')
+
+# Campos de UserCollectible que afectan a los contadores
+COUNTED_FIELDS = (
+    'user', 'collectible_type', 'photocard', 'lightstick', 'purchase_price', 'quantity', 'source', 'acquisition_date',
+)
+
+COUNTER_FIELDS = {
+    WishlistItem: 'wishlist_count',
+    UserFavoriteGroup: 'favorite_group_count',
+}
+
+
+@receiver(pre_save, sender=UserCollectible)
+def remember_collectible_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Estado anterior de la fila para calcular el delta en post_save
+    instance._summary_state = None
+    if raw or instance._state.adding or changes_are_manual():
+        return
+    if update_fields is not None and not set(COUNTED_FIELDS).intersection(update_fields):
+        return
+    old = sender.objects.only(*COUNTED_FIELDS).filter(pk=instance.pk).first()
+    if old is not None:
+        instance._summary_state = collectible_state(old)
+
+
+@receiver(post_save, sender=UserCollectible)
+def collectible_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or changes_are_manual():
+        return
+    if created:
+        apply_collectible_changes([(None, collectible_state(instance))])
+        return
+    old = getattr(instance, '_summary_state', None)
+    new = collectible_state(instance)
+    if old is not None and old != new:
+        apply_collectible_changes([(old, new)])
+
+
+@receiver(pre_delete, sender=UserCollectible)
+def remember_photocard_keys(sender, instance, **kwargs):
+    # En un borrado en cascada la photocard o el lightstick pueden desaparecer antes que la fila
+    if changes_are_manual():
+        return
+    state = collectible_state(instance)
+    instance._summary_keys = photocard_keys([state.photocard_id], [state.lightstick_id])
+
+
+@receiver(post_delete, sender=UserCollectible)
+def collectible_deleted(sender, instance, **kwargs):
+    if not changes_are_manual():
+        apply_collectible_changes([(collectible_state(instance), None)], getattr(instance, '_summary_keys', None))
+
+
+@receiver(pre_save, sender=Photocard)
+def remember_photocard_placement(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Grupo, álbum y posición anteriores, para mover los contadores de sus dueños en post_save
+    instance._summary_old_keys = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not set(PLACEMENT_FIELDS).intersection(update_fields):
+        return
+    instance._summary_old_keys = photocard_keys([instance.pk])
+
+
+@receiver(post_save, sender=Photocard)
+def photocard_moved(sender, instance, created, raw=False, **kwargs):
+    # catalog (antes en INSTALLED_APPS) ya ha asignado la posición en el grupo nuevo
+    old_keys = getattr(instance, '_summary_old_keys', None)
+    if raw or created or not old_keys:
+        return
+    new_keys = photocard_keys([instance.pk])
+    if new_keys[instance.pk][:2] != old_keys[instance.pk][:2]:
+        move_photocard(instance.pk, old_keys, new_keys)
+
+
+@receiver(post_save, sender=WishlistItem)
+@receiver(post_save, sender=UserFavoriteGroup)
+def counted_item_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and not changes_are_manual():
+        apply_counter_change(instance.user_id, COUNTER_FIELDS[sender], 1)
+
+
+@receiver(post_delete, sender=WishlistItem)
+@receiver(post_delete, sender=UserFavoriteGroup)
+def counted_item_deleted(sender, instance, **kwargs):
+    if not changes_are_manual():
+        apply_counter_change(instance.user_id, COUNTER_FIELDS[sender], -1)
+
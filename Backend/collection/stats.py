@@ -0,0 +1,79 @@
+"""
+Estadísticas de la colección de un usuario con un número fijo de consultas.
+
+Los totales se leen de los contadores por usuario (ver collection.summary) y
+la completitud por grupo favorito cruza el bitmap de posesión de cada grupo
+con el del catálogo (ver collection.bitmaps): una consulta para los
+favoritos con sus bitmaps y otra para el catálogo, así que el coste no
+depende del tamaño de la colección.
+
+Los duplicados se derivan de las filas de un mismo objeto del catálogo y de
+su `quantity`: un objeto con N copias en total aporta N - 1 duplicados.
+"""
+
+from django.db.models import BinaryField, Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .bitmaps import catalog_bitmaps, completion, from_bytes
+from .models import UserCollectible, UserFavoriteGroup, UserGroupSummary
+from .summary import summary_for
+
+
+def completion_by_group(user):
+    """Photocards distintas del catálogo y del usuario por cada grupo favorito"""
+    owned = UserGroupSummary.objects.filter(
+        user=user, group=OuterRef('group')
+    ).values('owned_bitmap')[:1]
+    favorites = list(UserFavoriteGroup.objects.filter(user=user).annotate(
+        owned_bitmap=Subquery(owned, output_field=BinaryField()),
+    ).values_list('group_id', 'group__name', 'owned_bitmap'))
+    catalog = catalog_bitmaps([group_id for group_id, group_name, bitmap in favorites])
+
+    results = []
+    for group_id, group_name, bitmap in favorites:
+        owned_count, total = completion(from_bytes(bitmap), catalog[group_id])
+        if total > 0:
+            results.append({
+                'group_id': str(group_id),
+                'group_name': group_name,
+                'total_photocards': total,
+                'user_photocards': owned_count,
+                'completion_percentage': round(owned_count / total * 100, 2),
+            })
+    return results
+
+
+def duplicate_groups(user):
+    """
+    Objetos del catálogo con más de una copia en la colección del usuario:
+    GROUP BY (photocard, lightstick) HAVING SUM(quantity) > 1, servido por el
+    índice collection_user_item_idx.
+    """
+    return UserCollectible.objects.filter(
+        Q(photocard__isnull=False) | Q(lightstick__isnull=False), user=user,
+    ).values('photocard', 'lightstick').annotate(
+        copies=Sum('quantity'),
+        entries=Count('pk'),
+    ).filter(copies__gt=1).order_by()
+
+
+def duplicate_counts(user):
+    """Duplicados de photocards y lightsticks en una consulta"""
+    return duplicate_groups(user).aggregate(
+        duplicate_photocards=Coalesce(Sum(F('copies') - 1, filter=Q(photocard__isnull=False)), 0),
+        duplicate_lightsticks=Coalesce(Sum(F('copies') - 1, filter=Q(lightstick__isnull=False)), 0),
+    )
+
+
+def collection_stats(user):
+    """Datos para CollectionStatsSerializer (cuatro consultas)"""
+    summary = summary_for(user)
+    return duplicate_counts(user) | {
+        'total_albums': summary.album_count,
+        'total_photocards': summary.photocard_count,
+        'total_lightsticks': summary.lightstick_count,
+        'total_value': summary.total_value,
+        'wishlist_items': summary.wishlist_count,
+        'favorite_groups': summary.favorite_group_count,
+        'completion_by_group': completion_by_group(user),
+    }
@@ -0,0 +1,528 @@
+"""
+Contadores por usuario de la colección (UserCollectionSummary, más
+UserGroupSummary y UserAlbumSummary con las photocards por grupo y álbum, y
+UserItemSummary con las copias de cada objeto, y UserSpendingRollup con el
+gasto por día y por mes).
+
+UserGroupSummary guarda además el bitmap de las photocards distintas que
+tiene el usuario en el grupo (ver collection.bitmaps): un bit cambia cuando
+las copias de su photocard pasan de cero a más o al revés.
+
+Las señales de collection aplican cada alta, cambio o baja como un delta
+dentro de la misma transacción, así que las estadísticas y el perfil leen
+una fila en lugar de recontar la colección. Un usuario sin resumen (p.ej.
+creado antes de la tabla) se reconstruye al leerlo por primera vez; las
+copias por objeto, en cambio, se mantienen siempre porque otros usuarios
+las consultan (intercambios).
+
+Escrituras y reconstrucciones bloquean antes la fila del usuario (FOR NO KEY
+UPDATE, que no choca con los INSERT que la referencian), de modo que una
+reconstrucción nunca pierde un delta concurrente.
+
+Las escrituras en lote (collection.bulk, collection.favorites) desactivan
+las señales con manual_changes() y aplican todos sus cambios de una vez con
+apply_collectible_changes o recount_counter. Otros bulk_create, QuerySet.update() o SQL
+directo no actualizan los contadores; tras cargas masivas se usa el comando
+rebuild_collection_summaries (que también puede verificarlos).
+"""
+
+from collections import Counter, defaultdict, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, When
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from catalog.models import Lightstick, Photocard
+from .bitmaps import from_bytes, to_bytes
+from .models import (
+    UserCollectible, WishlistItem, UserFavoriteGroup,
+    UserCollectionSummary, UserGroupSummary, UserAlbumSummary, UserItemSummary, UserSpendingRollup,
+)
+
+SUMMARY_FIELDS = [
+    'photocard_count', 'lightstick_count', 'album_count', 'total_value',
+    'wishlist_count', 'favorite_group_count',
+]
+
+# Contadores de photocards por (usuario, clave): modelo, campo clave y ruta desde UserCollectible
+KEYED_SUMMARIES = (
+    (UserGroupSummary, 'group', 'photocard__group'),
+    (UserAlbumSummary, 'album', 'photocard__album_version__album'),
+)
+
+# Contadores simples: modelo cuyas filas del usuario cuenta cada uno
+COUNTED_MODELS = {
+    'wishlist_count': WishlistItem,
+    'favorite_group_count': UserFavoriteGroup,
+}
+
+# Objetos del catálogo por tipo: campo de UserItemSummary / UserCollectible
+ITEM_FIELDS = ('photocard', 'lightstick')
+
+# Campos de UserCollectible que afectan a los contadores
+CollectibleState = namedtuple('CollectibleState', [
+    'user_id', 'collectible_type', 'photocard_id', 'lightstick_id', 'purchase_price', 'quantity',
+    'source', 'acquisition_date',
+])
+
+# Periodos de UserSpendingRollup: fecha de la fila según el día de adquisición
+ROLLUP_PERIODS = {
+    'day': lambda day: day,
+    'month': lambda day: day.replace(day=1),
+}
+
+
+def _field_value(collectible, name):
+    # Los valores asignados sin pasar por un formulario pueden ser texto ('1.50', '2', '2024-05-03')
+    return UserCollectible._meta.get_field(name).to_python(getattr(collectible, name))
+
+
+def collectible_state(collectible):
+    return CollectibleState(
+        collectible.user_id,
+        collectible.collectible_type,
+        collectible.photocard_id if collectible.collectible_type == 'photocard' else None,
+        collectible.lightstick_id if collectible.collectible_type == 'lightstick' else None,
+        _field_value(collectible, 'purchase_price') or Decimal('0.00'),
+        _field_value(collectible, 'quantity'),
+        collectible.source,
+        _field_value(collectible, 'acquisition_date'),
+    )
+
+
+# Dentro de manual_changes() las señales de la colección no aplican deltas
+_manual_changes = ContextVar('collection_manual_changes', default=False)
+
+
+@contextmanager
+def manual_changes():
+    """Bloque cuyas escrituras aplica quien las hace con apply_collectible_changes"""
+    token = _manual_changes.set(True)
+    try:
+        yield
+    finally:
+        _manual_changes.reset(token)
+
+
+def changes_are_manual():
+    return _manual_changes.get()
+
+
+def empty_summary():
+    return {field: 0 for field in SUMMARY_FIELDS} | {'total_value': Decimal('0.00')}
+
+
+def compute_summaries(user_ids):
+    """
+    Cuenta desde cero los contadores de varios usuarios con consultas agrupadas
+    por usuario. Devuelve ({user_id: campos}, {modelo: {(user_id, clave): total}},
+    {(user_id, group_id): bitmap}, {(user_id, periodo, fecha, origen, group_id):
+    (gasto, objetos)}); las claves de UserItemSummary son ('photocard' | 'lightstick', id).
+    """
+    is_photocard = Q(collectible_type='photocard')
+    summaries = {user_id: empty_summary() for user_id in user_ids}
+
+    totals = UserCollectible.objects.filter(user__in=user_ids).values('user').annotate(
+        photocard_count=Count('pk', filter=is_photocard),
+        lightstick_count=Count('pk', filter=Q(collectible_type='lightstick')),
+        album_count=Count('photocard__album_version__album', filter=is_photocard, distinct=True),
+        total_value=Sum('purchase_price'),
+    ).order_by()
+    for row in totals:
+        user_id = row.pop('user')
+        row['total_value'] = row['total_value'] or Decimal('0.00')
+        summaries[user_id].update(row)
+
+    for model, field in ((WishlistItem, 'wishlist_count'), (UserFavoriteGroup, 'favorite_group_count')):
+        counts = model.objects.filter(user__in=user_ids).values('user').annotate(total=Count('pk')).order_by()
+        for user_id, total in counts.values_list('user', 'total'):
+            summaries[user_id][field] = total
+
+    keyed = {}
+    for model, field, path in KEYED_SUMMARIES:
+        counts = UserCollectible.objects.filter(
+            is_photocard, user__in=user_ids, photocard__isnull=False
+        ).values('user', path).annotate(total=Count('pk')).order_by()
+        keyed[model] = {(user_id, key): total for user_id, key, total in counts.values_list('user', path, 'total')}
+
+    keyed[UserItemSummary] = {}
+    for field in ITEM_FIELDS:
+        copies = UserCollectible.objects.filter(
+            user__in=user_ids, collectible_type=field, **{f'{field}__isnull': False}
+        ).values('user', field).annotate(total=Sum('quantity')).order_by()
+        keyed[UserItemSummary].update(
+            ((user_id, (field, key)), total)
+            for user_id, key, total in copies.values_list('user', field, 'total') if total > 0
+        )
+
+    bitmaps = defaultdict(int)
+    owned = [(user_id, key) for user_id, (field, key) in keyed[UserItemSummary] if field == 'photocard']
+    keys = photocard_keys([key for user_id, key in owned])
+    for user_id, key in owned:
+        group_id, album_id, position = keys.get(key, (None, None, None))
+        if position is not None:
+            bitmaps[user_id, group_id] |= 1 << position
+
+    rollups = {}
+    group = Case(
+        When(collectible_type='photocard', then='photocard__group'),
+        When(collectible_type='lightstick', then='lightstick__group'),
+    )
+    for period, date in (('day', F('acquisition_date')), ('month', TruncMonth('acquisition_date'))):
+        rows = UserCollectible.objects.filter(user__in=user_ids).values(
+            'user', 'source', period_date=date, group_key=group,
+        ).annotate(spent=Sum('purchase_price'), entries=Count('pk')).order_by()
+        rollups.update(
+            ((row['user'], period, row['period_date'], row['source'], row['group_key']),
+             (row['spent'] or Decimal('0.00'), row['entries']))
+            for row in rows
+        )
+    return summaries, keyed, bitmaps, rollups
+
+
+def lock_users(user_ids):
+    """Bloquea las filas de los usuarios (en orden, para evitar interbloqueos) y devuelve sus ids"""
+    return list(
+        get_user_model().objects.select_for_update(no_key=True)
+        .filter(pk__in=user_ids).order_by('pk').values_list('pk', flat=True)
+    )
+
+
+@transaction.atomic
+def rebuild_summaries(user_ids):
+    """Sustituye los contadores de los usuarios por un recuento completo"""
+    user_ids = lock_users(user_ids)
+    summaries, keyed, bitmaps, rollups = compute_summaries(user_ids)
+    now = timezone.now()
+    UserCollectionSummary.objects.bulk_create(
+        [UserCollectionSummary(user_id=user_id, updated_at=now, **fields) for user_id, fields in summaries.items()],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=SUMMARY_FIELDS + ['updated_at'],
+    )
+    for model, field, path in KEYED_SUMMARIES:
+        model.objects.filter(user__in=user_ids).delete()
+        model.objects.bulk_create([
+            model(user_id=user_id, photocard_count=total, **{f'{field}_id': key}, **(
+                {'owned_bitmap': to_bytes(bitmaps.get((user_id, key), 0))} if model is UserGroupSummary else {}
+            ))
+            for (user_id, key), total in keyed[model].items()
+        ])
+    UserItemSummary.objects.filter(user__in=user_ids).delete()
+    UserItemSummary.objects.bulk_create([
+        UserItemSummary(user_id=user_id, copies=total, **{f'{field}_id': key})
+        for (user_id, (field, key)), total in keyed[UserItemSummary].items()
+    ])
+    UserSpendingRollup.objects.filter(user__in=user_ids).delete()
+    UserSpendingRollup.objects.bulk_create([
+        UserSpendingRollup(
+            user_id=user_id, period=period, date=date, source=source, group_id=group_id, spent=spent, entries=entries,
+        )
+        for (user_id, period, date, source, group_id), (spent, entries) in rollups.items()
+    ])
+    return len(user_ids)
+
+
+def verify_summaries(user_ids):
+    """Ids de los usuarios cuyos contadores guardados no coinciden con un recuento completo"""
+    summaries, keyed, bitmaps, rollups = compute_summaries(user_ids)
+    stored = {
+        row.pop('user'): row
+        for row in UserCollectionSummary.objects.filter(user__in=user_ids).values('user', *SUMMARY_FIELDS)
+    }
+
+    # Sin resumen no hay nada mal: se reconstruirá al leerlo
+    wrong = {user_id for user_id, fields in summaries.items() if user_id in stored and stored[user_id] != fields}
+    for model, field, path in KEYED_SUMMARIES:
+        counts = keyed[model]
+        stored_counts = {
+            (user_id, key): total
+            for user_id, key, total in model.objects.filter(
+                user__in=user_ids, photocard_count__gt=0
+            ).values_list('user', field, 'photocard_count')
+        }
+        wrong.update(
+            user_id for user_id, key in counts.keys() | stored_counts.keys()
+            if user_id in stored and counts.get((user_id, key)) != stored_counts.get((user_id, key))
+        )
+
+    stored_bitmaps = {
+        (user_id, group_id): from_bytes(data)
+        for user_id, group_id, data in UserGroupSummary.objects.filter(
+            user__in=user_ids, photocard_count__gt=0
+        ).values_list('user', 'group', 'owned_bitmap')
+    }
+    wrong.update(
+        user_id for user_id, key in bitmaps.keys() | stored_bitmaps.keys()
+        if user_id in stored and bitmaps.get((user_id, key), 0) != stored_bitmaps.get((user_id, key), 0)
+    )
+
+    stored_rollups = {
+        (user_id, period, date, source, group_id): (spent, entries)
+        for user_id, period, date, source, group_id, spent, entries in UserSpendingRollup.objects.filter(
+            user__in=user_ids
+        ).values_list('user', 'period', 'date', 'source', 'group', 'spent', 'entries')
+    }
+    wrong.update(
+        key[0] for key in rollups.keys() | stored_rollups.keys()
+        if key[0] in stored and rollups.get(key) != stored_rollups.get(key)
+    )
+
+    # Las copias por objeto se mantienen siempre, tenga o no resumen el usuario
+    counts = keyed[UserItemSummary]
+    stored_counts = {
+        (user_id, ('photocard', photocard_id) if photocard_id else ('lightstick', lightstick_id)): copies
+        for user_id, photocard_id, lightstick_id, copies in UserItemSummary.objects.filter(
+            user__in=user_ids, copies__gt=0
+        ).values_list('user', 'photocard', 'lightstick', 'copies')
+    }
+    wrong.update(
+        user_id for user_id, key in counts.keys() | stored_counts.keys()
+        if counts.get((user_id, key)) != stored_counts.get((user_id, key))
+    )
+    return sorted(wrong, key=str)
+
+
+def summary_for(user):
+    """Resumen del usuario; si aún no tiene, se calcula y se guarda"""
+    try:
+        return user.collection_summary
+    except UserCollectionSummary.DoesNotExist:
+        rebuild_summaries([user.pk])
+        user.collection_summary = UserCollectionSummary.objects.get(user=user)
+        return user.collection_summary
+
+
+def _lock_summaries(user_ids):
+    """Bloquea a los usuarios y devuelve los que tienen resumen (si no, no hay contadores que actualizar)"""
+    lock_users(user_ids)
+    return set(UserCollectionSummary.objects.filter(user__in=user_ids).values_list('user_id', flat=True))
+
+
+def photocard_keys(photocard_ids, lightstick_ids=()):
+    """
+    {photocard_id: (group_id, album_id, group_position)} para las claves de
+    UserGroupSummary / UserAlbumSummary y el bit de la photocard en su bitmap,
+    más {lightstick_id: (group_id, None, None)} para el grupo en UserSpendingRollup
+    """
+    keys = {
+        pk: (group_id, album_id, position) for pk, group_id, album_id, position in Photocard.objects.filter(
+            pk__in=[pk for pk in photocard_ids if pk]
+        ).values_list('pk', 'group_id', 'album_version__album_id', 'group_position')
+    }
+    lightstick_ids = [pk for pk in lightstick_ids if pk]
+    if lightstick_ids:
+        keys.update(
+            (pk, (group_id, None, None))
+            for pk, group_id in Lightstick.objects.filter(pk__in=lightstick_ids).values_list('pk', 'group_id')
+        )
+    return keys
+
+
+def _bump_many(model, user_id, field, deltas, counter='photocard_count'):
+    """
+    Suma los deltas {clave: delta} a los contadores (usuario, clave) y devuelve
+    {clave: (antes, después)}. Con el usuario bloqueado se pueden leer, sumar
+    y escribir todas las filas con tres consultas; las que llegan a cero se borran.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return {}
+    rows = {
+        getattr(row, f'{field}_id'): row
+        for row in model.objects.filter(user_id=user_id, **{f'{field}__in': deltas})
+    }
+    changes, updated, created, deleted = {}, [], [], []
+    for key, delta in deltas.items():
+        row = rows.get(key)
+        before = getattr(row, counter) if row else 0
+        after = before + delta
+        changes[key] = (before, after)
+        if row is None:
+            if after > 0:
+                created.append(model(user_id=user_id, **{counter: after, f'{field}_id': key}))
+        elif after > 0:
+            setattr(row, counter, after)
+            updated.append(row)
+        else:
+            deleted.append(row.pk)
+    if updated:
+        model.objects.bulk_update(updated, [counter])
+    if created:
+        model.objects.bulk_create(created)
+    if deleted:
+        model.objects.filter(pk__in=deleted).delete()
+    return changes
+
+
+def _flip_bits(user_id, flips):
+    """Aplica {group_id: {posición: tiene}} a los bitmaps de UserGroupSummary (dos consultas)"""
+    if not flips:
+        return
+    rows = list(UserGroupSummary.objects.filter(user_id=user_id, group__in=flips).only('pk', 'group', 'owned_bitmap'))
+    for row in rows:
+        bits = from_bytes(row.owned_bitmap)
+        for position, owned in flips[row.group_id].items():
+            bits = bits | (1 << position) if owned else bits & ~(1 << position)
+        row.owned_bitmap = to_bytes(bits)
+    UserGroupSummary.objects.bulk_update(rows, ['owned_bitmap'])
+
+
+def _bump_rollups(user_id, spent, entries):
+    """
+    Suma el gasto y los objetos {(periodo, fecha, origen, group_id): delta} a
+    UserSpendingRollup del usuario (bloqueado), como _bump_many; las filas que
+    se quedan sin objetos se borran.
+    """
+    deltas = [key for key in spent.keys() | entries.keys() if spent[key] or entries[key]]
+    if not deltas:
+        return
+    rows = {
+        (row.period, row.date, row.source, row.group_id): row
+        for row in UserSpendingRollup.objects.filter(user_id=user_id, date__in={key[1] for key in deltas})
+    }
+    updated, created, deleted = [], [], []
+    for key in deltas:
+        row = rows.get(key)
+        if row is None:
+            period, date, source, group_id = key
+            row = UserSpendingRollup(user_id=user_id, period=period, date=date, source=source, group_id=group_id)
+            if entries[key] > 0:
+                created.append(row)
+        elif row.entries + entries[key] > 0:
+            updated.append(row)
+        else:
+            deleted.append(row.pk)
+        row.spent += spent[key]
+        row.entries += entries[key]
+    if updated:
+        UserSpendingRollup.objects.bulk_update(updated, ['spent', 'entries'])
+    if created:
+        UserSpendingRollup.objects.bulk_create(created)
+    if deleted:
+        UserSpendingRollup.objects.filter(pk__in=deleted).delete()
+
+
+def _apply_user_changes(user_id, states, keys, has_summary):
+    """Aplica a un usuario los estados (CollectibleState, +1 / -1)"""
+    copies = {field: Counter() for field in ITEM_FIELDS}
+    for state, sign in states:
+        for field in ITEM_FIELDS:
+            if getattr(state, f'{field}_id'):
+                copies[field][getattr(state, f'{field}_id')] += sign * state.quantity
+    item_changes = {
+        field: _bump_many(UserItemSummary, user_id, field, copies[field], counter='copies')
+        for field in ITEM_FIELDS
+    }
+
+    if not has_summary:
+        return
+
+    deltas = Counter()
+    value = Decimal('0.00')
+    keyed_deltas = {model: Counter() for model, field, path in KEYED_SUMMARIES}
+    spent, entries = Counter(), Counter()
+    for state, sign in states:
+        if state.collectible_type in ('photocard', 'lightstick'):
+            deltas[f'{state.collectible_type}_count'] += sign
+        value += sign * state.purchase_price
+        if state.photocard_id in keys:
+            group_id, album_id, position = keys[state.photocard_id]
+            keyed_deltas[UserGroupSummary][group_id] += sign
+            keyed_deltas[UserAlbumSummary][album_id] += sign
+        group_id = keys.get(state.photocard_id or state.lightstick_id, (None,))[0]
+        for period, truncate in ROLLUP_PERIODS.items():
+            key = (period, truncate(state.acquisition_date), state.source, group_id)
+            spent[key] += sign * state.purchase_price
+            entries[key] += sign
+    _bump_rollups(user_id, spent, entries)
+
+    for model, field, path in KEYED_SUMMARIES:
+        for before, after in _bump_many(model, user_id, field, keyed_deltas[model]).values():
+            # Un álbum cuenta en album_count mientras tenga alguna photocard
+            if model is UserAlbumSummary:
+                deltas['album_count'] += (after > 0) - (before > 0)
+
+    # Bits de las photocards que el usuario empieza a tener o deja de tener
+    flips = defaultdict(dict)
+    for photocard_id, (before, after) in item_changes['photocard'].items():
+        group_id, album_id, position = keys.get(photocard_id, (None, None, None))
+        if (before > 0) != (after > 0) and position is not None:
+            flips[group_id][position] = after > 0
+    _flip_bits(user_id, flips)
+
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if value:
+        updates['total_value'] = F('total_value') + value
+    if updates:
+        UserCollectionSummary.objects.filter(user_id=user_id).update(updated_at=timezone.now(), **updates)
+
+
+@transaction.atomic
+def apply_collectible_changes(changes, keys=None):
+    """
+    Aplica a los contadores los cambios de varios UserCollectible: pares
+    (old, new) de CollectibleState, con None si se crea o se borra. Los
+    deltas se agrupan por usuario y clave, así que el número de consultas no
+    depende de cuántos cambios haya. `keys` permite pasar el grupo/álbum de
+    las photocards y lightsticks ya consultado (al borrar en cascada el
+    objeto ya no se puede leer en post_delete).
+    """
+    states = defaultdict(list)
+    for old, new in changes:
+        for state, sign in ((old, -1), (new, 1)):
+            if state is not None:
+                states[state.user_id].append((state, sign))
+    if not states:
+        return
+
+    with_summary = _lock_summaries(list(states))
+    if keys is None and with_summary:
+        user_states = [state for user_id in with_summary for state, sign in states[user_id]]
+        keys = photocard_keys(
+            [state.photocard_id for state in user_states], [state.lightstick_id for state in user_states],
+        )
+    for user_id, user_states in states.items():
+        _apply_user_changes(user_id, user_states, keys or {}, user_id in with_summary)
+
+
+@transaction.atomic
+def move_photocard(photocard_id, old_keys, new_keys):
+    """
+    Mueve los contadores de los dueños de una photocard que ha cambiado de
+    grupo o de álbum: sus filas se quitan con las claves anteriores
+    (photocard_keys antes del cambio) y se vuelven a añadir con las nuevas.
+    """
+    states = [
+        collectible_state(collectible)
+        for collectible in UserCollectible.objects.filter(collectible_type='photocard', photocard=photocard_id)
+    ]
+    apply_collectible_changes([(state, None) for state in states], old_keys)
+    apply_collectible_changes([(None, state) for state in states], new_keys)
+
+
+@transaction.atomic
+def apply_counter_change(user_id, field, delta):
+    """Suma `delta` a un contador simple (wishlist_count, favorite_group_count)"""
+    if _lock_summaries([user_id]):
+        UserCollectionSummary.objects.filter(user_id=user_id).update(
+            updated_at=timezone.now(), **{field: F(field) + delta}
+        )
+
+
+@transaction.atomic
+def recount_counter(user_id, field):
+    """
+    Recuenta un contador simple tras escrituras hechas con manual_changes().
+    Se cuenta después de bloquear al usuario, así que incluye las filas de
+    escrituras concurrentes ya confirmadas (cuyo delta ya se aplicó antes)
+    y no las que aún no lo están (su delta llegará después).
+    """
+    if _lock_summaries([user_id]):
+        total = COUNTED_MODELS[field].objects.filter(user_id=user_id).count()
+        UserCollectionSummary.objects.filter(user_id=user_id).update(updated_at=timezone.now(), **{field: total})
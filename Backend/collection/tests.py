@@ -1,3 +1,1017 @@
+import json
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+
+from catalog.models import Group, Member, Album, AlbumVersion, Photocard, Lightstick
+from .bitmaps import owned_bitmaps, positions
+from .importer import import_collection, read_rows
+from .leaderboards import leaderboard
+from .models import UserCollectible, WishlistItem, UserFavoriteGroup
+from .stats import completion_by_group
+from .summary import summary_for, verify_summaries
+from .trades import trade_matches
+
+
+class ListQueryCountTests(TestCase):
+    """
+    Las listas de colección, wishlist y favoritos cargan los datos anidados
+    (photocard/lightstick con grupo y miembro, member_count de cada grupo) en
+    un número fijo de consultas: el mismo con páginas de 1 y de 100 filas.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username='nayeon', email='nayeon@example.com', password='pass', collector_name='Nayeon',
+        )
+        groups = Group.objects.bulk_create([
+            Group(
+                name=f'Group {i}', korean_name=f'그룹 {i}', debut_date=date(2015, 10, 20),
+                agency='JYP Entertainment', group_type='Girl Group',
+            )
+            for i in range(100)
+        ])
+        members = Member.objects.bulk_create([
+            Member(
+                group=group, stage_name=f'Member {i}', real_name=f'Member {i}',
+                birth_date=date(1995, 9, 22), position='Vocalist',
+            )
+            for i, group in enumerate(groups)
+        ])
+        album = Album.objects.create(
+            group=groups[0], title='Formula of Love', release_date=date(2021, 11, 12), album_type='Full Album',
+        )
+        version = AlbumVersion.objects.create(album=album, version_name='Break It')
+        photocards = Photocard.objects.bulk_create([
+            Photocard(
+                group=group, album_version=version, member=member, name=f'Photocard {i}',
+                release_date=date(2021, 11, 12), photocard_type='Album',
+            )
+            for i, (group, member) in enumerate(zip(groups[:50], members[:50]))
+        ])
+        lightsticks = Lightstick.objects.bulk_create([
+            Lightstick(group=group, name=f'Lightstick {i}', version='Ver. 1', release_date=date(2021, 12, 1))
+            for i, group in enumerate(groups[50:])
+        ])
+
+        for photocard in photocards:
+            UserCollectible.objects.create(
+                user=cls.user, collectible_type='photocard', photocard=photocard,
+                source='Album', acquisition_date=date(2024, 1, 1),
+            )
+            WishlistItem.objects.create(user=cls.user, collectible_type='photocard', photocard=photocard, priority=3)
+        for lightstick in lightsticks:
+            UserCollectible.objects.create(
+                user=cls.user, collectible_type='lightstick', lightstick=lightstick,
+                source='Tienda', acquisition_date=date(2024, 1, 1),
+            )
+            WishlistItem.objects.create(user=cls.user, collectible_type='lightstick', lightstick=lightstick, priority=3)
+        UserFavoriteGroup.objects.bulk_create([UserFavoriteGroup(user=cls.user, group=group) for group in groups])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertConstantQueries(self, url, expected):
+        for size in (1, 100):
+            with mock.patch.object(PageNumberPagination, 'page_size', size):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), size)
+            self.assertEqual(
+                len(queries), expected,
+                f'{url} (page_size={size}):\n' + '\n'.join(query['sql'] for query in queries),
+            )
+        return response.data['results']
+
+    def test_collectibles(self):
+        results = self.assertConstantQueries('/api/collection/collectibles/', 2)
+        photocard = next(row for row in results if row['photocard_details'])
+        self.assertTrue(photocard['photocard_details']['group_name'].startswith('Group'))
+        self.assertTrue(photocard['photocard_details']['member_name'].startswith('Member'))
+        lightstick = next(row for row in results if row['lightstick_details'])
+        self.assertTrue(lightstick['lightstick_details']['group_name'].startswith('Group'))
+
+    def test_wishlist(self):
+        results = self.assertConstantQueries('/api/collection/wishlist/', 2)
+        self.assertEqual({row['collectible_type'] for row in results}, {'photocard', 'lightstick'})
+
+    def test_favorite_groups(self):
+        results = self.assertConstantQueries('/api/collection/favorites/', 3)
+        self.assertEqual({row['group_details']['member_count'] for row in results}, {1})
+
+
+class OwnershipBitmapTests(TestCase):
+    """Los bitmaps de posesión siguen las altas, cambios y bajas de la colección"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username='jihyo', email='jihyo@example.com', password='pass', collector_name='Jihyo',
+        )
+        cls.group = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20),
+            agency='JYP Entertainment', group_type='Girl Group',
+        )
+        album = Album.objects.create(
+            group=cls.group, title='Formula of Love', release_date=date(2021, 11, 12), album_type='Full Album',
+        )
+        version = AlbumVersion.objects.create(album=album, version_name='Break It')
+        cls.photocards = [
+            Photocard.objects.create(
+                group=cls.group, album_version=version, name=f'Photocard {i}',
+                release_date=date(2021, 11, 12), photocard_type='Album',
+            )
+            for i in range(4)
+        ]
+        UserFavoriteGroup.objects.create(user=cls.user, group=cls.group)
+        summary_for(cls.user)
+
+    def add(self, photocard, quantity=1):
+        return UserCollectible.objects.create(
+            user=self.user, collectible_type='photocard', photocard=photocard,
+            source='Album', acquisition_date=date(2024, 1, 1), quantity=quantity,
+        )
+
+    def owned_positions(self):
+        return positions(owned_bitmaps(self.user).get(self.group.pk, 0))
+
+    def test_positions_are_dense(self):
+        self.assertEqual([photocard.group_position for photocard in self.photocards], [0, 1, 2, 3])
+
+    def test_bits_follow_collection(self):
+        first = self.add(self.photocards[0])
+        self.add(self.photocards[0])
+        self.add(self.photocards[2], quantity=3)
+        self.assertEqual(self.owned_positions(), [0, 2])
+
+        first.delete()
+        self.assertEqual(self.owned_positions(), [0, 2])
+        UserCollectible.objects.filter(photocard=self.photocards[0]).delete()
+        self.assertEqual(self.owned_positions(), [2])
+
+        collectible = UserCollectible.objects.get(photocard=self.photocards[2])
+        collectible.photocard = self.photocards[3]
+        collectible.save()
+        self.assertEqual(self.owned_positions(), [3])
+        self.assertEqual(verify_summaries([self.user.pk]), [])
+
+    def test_moving_photocard_moves_counters(self):
+        self.add(self.photocards[1], quantity=2)
+        other = Group.objects.create(
+            name='ITZY', korean_name='있지', debut_date=date(2019, 2, 12), agency='JYP', group_type='Girl Group',
+        )
+        album = Album.objects.create(group=other, title='Checkmate', release_date=date(2022, 7, 15), album_type='Mini')
+        version = AlbumVersion.objects.create(album=album, version_name='Standard')
+
+        photocard = self.photocards[1]
+        photocard.group = other
+        photocard.save()
+        self.assertEqual(self.owned_positions(), [])
+        self.assertEqual(positions(owned_bitmaps(self.user)[other.pk]), [photocard.group_position])
+        self.assertEqual(verify_summaries([self.user.pk]), [])
+
+        photocard.album_version = version
+        photocard.save()
+        self.assertEqual(verify_summaries([self.user.pk]), [])
+
+    def test_missing_group_photocards(self):
+        self.add(self.photocards[0])
+        self.add(self.photocards[2])
+        # Cargada con bulk_create y aún sin group_position: también falta
+        Photocard.objects.bulk_create([Photocard(
+            group=self.group, album_version=self.photocards[0].album_version, name='Photocard 4',
+            release_date=date(2021, 11, 12), photocard_type='Album',
+        )])
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for scope, pk in (('groups', self.group.pk), ('albums', self.photocards[0].album_version.album_id)):
+            with self.subTest(scope=scope):
+                response = client.get(f'/api/collection/missing/{scope}/{pk}/?ordering=name')
+                self.assertEqual(
+                    [row['name'] for row in response.data['results']], ['Photocard 1', 'Photocard 3', 'Photocard 4'],
+                )
+
+    def test_completion_counts_distinct_photocards(self):
+        self.add(self.photocards[0], quantity=2)
+        self.add(self.photocards[0])
+        self.add(self.photocards[1])
+        [group] = completion_by_group(self.user)
+        self.assertEqual((group['user_photocards'], group['total_photocards']), (2, 4))
+        self.assertEqual(group['completion_percentage'], 50.0)
+
+
+class OwnershipOverlayTests(TestCase):
+    """?with_ownership=1 marca en las listas del catálogo las copias y la prioridad en la wishlist"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username='sana', email='sana@example.com', password='pass', collector_name='Sana',
+        )
+        group = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20), agency='JYP', group_type='Girl Group',
+        )
+        album = Album.objects.create(
+            group=group, title='Formula of Love', release_date=date(2021, 11, 12), album_type='Full Album',
+        )
+        version = AlbumVersion.objects.create(album=album, version_name='Break It')
+        cls.owned, cls.wanted, cls.other = [
+            Photocard.objects.create(
+                group=group, album_version=version, name=f'Photocard {i}',
+                release_date=date(2021, 11, 12), photocard_type='Album',
+            )
+            for i in range(3)
+        ]
+        UserCollectible.objects.create(
+            user=cls.user, collectible_type='photocard', photocard=cls.owned,
+            source='Album', acquisition_date=date(2024, 1, 1), quantity=3,
+        )
+        WishlistItem.objects.create(
+            user=cls.user, collectible_type='photocard', photocard=cls.wanted, priority=Decimal('4.5'),
+        )
+
+    def test_overlay(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/catalog/photocards/?with_ownership=1')
+        rows = {row['id']: row for row in response.data['results']}
+        self.assertEqual(
+            (rows[str(self.owned.pk)]['owned_quantity'], rows[str(self.owned.pk)]['wishlist_priority']), (3, None),
+        )
+        self.assertEqual(
+            (rows[str(self.wanted.pk)]['owned_quantity'], rows[str(self.wanted.pk)]['wishlist_priority']),
+            (0, Decimal('4.5')),
+        )
+        self.assertEqual(rows[str(self.other.pk)]['owned_quantity'], 0)
+
+
+class SummaryDeltaTests(TestCase):
+    """Los contadores siguen a la colección aunque los valores lleguen como texto"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username='momo', email='momo@example.com', password='pass', collector_name='Momo',
+        )
+        group = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20), agency='JYP', group_type='Girl Group',
+        )
+        cls.lightstick = Lightstick.objects.create(group=group, name='Candybong', version='Z', release_date=date(2019, 3, 1))
+        summary_for(cls.user)
+
+    def test_text_values(self):
+        collectible = UserCollectible.objects.create(
+            user=self.user, collectible_type='lightstick', lightstick=self.lightstick,
+            source='Tienda', acquisition_date=date(2024, 1, 1), purchase_price='1.50', quantity='2',
+        )
+        collectible.purchase_price = '2.25'
+        collectible.save()
+        self.user.collection_summary.refresh_from_db()
+        self.assertEqual(self.user.collection_summary.total_value, Decimal('2.25'))
+        self.assertEqual(verify_summaries([self.user.pk]), [])
+
+
+class BulkOperationTests(TestCase):
+    """Operaciones en lote: todo o nada, ids repetidos y contadores coherentes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username='jeongyeon', email='jeongyeon@example.com', password='pass', collector_name='Jeongyeon',
+        )
+        group = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20), agency='JYP', group_type='Girl Group',
+        )
+        album = Album.objects.create(
+            group=group, title='Formula of Love', release_date=date(2021, 11, 12), album_type='Full Album',
+        )
+        version = AlbumVersion.objects.create(album=album, version_name='Break It')
+        cls.photocards = [
+            Photocard.objects.create(
+                group=group, album_version=version, name=f'Photocard {i}',
+                release_date=date(2021, 11, 12), photocard_type='Album',
+            )
+            for i in range(2)
+        ]
+        cls.lightstick = Lightstick.objects.create(group=group, name='Candybong', version='Z', release_date=date(2019, 3, 1))
+        summary_for(cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.card = UserCollectible.objects.create(
+            user=self.user, collectible_type='photocard', photocard=self.photocards[0],
+            source='Album', acquisition_date=date(2024, 1, 1), purchase_price=Decimal('5.00'),
+        )
+        self.stick = UserCollectible.objects.create(
+            user=self.user, collectible_type='lightstick', lightstick=self.lightstick,
+            source='Tienda', acquisition_date=date(2024, 1, 2),
+        )
+
+    def bulk(self, *operations):
+        return self.client.post('/api/collection/collectibles/bulk/', {'operations': operations}, format='json')
+
+    def create(self, **fields):
+        return {'action': 'create', 'source': 'Album', 'acquisition_date': '2024-03-01', **fields}
+
+    def test_mixed_operations(self):
+        response = self.bulk(
+            self.create(collectible_type='photocard', photocard=str(self.photocards[1].pk), quantity=2),
+            {'action': 'update', 'id': str(self.card.pk), 'quantity': 3},
+            {'action': 'delete', 'id': str(self.stick.pk)},
+            self.create(collectible_type='lightstick', lightstick=str(self.lightstick.pk), purchase_price='30.00'),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['action'] for result in response.data['results']], ['create', 'update', 'delete', 'create'])
+        self.assertEqual(
+            sorted(UserCollectible.objects.filter(user=self.user).values_list('collectible_type', 'quantity')),
+            [('lightstick', 1), ('photocard', 2), ('photocard', 3)],
+        )
+        self.assertEqual(verify_summaries([self.user.pk]), [])
+
+    def test_any_error_writes_nothing(self):
+        response = self.bulk(
+            self.create(collectible_type='photocard', photocard=str(self.photocards[1].pk)),
+            {'action': 'update', 'id': str(self.card.pk), 'quantity': 3},
+            {'action': 'delete', 'id': str(self.stick.pk)},
+            self.create(collectible_type='photocard', photocard=str(self.photocards[1].pk), acquisition_date='ayer'),
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.data['errors']], [3])
+        self.assertEqual(UserCollectible.objects.filter(user=self.user).count(), 2)
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.quantity, 1)
+        self.assertEqual(verify_summaries([self.user.pk]), [])
+
+    def test_repeated_id(self):
+        response = self.bulk(
+            {'action': 'update', 'id': str(self.card.pk), 'quantity': 3},
+            {'action': 'delete', 'id': str(self.card.pk)},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'], [{'index': 1, 'errors': {'id': ['Objeto repetido en el lote']}}])
+        self.assertTrue(UserCollectible.objects.filter(pk=self.card.pk, quantity=1).exists())
+
+    def test_shared_serializers_validate_each_operation_alone(self):
+        # Un mismo serializer valida todas las altas y otro todos los cambios
+        response = self.bulk(
+            self.create(collectible_type='photocard', photocard=str(self.photocards[1].pk), purchase_price='9.00'),
+            self.create(collectible_type='lightstick', lightstick=str(self.lightstick.pk)),
+            self.create(collectible_type='photocard'),
+            {'action': 'update', 'id': str(self.card.pk), 'quantity': 'muchas'},
+            {'action': 'update', 'id': str(self.stick.pk), 'source': 'Evento'},
+        )
+        self.assertEqual([error['index'] for error in response.data['errors']], [2, 3])
+
+        response = self.bulk(
+            self.create(collectible_type='photocard', photocard=str(self.photocards[1].pk), purchase_price='9.00'),
+            self.create(collectible_type='lightstick', lightstick=str(self.lightstick.pk)),
+            {'action': 'update', 'id': str(self.card.pk), 'quantity': 4},
+            {'action': 'update', 'id': str(self.stick.pk), 'source': 'Evento'},
+        )
+        self.assertEqual(response.status_code, 200)
+        created = UserCollectible.objects.get(pk=response.data['results'][1]['id'])
+        self.assertEqual((created.photocard_id, created.purchase_price), (None, None))
+        self.card.refresh_from_db()
+        self.stick.refresh_from_db()
+        self.assertEqual((self.card.quantity, self.card.source), (4, 'Album'))
+        self.assertEqual((self.stick.quantity, self.stick.source), (1, 'Evento'))
+        self.assertEqual(verify_summaries([self.user.pk]), [])
+
+
+class ImportTests(TestCase):
+    """Importación por bloques: errores por línea, progreso en NDJSON e ida y vuelta con la exportación"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user(
+            username='mina', email='mina@example.com', password='pass', collector_name='Mina',
+        )
+        cls.other = User.objects.create_user(
+            username='dahyun', email='dahyun@example.com', password='pass', collector_name='Dahyun',
+        )
+        group = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20), agency='JYP', group_type='Girl Group',
+        )
+        for title in ('Formula of Love', 'Eyes Wide Open'):
+            album = Album.objects.create(group=group, title=title, release_date=date(2021, 11, 12), album_type='Full Album')
+            version = AlbumVersion.objects.create(album=album, version_name='Standard')
+            Photocard.objects.create(
+                group=group, album_version=version, name='Mina', release_date=date(2021, 11, 12), photocard_type='Album',
+            )
+        cls.photocard = Photocard.objects.get(album_version__album__title='Formula of Love')
+        Photocard.objects.create(
+            group=group, album_version=version, name='Candybong', release_date=date(2020, 10, 26), photocard_type='Album',
+        )
+        cls.lightstick = Lightstick.objects.create(group=group, name='Candybong', version='Z', release_date=date(2019, 3, 1))
+        Lightstick.objects.create(group=group, name='Candybong Infinity', version='3', release_date=date(2021, 12, 1))
+        summary_for(cls.user)
+
+    def rows(self, text):
+        return read_rows(BytesIO(text.encode()), 'csv')
+
+    def test_errors_by_line(self):
+        text = (
+            'name,group,album,version,collectible_type,source,acquisition_date,quantity\n'
+            'Mina,TWICE,Formula of Love,,,Album,2024-05-01,2\n'      # 2: photocard por nombre y álbum
+            'Candybong Infinity,TWICE,,,,Tienda,2024-05-02,1\n'      # 3: lightstick solo por nombre y grupo
+            'Mina,TWICE,,,,Album,2024-05-03,1\n'                     # 4: dos álbumes
+            'Candybong,TWICE,,,,Tienda,2024-05-04,1\n'               # 5: photocard y lightstick
+            'Candybong,TWICE,,Z,,Tienda,2024-05-05,1\n'              # 6: lightstick por versión
+            'Sana,TWICE,,,,Album,2024-05-06,1\n'                     # 7: no existe
+            'Mina,TWICE,Formula of Love,,,Album,ayer,1\n'            # 8: fecha no válida
+        )
+        steps = list(import_collection(self.user, self.rows(text), chunk_size=4))
+        self.assertEqual([(step.processed, step.imported) for step in steps], [(4, 2), (7, 3)])
+        errors = {error['line']: error['errors'] for step in steps for error in step.errors}
+        self.assertEqual(sorted(errors), [4, 5, 7, 8])
+        self.assertIn('indica album', errors[4]['photocard'][0])
+        self.assertIn('indica collectible_type', errors[5]['name'][0])
+        self.assertIn('no está en el catálogo', errors[7]['name'][0])
+        self.assertIn('acquisition_date', errors[8])
+
+        self.assertEqual(
+            sorted(UserCollectible.objects.filter(user=self.user).values_list('collectible_type', 'acquisition_date')),
+            [('lightstick', date(2024, 5, 2)), ('lightstick', date(2024, 5, 5)), ('photocard', date(2024, 5, 1))],
+        )
+        self.assertEqual(verify_summaries([self.user.pk]), [])
+
+    def test_view_streams_progress(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        upload = SimpleUploadedFile('collection.ndjson', (
+            f'{{"photocard": "{self.photocard.pk}", "source": "Album", "acquisition_date": "2024-01-01"}}\n'
+            'no es json\n'
+        ).encode())
+        response = client.post('/api/collection/import/', {'file': upload}, format='multipart')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(lines[0]['imported'], 1)
+        self.assertEqual(lines[0]['errors'], [{'line': 2, 'errors': {'non_field_errors': ['Fila no válida']}}])
+        self.assertEqual(lines[-1], {'done': True})
+
+    def test_export_import_round_trip(self):
+        UserCollectible.objects.create(
+            user=self.user, collectible_type='photocard', photocard=self.photocard, source='Album',
+            acquisition_date=date(2024, 1, 1), purchase_price=Decimal('12.50'), quantity=2,
+        )
+        UserCollectible.objects.create(
+            user=self.user, collectible_type='lightstick', lightstick=self.lightstick, source='Tienda',
+            acquisition_date=date(2024, 2, 1),
+        )
+        client = APIClient()
+        client.force_authenticate(self.user)
+        exported = b''.join(client.get('/api/collection/export/collection.csv').streaming_content)
+
+        with tempfile.NamedTemporaryFile(suffix='.csv') as file:
+            file.write(exported)
+            file.flush()
+            call_command('import_collection', self.other.email, file.name, stdout=mock.MagicMock())
+
+        fields = ('collectible_type', 'photocard', 'lightstick', 'source', 'acquisition_date', 'purchase_price', 'quantity')
+        self.assertEqual(
+            sorted(UserCollectible.objects.filter(user=self.other).values_list(*fields), key=str),
+            sorted(UserCollectible.objects.filter(user=self.user).values_list(*fields), key=str),
+        )
+        self.assertEqual(verify_summaries([self.other.pk]), [])
+
+    def test_name_lookups_use_indexes(self):
+        text = (
+            'name,group,album,source,acquisition_date\n'
+            'mina,twice,formula of love,Album,2024-01-01\n'
+            'Candybong Infinity,TWICE,,Tienda,2024-01-01\n'
+        )
+        with CaptureQueriesContext(connection) as queries:
+            progress = list(import_collection(self.other, self.rows(text)))
+        self.assertEqual((progress[-1].imported, progress[-1].errors), (2, []))
+        lookups = [query['sql'] for query in queries if 'LOWER(' in query['sql']]
+        self.assertEqual(len(lookups), 2)
+        # Con tan pocas filas el planificador preferiría recorrer las tablas
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            for sql in lookups:
+                cursor.execute(f'EXPLAIN {sql}')
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+                for table in ('catalog_photocard', 'catalog_lightstick', 'catalog_group'):
+                    self.assertNotIn(f'Seq Scan on {table}', plan, plan)
+                self.assertRegex(plan, r'catalog_\w+_lower_name_idx')
+
+
+class SpendingHistoryTests(TestCase):
+    """El historial de gasto sigue las altas, cambios y bajas y se lee de los agregados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username='jihyo', email='jihyo@example.com', password='pass', collector_name='Jihyo',
+        )
+        cls.group = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20), agency='JYP', group_type='Girl Group',
+        )
+        cls.lightstick = Lightstick.objects.create(
+            group=cls.group, name='Candybong', version='Z', release_date=date(2019, 3, 1),
+        )
+        summary_for(cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add(self, acquisition_date, price, source='Tienda'):
+        return UserCollectible.objects.create(
+            user=self.user, collectible_type='lightstick', lightstick=self.lightstick,
+            source=source, acquisition_date=acquisition_date, purchase_price=Decimal(price),
+        )
+
+    def history(self, query=''):
+        return self.client.get(f'/api/collection/history/{query}').data['results']
+
+    def test_history_follows_collection(self):
+        first = self.add(date(2024, 1, 10), '30.00')
+        self.add(date(2024, 1, 20), '20.00', source='Evento')
+        self.add(date(2024, 3, 5), '15.00')
+        first.acquisition_date = date(2024, 2, 1)
+        first.save()
+        self.assertEqual(verify_summaries([self.user.pk]), [])
+
+        self.assertEqual(
+            [(row['date'], row['spent'], row['value']) for row in self.history()],
+            [('2024-01-01', '20.00', '20.00'), ('2024-02-01', '30.00', '50.00'), ('2024-03-01', '15.00', '65.00')],
+        )
+        self.assertEqual(
+            [(row['date'], row['value']) for row in self.history('?period=day&start=2024-02-15')],
+            [('2024-03-05', '65.00')],
+        )
+        self.assertEqual(
+            [(row['source'], row['spent']) for row in self.history('?by=source&end=2024-01-31')],
+            [('Evento', '20.00')],
+        )
+
+        first.delete()
+        self.assertEqual([row['date'] for row in self.history()], ['2024-01-01', '2024-03-01'])
+        self.assertEqual(verify_summaries([self.user.pk]), [])
+
+    def test_text_date(self):
+        UserCollectible.objects.create(
+            user=self.user, collectible_type='lightstick', lightstick=self.lightstick,
+            source='Tienda', acquisition_date='2024-05-03', purchase_price=Decimal('8.00'),
+        )
+        self.assertEqual([(row['date'], row['spent']) for row in self.history('?period=day')], [('2024-05-03', '8.00')])
+        self.assertEqual(verify_summaries([self.user.pk]), [])
+
+    def test_history_reads_rollups(self):
+        for day in range(1, 11):
+            self.add(date(2024, 1, day), '5.00')
+        with CaptureQueriesContext(connection) as queries:
+            [row] = self.history('?by=group')
+        self.assertEqual((row['group_name'], row['entries'], row['spent']), ('TWICE', 10, '50.00'))
+        self.assertEqual(len(queries), 1)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/collection/history/?period=week').status_code, 400)
+        self.assertEqual(self.client.get('/api/collection/history/?start=2024-02-30').status_code, 400)
+
+
+class LeaderboardTests(TestCase):
+    """Las clasificaciones se leen de los puestos calculados por refresh_leaderboards"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            get_user_model().objects.create_user(
+                username=f'once{i}', email=f'once{i}@example.com', password='pass', collector_name=f'Once {i}',
+            )
+            for i in range(3)
+        ]
+        cls.group = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20), agency='JYP', group_type='Girl Group',
+        )
+        album = Album.objects.create(
+            group=cls.group, title='Formula of Love', release_date=date(2021, 11, 12), album_type='Full Album',
+        )
+        version = AlbumVersion.objects.create(album=album, version_name='Break It')
+        photocards = [
+            Photocard.objects.create(
+                group=cls.group, album_version=version, name=f'Photocard {i}',
+                release_date=date(2021, 11, 12), photocard_type='Album',
+            )
+            for i in range(4)
+        ]
+        # once0: 3 copias de una photocard; once1: 2 photocards distintas
+        for user, photocard, quantity in ((cls.users[0], photocards[0], 1), (cls.users[0], photocards[0], 2),
+                                          (cls.users[1], photocards[1], 1), (cls.users[1], photocards[2], 1),
+                                          (cls.users[0], photocards[3], 1)):
+            UserCollectible.objects.create(
+                user=user, collectible_type='photocard', photocard=photocard,
+                source='Album', acquisition_date=date(2024, 1, 1), quantity=quantity,
+            )
+        call_command('refresh_leaderboards', stdout=mock.MagicMock())
+
+    def test_global_and_group_rankings(self):
+        top, mine = leaderboard('photocards', user=self.users[1])
+        self.assertEqual([(row['username'], row['score'], row['rank']) for row in top], [('once0', 3, 1), ('once1', 2, 2)])
+        self.assertEqual(mine, {'rank': 2, 'score': 2, 'refreshed_at': top[0]['refreshed_at']})
+
+        top, mine = leaderboard('completion', self.group.pk, self.users[2])
+        self.assertEqual(
+            sorted((row['username'], row['rank'], row['completion_percentage']) for row in top),
+            [('once0', 1, 50.0), ('once1', 1, 50.0)],
+        )
+        self.assertIsNone(mine)
+
+    def test_leaderboard_view(self):
+        client = APIClient()
+        client.force_authenticate(self.users[1])
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/collection/leaderboards/collection/?limit=1')
+        self.assertEqual(len(queries), 2)
+        self.assertEqual([row['username'] for row in response.data['results']], ['once0'])
+        self.assertEqual(response.data['me'], {'rank': 2, 'score': 2})
+        self.assertEqual(client.get('/api/collection/leaderboards/completion/').status_code, 400)
+        self.assertEqual(client.get('/api/collection/leaderboards/followers/').status_code, 404)
+
+
+class StatsQueryCountTests(TestCase):
+    """/api/collection/stats/ hace las mismas consultas con uno o con muchos grupos favoritos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        groups = Group.objects.bulk_create([
+            Group(
+                name=f'Group {i:02}', korean_name=f'그룹 {i}', debut_date=date(2015, 10, 20),
+                agency='JYP Entertainment', group_type='Girl Group',
+            )
+            for i in range(40)
+        ])
+        album = Album.objects.create(
+            group=groups[0], title='Formula of Love', release_date=date(2021, 11, 12), album_type='Full Album',
+        )
+        version = AlbumVersion.objects.create(album=album, version_name='Break It')
+        # Dos photocards por grupo: el usuario tiene la primera de cada uno
+        cls.photocards = [
+            Photocard.objects.create(
+                group=group, album_version=version, name=f'Photocard {i}-{j}',
+                release_date=date(2021, 11, 12), photocard_type='Album',
+            )
+            for i, group in enumerate(groups) for j in range(2)
+        ]
+        cls.users = {}
+        for favorites in (1, 40):
+            user = get_user_model().objects.create_user(
+                username=f'fan{favorites}', email=f'fan{favorites}@example.com', password='pass',
+                collector_name=f'Fan {favorites}',
+            )
+            for photocard in cls.photocards[0:2 * favorites:2]:
+                UserCollectible.objects.create(
+                    user=user, collectible_type='photocard', photocard=photocard,
+                    source='Album', acquisition_date=date(2024, 1, 1), purchase_price=Decimal('10.00'),
+                )
+            UserFavoriteGroup.objects.bulk_create([UserFavoriteGroup(user=user, group=group) for group in groups[:favorites]])
+            summary_for(user)
+            cls.users[favorites] = user
+
+    def test_fixed_query_count(self):
+        for favorites, user in self.users.items():
+            with self.subTest(favorites=favorites):
+                client = APIClient()
+                # Instancia nueva, como en una petición real (sin contadores ya cargados)
+                client.force_authenticate(get_user_model().objects.get(pk=user.pk))
+                # Contadores, duplicados, favoritos con sus bitmaps y bitmaps del catálogo
+                with self.assertNumQueries(4):
+                    response = client.get('/api/collection/stats/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['favorite_groups'], favorites)
+                self.assertEqual(response.data['total_photocards'], favorites)
+                self.assertEqual(response.data['total_value'], f'{10 * favorites}.00')
+                completion = response.data['completion_by_group']
+                self.assertEqual(len(completion), favorites)
+                self.assertEqual(
+                    {(row['user_photocards'], row['total_photocards'], row['completion_percentage']) for row in completion},
+                    {(1, 2, 50.0)},
+                )
+
+    def test_no_favorites(self):
+        user = self.users[1]
+        UserFavoriteGroup.objects.filter(user=user).delete()
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.get(pk=user.pk))
+        with self.assertNumQueries(3):
+            response = client.get('/api/collection/stats/')
+        self.assertEqual(response.data['completion_by_group'], [])
+
+
+class DuplicateTests(TestCase):
+    """Un objeto es duplicado si la suma de quantity de todas sus filas pasa de 1"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username='mina', email='mina@example.com', password='pass', collector_name='Mina',
+        )
+        group = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20), agency='JYP', group_type='Girl Group',
+        )
+        album = Album.objects.create(
+            group=group, title='Formula of Love', release_date=date(2021, 11, 12), album_type='Full Album',
+        )
+        version = AlbumVersion.objects.create(album=album, version_name='Break It')
+        spread, single, lone = [
+            Photocard.objects.create(
+                group=group, album_version=version, name=name, release_date=date(2021, 11, 12), photocard_type='Album',
+            )
+            for name in ('Spread', 'Single Row', 'Lone')
+        ]
+        lightstick = Lightstick.objects.create(
+            group=group, name='Candybong ∞', version='Ver. 3', release_date=date(2021, 12, 1),
+        )
+        # Spread: 4 copias en tres filas; Single Row: 2 copias en una fila; Lone: una sola copia
+        for photocard, quantity in ((spread, 1), (spread, 1), (spread, 2), (single, 2), (lone, 1)):
+            UserCollectible.objects.create(
+                user=cls.user, collectible_type='photocard', photocard=photocard,
+                source='Album', acquisition_date=date(2024, 1, 1), quantity=quantity,
+            )
+        for source in ('Tienda', 'Concierto'):
+            UserCollectible.objects.create(
+                user=cls.user, collectible_type='lightstick', lightstick=lightstick,
+                source=source, acquisition_date=date(2024, 1, 1),
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_duplicate_list(self):
+        response = self.client.get('/api/collection/duplicates/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [
+                (row['collectible_type'], row['name'], row['copies'], row['duplicates'], row['entries'])
+                for row in response.data['results']
+            ],
+            [
+                ('photocard', 'Spread', 4, 3, 3),
+                ('lightstick', 'Candybong ∞', 2, 1, 2),
+                ('photocard', 'Single Row', 2, 1, 1),
+            ],
+        )
+
+    def test_stats_count_copies_beyond_the_first(self):
+        response = self.client.get('/api/collection/stats/')
+        self.assertEqual(response.data['duplicate_photocards'], 4)
+        self.assertEqual(response.data['duplicate_lightsticks'], 1)
+
+    def test_removing_rows_updates_duplicates(self):
+        UserCollectible.objects.filter(user=self.user, photocard__name='Spread', quantity=1).delete()
+        UserCollectible.objects.filter(user=self.user, source='Concierto').delete()
+        response = self.client.get('/api/collection/duplicates/')
+        self.assertEqual([(row['name'], row['copies']) for row in response.data['results']], [('Single Row', 2), ('Spread', 2)])
+        self.assertEqual(self.client.get('/api/collection/stats/').data['duplicate_lightsticks'], 0)
+
+
+class TradeMatchTests(TestCase):
+    """Los intercambios más equilibrados primero, con un número fijo de consultas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        group = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20), agency='JYP', group_type='Girl Group',
+        )
+        album = Album.objects.create(
+            group=group, title='Formula of Love', release_date=date(2021, 11, 12), album_type='Full Album',
+        )
+        version = AlbumVersion.objects.create(album=album, version_name='Break It')
+        cards = {
+            name: Photocard.objects.create(
+                group=group, album_version=version, name=name, release_date=date(2021, 11, 12), photocard_type='Album',
+            )
+            for name in 'ABCXY'
+        }
+        lightstick = Lightstick.objects.create(group=group, name='Z', version='Ver. 3', release_date=date(2021, 12, 1))
+        cls.users = {
+            name: get_user_model().objects.create_user(
+                username=name, email=f'{name}@example.com', password='pass', collector_name=name,
+            )
+            for name in ('me', 'many', 'even', 'small', 'oneway')
+        }
+
+        def spare(user, item, quantities=(2,)):
+            field = 'photocard' if isinstance(item, Photocard) else 'lightstick'
+            for quantity in quantities:
+                UserCollectible.objects.create(
+                    user=cls.users[user], collectible_type=field, **{field: item},
+                    source='Album', acquisition_date=date(2024, 1, 1), quantity=quantity,
+                )
+
+        def want(user, item):
+            field = 'photocard' if isinstance(item, Photocard) else 'lightstick'
+            WishlistItem.objects.create(user=cls.users[user], collectible_type=field, **{field: item}, priority=3)
+
+        # me busca A, B, C y Z; tiene X repetida (en dos filas) e Y repetida
+        for item in (cards['A'], cards['B'], cards['C'], lightstick):
+            want('me', item)
+        spare('me', cards['X'], quantities=(1, 1))
+        spare('me', cards['Y'])
+        # many: da A, B, C y Z, busca X -> min 1, total 5
+        for item in (cards['A'], cards['B'], cards['C'], lightstick):
+            spare('many', item)
+        want('many', cards['X'])
+        # even: da A y B, busca X e Y -> min 2, total 4
+        spare('even', cards['A'])
+        spare('even', cards['B'])
+        want('even', cards['X'])
+        want('even', cards['Y'])
+        # small: da A, busca Y -> min 1, total 2
+        spare('small', cards['A'])
+        want('small', cards['Y'])
+        # oneway: da A pero no busca nada mío; tener una sola copia de B no cuenta
+        spare('oneway', cards['A'])
+        spare('oneway', cards['B'], quantities=(1,))
+        want('oneway', cards['C'])
+
+    def test_order_and_items(self):
+        with self.assertNumQueries(6):
+            matches = trade_matches(self.users['me'])
+        self.assertEqual(
+            [(match['username'], match['give'], match['get']) for match in matches],
+            [('even', 2, 2), ('many', 4, 1), ('small', 1, 1)],
+        )
+        self.assertEqual([item['name'] for item in matches[1]['gives']], ['A', 'B', 'C', 'Z'])
+        self.assertEqual([item['collectible_type'] for item in matches[1]['gives']][-1], 'lightstick')
+        self.assertEqual([item['name'] for item in matches[0]['gets']], ['X', 'Y'])
+
+    def test_view_and_limit(self):
+        client = APIClient()
+        client.force_authenticate(self.users['me'])
+        response = client.get('/api/collection/trades/?limit=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([match['username'] for match in response.data['results']], ['even', 'many'])
+        # Desde el otro lado: small tiene A repetida y yo Y, que busca
+        self.assertEqual([match['username'] for match in trade_matches(self.users['small'])], ['me'])
+
+    def test_no_spares_or_wishlist(self):
+        self.assertEqual(trade_matches(self.users['oneway']), [])
+        newcomer = get_user_model().objects.create_user(
+            username='newcomer', email='newcomer@example.com', password='pass', collector_name='Newcomer',
+        )
+        with self.assertNumQueries(2):
+            self.assertEqual(trade_matches(newcomer), [])
+
+
+class MissingPhotocardTests(TestCase):
+    """/api/collection/missing/<ámbito>/<id>/ lista lo que falta y la completitud por álbum"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, other = [
+            get_user_model().objects.create_user(
+                username=name, email=f'{name}@example.com', password='pass', collector_name=name,
+            )
+            for name in ('momo', 'sana')
+        ]
+        cls.group = Group.objects.create(
+            name='TWICE', korean_name='트와이스', debut_date=date(2015, 10, 20), agency='JYP', group_type='Girl Group',
+        )
+        cls.albums = [
+            Album.objects.create(group=cls.group, title=title, release_date=release_date, album_type='Mini Album')
+            for title, release_date in (('Fancy You', date(2019, 4, 22)), ('Eyes Wide Open', date(2020, 10, 26)))
+        ]
+        cls.versions = [
+            AlbumVersion.objects.create(album=cls.albums[0], version_name='A'),
+            AlbumVersion.objects.create(album=cls.albums[0], version_name='B'),
+            AlbumVersion.objects.create(album=cls.albums[1], version_name='Story'),
+        ]
+        cards = {}
+        for version, count in zip(cls.versions, (3, 2, 2)):
+            for i in range(count):
+                name = f'{version.version_name}{i}'
+                cards[name] = Photocard.objects.create(
+                    group=cls.group, album_version=version, name=name,
+                    release_date=version.album.release_date, photocard_type='Album',
+                )
+        # momo tiene A0 (dos veces), B0 y todo Eyes Wide Open; sana tiene lo demás
+        for user, names in ((cls.user, ('A0', 'A0', 'B0', 'Story0', 'Story1')), (other, ('A1', 'A2', 'B1'))):
+            for name in names:
+                UserCollectible.objects.create(
+                    user=user, collectible_type='photocard', photocard=cards[name],
+                    source='Album', acquisition_date=date(2024, 1, 1),
+                )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def missing(self, scope, pk):
+        response = self.client.get(f'/api/collection/missing/{scope}/{pk}/?ordering=name')
+        self.assertEqual(response.status_code, 200)
+        albums = [
+            (row['album_title'], row['total_photocards'], row['user_photocards'],
+             row['missing_photocards'], row['completion_percentage'])
+            for row in response.data['albums']
+        ]
+        return [row['name'] for row in response.data['results']], albums
+
+    def test_album(self):
+        names, albums = self.missing('albums', self.albums[0].pk)
+        self.assertEqual(names, ['A1', 'A2', 'B1'])
+        self.assertEqual(albums, [('Fancy You', 5, 2, 3, 40.0)])
+        names, albums = self.missing('albums', self.albums[1].pk)
+        self.assertEqual(names, [])
+        self.assertEqual(albums, [('Eyes Wide Open', 2, 2, 0, 100.0)])
+
+    def test_version(self):
+        names, albums = self.missing('versions', self.versions[0].pk)
+        self.assertEqual(names, ['A1', 'A2'])
+        self.assertEqual(albums, [('Fancy You', 3, 1, 2, 33.33)])
+
+    def test_group_lists_every_album(self):
+        names, albums = self.missing('groups', self.group.pk)
+        self.assertEqual(names, ['A1', 'A2', 'B1'])
+        self.assertEqual(albums, [('Fancy You', 5, 2, 3, 40.0), ('Eyes Wide Open', 2, 2, 0, 100.0)])
+
+    def test_filters_and_errors(self):
+        response = self.client.get(f'/api/collection/missing/albums/{self.albums[0].pk}/?album_version={self.versions[1].pk}')
+        self.assertEqual([row['name'] for row in response.data['results']], ['B1'])
+        self.assertEqual(self.client.get(f'/api/collection/missing/members/{self.group.pk}/').status_code, 404)
+        self.assertEqual(APIClient().get(f'/api/collection/missing/albums/{self.albums[0].pk}/').status_code, 401)
+
+
+class FavoriteSyncTests(TestCase):
+    """PUT /api/collection/favorites/sync/ deja exactamente los grupos enviados y mantiene el contador"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username='jeongyeon', email='jeongyeon@example.com', password='pass', collector_name='Jeongyeon',
+        )
+        cls.groups = Group.objects.bulk_create([
+            Group(
+                name=f'Group {i}', korean_name=f'그룹 {i}', debut_date=date(2015, 10, 20),
+                agency='JYP Entertainment', group_type='Girl Group',
+            )
+            for i in range(3)
+        ])
+        summary_for(cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, group_ids):
+        return self.client.put('/api/collection/favorites/sync/', {'group_ids': group_ids}, format='json')
+
+    def favorites(self):
+        return dict(UserFavoriteGroup.objects.filter(user=self.user).values_list('group', 'favorited_at'))
+
+    def counter(self):
+        return summary_for(get_user_model().objects.get(pk=self.user.pk)).favorite_group_count
+
+    def test_repeated_sync_changes_nothing(self):
+        ids = [str(self.groups[0].pk), str(self.groups[1].pk)]
+        response = self.sync(ids)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row['group'] for row in response.data['results']}, {self.groups[0].pk, self.groups[1].pk})
+        before = self.favorites()
+        for payload in (ids, ids[::-1], ids + ids[:1]):
+            with self.subTest(payload=payload):
+                self.assertEqual(self.sync(payload).status_code, 200)
+                self.assertEqual(self.favorites(), before)
+                self.assertEqual(self.counter(), 2)
+
+    def test_sync_replaces_the_set(self):
+        self.sync([str(self.groups[0].pk), str(self.groups[1].pk)])
+        kept = self.favorites()[self.groups[1].pk]
+        self.sync([str(self.groups[1].pk), str(self.groups[2].pk)])
+        favorites = self.favorites()
+        self.assertEqual(set(favorites), {self.groups[1].pk, self.groups[2].pk})
+        self.assertEqual(favorites[self.groups[1].pk], kept)
+        self.assertEqual(self.counter(), 2)
+        self.sync([])
+        self.assertEqual(self.favorites(), {})
+        self.assertEqual(self.counter(), 0)
 
-# Create your tests here.
+    def test_unknown_or_invalid_group_writes_nothing(self):
+        self.sync([str(self.groups[0].pk)])
+        before = self.favorites()
+        unknown = '00000000-0000-0000-0000-000000000000'
+        for payload in ([str(self.groups[1].pk), unknown], [str(self.groups[1].pk), 'twice']):
+            with self.subTest(payload=payload):
+                response = self.sync(payload)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('group_ids', response.data)
+                self.assertEqual(self.favorites(), before)
+                self.assertEqual(self.counter(), 1)
+        self.assertEqual(self.client.put('/api/collection/favorites/sync/', {'group_ids': 'x'}, format='json').status_code, 400)
@@ -0,0 +1,109 @@
+"""
+Emparejamiento de intercambios: usuarios que tienen repetido algo de mi
+wishlist y que a la vez buscan algo de lo que yo tengo repetido.
+
+En lugar de cruzar las colecciones de todos los usuarios, se parte de dos
+índices invertidos objeto -> usuarios que se mantienen al escribir:
+UserItemSummary con copies > 1 (collection_spare_*_idx, quién tiene
+repetido cada objeto) y WishlistItem (collection_item_*_user_idx, quién lo
+busca). Primero se leen los ids de mi wishlist y de mis repetidos (pocas
+filas) y se pasan como listas, de modo que cada objeto es una búsqueda en
+el índice y el coste depende de esos objetos, no del número de usuarios.
+"""
+
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Least
+
+from .models import UserItemSummary, WishlistItem
+from .summary import ITEM_FIELDS
+
+
+def _item_ids(queryset):
+    """{'photocard': [...], 'lightstick': [...]} con los objetos de `queryset`"""
+    ids = {field: [] for field in ITEM_FIELDS}
+    for photocard_id, lightstick_id in queryset.values_list('photocard', 'lightstick').distinct():
+        if photocard_id:
+            ids['photocard'].append(photocard_id)
+        elif lightstick_id:
+            ids['lightstick'].append(lightstick_id)
+    return ids
+
+
+def _items_in(ids):
+    """Q para las filas de cualquiera de los objetos de `ids` (None si no hay ninguno)"""
+    conditions = [Q(**{f'{field}__in': ids[field]}) for field in ITEM_FIELDS if ids[field]]
+    if not conditions:
+        return None
+    condition = conditions[0]
+    for other in conditions[1:]:
+        condition |= other
+    return condition
+
+
+def _item_count():
+    return Count(Coalesce('photocard', 'lightstick'), distinct=True)
+
+
+def _trade_items(queryset, user_ids):
+    """{user_id: [{'collectible_type', 'id', 'name'}, ...]} por nombre, en una consulta"""
+    items = defaultdict(list)
+    rows = queryset.filter(user__in=user_ids).annotate(
+        name=Coalesce('photocard__name', 'lightstick__name'),
+    ).order_by('user', 'name').values_list('user', 'photocard', 'lightstick', 'name').distinct()
+    for user_id, photocard_id, lightstick_id, name in rows:
+        items[user_id].append({
+            'collectible_type': 'photocard' if photocard_id else 'lightstick',
+            'id': photocard_id or lightstick_id,
+            'name': name,
+        })
+    return items
+
+
+def trade_matches(user, limit=20):
+    """
+    Usuarios con intercambio en las dos direcciones (seis consultas).
+
+    `give`: objetos de mi wishlist que el otro tiene repetidos; `get`: objetos
+    que tengo repetidos y el otro busca. Se ordena primero por el intercambio
+    más equilibrado (min(give, get)) y después por el total.
+    """
+    wanted = _items_in(_item_ids(WishlistItem.objects.filter(user=user)))
+    spares = _items_in(_item_ids(UserItemSummary.objects.filter(user=user, copies__gt=1)))
+    if wanted is None or spares is None:
+        return []
+
+    # Otros usuarios con repetidos de lo que busco / que buscan mis repetidos
+    givers = UserItemSummary.objects.filter(wanted, copies__gt=1).exclude(user=user)
+    wanters = WishlistItem.objects.filter(spares).exclude(user=user)
+
+    wanted_by_them = wanters.filter(user=OuterRef('user')).order_by().values('user').annotate(
+        total=_item_count(),
+    ).values('total')
+    matches = list(
+        givers.filter(user__in=wanters.values('user')).values('user').annotate(
+            give=_item_count(),
+            get=Coalesce(Subquery(wanted_by_them, output_field=IntegerField()), Value(0)),
+        ).annotate(
+            balanced=Least('give', 'get'),
+            total=F('give') + F('get'),
+        ).order_by('-balanced', '-total', 'user')[:limit]
+    )
+
+    user_ids = [match['user'] for match in matches]
+    usernames = dict(get_user_model().objects.filter(pk__in=user_ids).values_list('pk', 'username'))
+    gives = _trade_items(givers, user_ids)
+    gets = _trade_items(wanters, user_ids)
+    return [
+        {
+            'user': match['user'],
+            'username': usernames[match['user']],
+            'give': match['give'],
+            'get': match['get'],
+            'gives': gives[match['user']],
+            'gets': gets[match['user']],
+        }
+        for match in matches
+    ]
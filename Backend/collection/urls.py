@@ -8,21 +8,30 @@
     path('collectibles/', views.UserCollectibleListView.as_view(), name='collectible-list'),
     path('collectibles/<uuid:pk>/', views.UserCollectibleDetailView.as_view(), name='collectible-detail'),
     path('collectibles/add/', views.add_to_collection_view, name='add-to-collection'),
-    path('collectibles/<str:collectible_type>/', views.user_collection_by_type_view, name='collection-by-type'),
+    path('collectibles/bulk/', views.bulk_collectibles_view, name='bulk-collectibles'),
+    path('import/', views.import_collection_view, name='import-collection'),
+    path('export/<str:kind>.<str:fmt>', views.export_view, name='export'),
+    path('collectibles/<str:collectible_type>/', views.UserCollectibleByTypeView.as_view(), name='collection-by-type'),
+    path('duplicates/', views.DuplicateListView.as_view(), name='duplicate-list'),
+    path('trades/', views.trade_matches_view, name='trade-matches'),
+    path('missing/<str:scope>/<uuid:pk>/', views.MissingPhotocardListView.as_view(), name='missing-photocards'),
     
     # Wishlist
     path('wishlist/', views.WishlistItemListView.as_view(), name='wishlist-list'),
     path('wishlist/<uuid:pk>/', views.WishlistItemDetailView.as_view(), name='wishlist-detail'),
     path('wishlist/add/', views.add_to_wishlist_view, name='add-to-wishlist'),
-    path('wishlist/<str:collectible_type>/', views.user_wishlist_by_type_view, name='wishlist-by-type'),
+    path('wishlist/<str:collectible_type>/', views.WishlistItemByTypeView.as_view(), name='wishlist-by-type'),
     
     # Grupos favoritos
     path('favorites/', views.UserFavoriteGroupListView.as_view(), name='favorite-list'),
     path('favorites/<uuid:pk>/', views.UserFavoriteGroupDetailView.as_view(), name='favorite-detail'),
     path('favorites/add/', views.add_favorite_group_view, name='add-favorite-group'),
+    path('favorites/sync/', views.sync_favorite_groups_view, name='sync-favorite-groups'),
     
     # Estadísticas
     path('stats/', views.collection_stats_view, name='stats'),
+    path('history/', views.collection_history_view, name='history'),
+    path('leaderboards/<str:metric>/', views.leaderboard_view, name='leaderboard'),
     
     # Machine Learning (comentado hasta que las vistas estén implementadas)
     # path('lightstick-recognition/', views.LightstickRecognitionView.as_view(), name='lightstick-recognition'),
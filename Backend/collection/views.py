@@ -1,8 +1,13 @@
+import json
+
 from rest_framework import generics, permissions, status, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from django.http import StreamingHttpResponse
+from django.db.models import Prefetch
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_date
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum
 from .models import UserCollectible, WishlistItem, UserFavoriteGroup
 from .serializers import (
     UserCollectibleSerializer,
@@ -10,15 +15,70 @@
     WishlistItemSerializer,
     WishlistItemCreateSerializer,
     UserFavoriteGroupSerializer,
+    DuplicateSerializer,
+    TradeMatchSerializer,
+    SpendingHistorySerializer,
+    LeaderboardEntrySerializer,
     CollectionStatsSerializer
 )
 from .filters import UserCollectibleFilter, WishlistItemFilter
+from .stats import collection_stats, duplicate_groups
+from .history import BREAKDOWNS, collection_history
+from .leaderboards import LEADERBOARDS, MAX_LIMIT, leaderboard
+from .summary import ROLLUP_PERIODS
+from .trades import trade_matches
+from .missing import SCOPES, album_completion, missing_photocards, scope_photocards
+from .bulk import MAX_OPERATIONS, as_uuid, run_operations
+from .favorites import MAX_GROUPS, sync_favorite_groups
+from .importer import FORMATS, format_for, import_collection, read_rows
+from . import exporter
 from users.permissions import IsOwnerOrReadOnly, IsOwner
+from catalog.pagination import KeysetOptInPagination
+from catalog.filters import PhotocardFilter
+from catalog.serializers import PhotocardListSerializer
+from catalog.views import group_list_queryset, photocard_list_queryset
+
+# Relaciones que leen PhotocardListSerializer y LightstickListSerializer anidados
+CATALOG_RELATED = ('photocard__group', 'photocard__member', 'lightstick__group')
+
+
+def collectible_list_queryset(user):
+    """Colección del usuario con el objeto del catálogo, su grupo y su miembro en la misma consulta"""
+    return UserCollectible.objects.filter(user=user).select_related(*CATALOG_RELATED)
+
+
+def wishlist_list_queryset(user):
+    """Wishlist del usuario con el objeto del catálogo, su grupo y su miembro en la misma consulta"""
+    return WishlistItem.objects.filter(user=user).select_related(*CATALOG_RELATED)
+
+
+def favorite_group_queryset(user):
+    """Grupos favoritos con member_count anotado para GroupListSerializer (una consulta más por página)"""
+    return UserFavoriteGroup.objects.filter(user=user).prefetch_related(
+        Prefetch('group', queryset=group_list_queryset()),
+    )
+
+
+class CollectibleTypeMixin:
+    """
+    Restringe una vista de lista al tipo de la URL (<collectible_type>),
+    con los mismos filtros, orden y paginación que la lista completa.
+    """
+    http_method_names = ['get', 'head', 'options']
+
+    def get(self, request, *args, **kwargs):
+        if kwargs['collectible_type'] not in ['photocard', 'lightstick']:
+            return Response({'error': 'Tipo no válido'}, status=status.HTTP_400_BAD_REQUEST)
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return super().get_queryset().filter(collectible_type=self.kwargs['collectible_type'])
 
 
 class UserCollectibleListView(generics.ListCreateAPIView):
     """Vista para listar y crear objetos en la colección del usuario"""
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetOptInPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_class = UserCollectibleFilter
     search_fields = ['source', 'photocard__name', 'lightstick__name']
@@ -26,7 +86,7 @@ class UserCollectibleListView(generics.ListCreateAPIView):
     ordering = ['-acquisition_date']
 
     def get_queryset(self):
-        return UserCollectible.objects.filter(user=self.request.user)
+        return collectible_list_queryset(self.request.user)
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -34,18 +94,63 @@ def get_serializer_class(self):
         return UserCollectibleSerializer
 
 
+class UserCollectibleByTypeView(CollectibleTypeMixin, UserCollectibleListView):
+    """Vista para listar la colección del usuario de un tipo"""
+
+
 class UserCollectibleDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Vista para ver, actualizar y eliminar objetos de la colección"""
     serializer_class = UserCollectibleSerializer
     permission_classes = [IsOwnerOrReadOnly]
 
     def get_queryset(self):
-        return UserCollectible.objects.filter(user=self.request.user)
+        return collectible_list_queryset(self.request.user)
+
+
+class DuplicateListView(generics.ListAPIView):
+    """Vista para listar los objetos repetidos de la colección (más copias primero)"""
+    serializer_class = DuplicateSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return duplicate_groups(self.request.user).annotate(
+            name=Coalesce('photocard__name', 'lightstick__name'),
+            group_name=Coalesce('photocard__group__name', 'lightstick__group__name'),
+        ).order_by('-copies', 'name', 'photocard', 'lightstick')
+
+
+class MissingPhotocardListView(generics.ListAPIView):
+    """
+    Vista para listar las photocards de un grupo, álbum o versión que el
+    usuario no tiene (ver collection.missing), con la completitud por álbum.
+    """
+    serializer_class = PhotocardListSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetOptInPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = PhotocardFilter
+    ordering_fields = ['name', 'release_date']
+    ordering = ['-release_date']
+
+    def get(self, request, *args, **kwargs):
+        if kwargs['scope'] not in SCOPES:
+            return Response({'error': 'Ámbito no válido'}, status=status.HTTP_404_NOT_FOUND)
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        photocards = scope_photocards(photocard_list_queryset(), self.kwargs['scope'], self.kwargs['pk'])
+        return missing_photocards(self.request.user, photocards)
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        response.data['albums'] = album_completion(request.user, self.kwargs['scope'], self.kwargs['pk'])
+        return response
 
 
 class WishlistItemListView(generics.ListCreateAPIView):
     """Vista para listar y crear items en la wishlist del usuario"""
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetOptInPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_class = WishlistItemFilter
     search_fields = ['photocard__name', 'lightstick__name']
@@ -53,7 +158,7 @@ class WishlistItemListView(generics.ListCreateAPIView):
     ordering = ['-priority', '-added_at']
 
     def get_queryset(self):
-        return WishlistItem.objects.filter(user=self.request.user)
+        return wishlist_list_queryset(self.request.user)
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -61,13 +166,17 @@ def get_serializer_class(self):
         return WishlistItemSerializer
 
 
+class WishlistItemByTypeView(CollectibleTypeMixin, WishlistItemListView):
+    """Vista para listar la wishlist del usuario de un tipo"""
+
+
 class WishlistItemDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Vista para ver, actualizar y eliminar items de la wishlist"""
     serializer_class = WishlistItemSerializer
     permission_classes = [IsOwnerOrReadOnly]
 
     def get_queryset(self):
-        return WishlistItem.objects.filter(user=self.request.user)
+        return wishlist_list_queryset(self.request.user)
 
 
 class UserFavoriteGroupListView(generics.ListCreateAPIView):
@@ -76,7 +185,7 @@ class UserFavoriteGroupListView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return UserFavoriteGroup.objects.filter(user=self.request.user).order_by('-favorited_at')
+        return favorite_group_queryset(self.request.user).order_by('-favorited_at')
 
 
 class UserFavoriteGroupDetailView(generics.RetrieveDestroyAPIView):
@@ -85,86 +194,93 @@ class UserFavoriteGroupDetailView(generics.RetrieveDestroyAPIView):
     permission_classes = [IsOwner]
 
     def get_queryset(self):
-        return UserFavoriteGroup.objects.filter(user=self.request.user)
+        return favorite_group_queryset(self.request.user)
 
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def collection_stats_view(request):
     """Vista para obtener estadísticas de la colección del usuario"""
-    user = request.user
-    
-    # Estadísticas básicas
-    total_photocards = UserCollectible.objects.filter(
-        user=user, collectible_type='photocard'
-    ).count()
-    
-    total_lightsticks = UserCollectible.objects.filter(
-        user=user, collectible_type='lightstick'
-    ).count()
-    
-    # Álbumes únicos (contando por versión de álbum)
-    albums = UserCollectible.objects.filter(
-        user=user, collectible_type='photocard'
-    ).values('photocard__album_version__album').distinct()
-    total_albums = albums.count()
-    
-    # Valor total de la colección
-    total_value = UserCollectible.objects.filter(
-        user=user
-    ).aggregate(
-        total=Sum('purchase_price')
-    )['total'] or 0
-    
-    # Duplicados (por ahora no implementado)
-    duplicate_photocards = 0
-    duplicate_lightsticks = 0
-    
-    # Wishlist y favoritos
-    wishlist_items = WishlistItem.objects.filter(user=user).count()
-    favorite_groups = UserFavoriteGroup.objects.filter(user=user).count()
-    
-    # Completitud por grupo
-    from catalog.models import Group, Photocard
-    
-    completion_by_group = []
-    user_groups = UserFavoriteGroup.objects.filter(user=user).select_related('group')
-    
-    for fav_group in user_groups:
-        group = fav_group.group
-        total_photocards_in_group = Photocard.objects.filter(group=group).count()
-        user_photocards_in_group = UserCollectible.objects.filter(
-            user=user, 
-            collectible_type='photocard',
-            photocard__group=group
-        ).count()
-        
-        if total_photocards_in_group > 0:
-            completion_percentage = (user_photocards_in_group / total_photocards_in_group) * 100
-            completion_by_group.append({
-                'group_id': str(group.id),
-                'group_name': group.name,
-                'total_photocards': total_photocards_in_group,
-                'user_photocards': user_photocards_in_group,
-                'completion_percentage': round(completion_percentage, 2)
-            })
-    
-    stats_data = {
-        'total_albums': total_albums,
-        'total_photocards': total_photocards,
-        'total_lightsticks': total_lightsticks,
-        'total_value': total_value,
-        'duplicate_photocards': duplicate_photocards,
-        'duplicate_lightsticks': duplicate_lightsticks,
-        'wishlist_items': wishlist_items,
-        'favorite_groups': favorite_groups,
-        'completion_by_group': completion_by_group
-    }
-    
+    stats_data = collection_stats(request.user)
     serializer = CollectionStatsSerializer(stats_data)
     return Response(serializer.data)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def collection_history_view(request):
+    """
+    Vista para el gasto y el valor de la colección por mes o día
+    (?period=month|day), opcionalmente por origen o grupo (?by=source|group)
+    y entre ?start= y ?end= (AAAA-MM-DD). Lee solo los agregados
+    precalculados (ver collection.history).
+    """
+    period = request.query_params.get('period', 'month')
+    by = request.query_params.get('by') or None
+    if period not in ROLLUP_PERIODS or by not in BREAKDOWNS:
+        return Response({'error': 'Periodo o desglose no válido'}, status=status.HTTP_400_BAD_REQUEST)
+    dates = {}
+    for name in ('start', 'end'):
+        value = request.query_params.get(name)
+        try:
+            dates[name] = parse_date(value) if value else None
+        except ValueError:
+            dates[name] = None
+        if value and dates[name] is None:
+            return Response({'error': f'Fecha no válida: {name}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = collection_history(request.user, period, by, **dates)
+    return Response({'period': period, 'by': by, 'results': SpendingHistorySerializer(results, many=True).data})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def leaderboard_view(request, metric):
+    """
+    Vista para el top de una clasificación (?limit=, máximo 100) y el puesto
+    del usuario. Las de grupo (?group=) se leen de los puestos precalculados
+    como las globales (ver collection.leaderboards).
+    """
+    if metric not in LEADERBOARDS:
+        return Response({'error': 'Clasificación no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+    group = request.query_params.get('group')
+    group_id = as_uuid(group) if group else None
+    if group and group_id is None:
+        return Response({'error': 'Grupo no válido'}, status=status.HTTP_400_BAD_REQUEST)
+    if ('group' if group else 'global') not in LEADERBOARDS[metric]:
+        message = 'Esta clasificación es por grupo' if group is None else 'Esta clasificación no es por grupo'
+        return Response({'error': message}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = 20
+
+    top, mine = leaderboard(metric, group_id, request.user, limit)
+    refreshed = (top[0] if top else mine or {}).get('refreshed_at')
+    return Response({
+        'metric': metric,
+        'group_id': group_id,
+        'refreshed_at': refreshed,
+        'results': LeaderboardEntrySerializer(top, many=True).data,
+        'me': {field: value for field, value in mine.items() if field != 'refreshed_at'} if mine else None,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def trade_matches_view(request):
+    """
+    Usuarios que tienen repetido algo de mi wishlist y buscan algo que tengo
+    repetido, los intercambios más equilibrados primero. ?limit= (máximo 100).
+    """
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+    except ValueError:
+        limit = 20
+    matches = trade_matches(request.user, limit=limit)
+    return Response({'results': TradeMatchSerializer(matches, many=True).data})
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def add_to_collection_view(request):
@@ -176,6 +292,55 @@ def add_to_collection_view(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_collectibles_view(request):
+    """
+    Vista para añadir, modificar y eliminar varios objetos de la colección en
+    una petición (ver collection.bulk). Todo o nada: con algún error no se
+    escribe nada y se devuelven los errores de cada operación.
+    """
+    operations = request.data.get('operations') if isinstance(request.data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return Response({'error': 'operations debe ser una lista no vacía'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(operations) > MAX_OPERATIONS:
+        return Response(
+            {'error': f'Máximo {MAX_OPERATIONS} operaciones por petición'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    results, errors = run_operations(request.user, operations)
+    if errors:
+        return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'results': results})
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def import_collection_view(request):
+    """
+    Vista para importar una colección desde un fichero CSV o NDJSON (campo
+    `file`, y `format` si la extensión no lo indica). La respuesta es NDJSON en
+    streaming: una línea de progreso por bloque importado (ver collection.importer).
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'file es requerido'}, status=status.HTTP_400_BAD_REQUEST)
+    fmt = request.data.get('format') or format_for(upload.name)
+    if fmt not in FORMATS:
+        return Response(
+            {'error': f"Formato no válido (usa: {', '.join(FORMATS)})"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    def progress():
+        for step in import_collection(request.user, read_rows(upload, fmt)):
+            yield json.dumps(step._asdict(), ensure_ascii=False) + '\n'
+        yield json.dumps({'done': True}) + '\n'
+
+    return StreamingHttpResponse(progress(), content_type='application/x-ndjson')
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def add_to_wishlist_view(request):
@@ -211,31 +376,39 @@ def add_favorite_group_view(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
-def user_collection_by_type_view(request, collectible_type):
-    """Vista para obtener la colección del usuario por tipo"""
-    if collectible_type not in ['photocard', 'lightstick']:
+def export_view(request, kind, fmt):
+    """
+    Vista para descargar la colección o la wishlist en CSV o NDJSON, en
+    streaming (ver collection.exporter). ?collectible_type= para un solo tipo.
+    """
+    if kind not in exporter.EXPORTS or fmt not in exporter.FORMATS:
+        return Response({'error': 'Exportación no válida'}, status=status.HTTP_404_NOT_FOUND)
+    collectible_type = request.query_params.get('collectible_type')
+    if collectible_type not in (None, 'photocard', 'lightstick'):
         return Response({'error': 'Tipo no válido'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    collectibles = UserCollectible.objects.filter(
-        user=request.user, 
-        collectible_type=collectible_type
-    ).order_by('-acquisition_date')
-    
-    serializer = UserCollectibleSerializer(collectibles, many=True)
-    return Response(serializer.data)
 
+    rows = exporter.export_rows(request.user, kind, collectible_type)
+    response = StreamingHttpResponse(exporter.STREAMS[fmt](kind, rows), content_type=exporter.CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    return response
 
-@api_view(['GET'])
+
+@api_view(['PUT'])
 @permission_classes([permissions.IsAuthenticated])
-def user_wishlist_by_type_view(request, collectible_type):
-    """Vista para obtener la wishlist del usuario por tipo"""
-    if collectible_type not in ['photocard', 'lightstick']:
-        return Response({'error': 'Tipo no válido'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    items = WishlistItem.objects.filter(
-        user=request.user, 
-        collectible_type=collectible_type
-    ).order_by('-priority', '-added_at')
-    
-    serializer = WishlistItemSerializer(items, many=True)
-    return Response(serializer.data)
+def sync_favorite_groups_view(request):
+    """
+    Vista para dejar como favoritos exactamente los grupos enviados
+    ({"group_ids": [...]}, ver collection.favorites). Es idempotente y
+    devuelve los favoritos resultantes.
+    """
+    group_ids = request.data.get('group_ids') if isinstance(request.data, dict) else None
+    if not isinstance(group_ids, list):
+        return Response({'error': 'group_ids debe ser una lista'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(group_ids) > MAX_GROUPS:
+        return Response({'error': f'Máximo {MAX_GROUPS} grupos'}, status=status.HTTP_400_BAD_REQUEST)
+
+    errors = sync_favorite_groups(request.user, group_ids)
+    if errors:
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+    favorites = favorite_group_queryset(request.user).order_by('-favorited_at')
+    return Response({'results': UserFavoriteGroupSerializer(favorites, many=True).data})
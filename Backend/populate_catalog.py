@@ -17,6 +17,9 @@
 
 # Ahora que Django está configurado, podemos importar los modelos
 from catalog.models import Group, Member, Album, AlbumVersion, Photocard, Lightstick
+from catalog.hangul import fill_hangul_fields
+from catalog.search import refresh_search_vectors
+from catalog.positions import assign_group_positions
 
 # Configurar logging para mejor manejo de errores
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -166,7 +169,11 @@ def create_group_with_members(group_data: Dict, members_data: List[Tuple]) -> Tu
             )
         
         # Crear todos los miembros en una sola operación
+        for member in members_to_create:
+            fill_hangul_fields(member)
         members = Member.objects.bulk_create(members_to_create)
+        # bulk_create no dispara señales: actualizar el índice de búsqueda a mano
+        refresh_search_vectors(Member, Member.objects.filter(group=group))
         
         # Registrar los miembros creados
         for member in members:
@@ -227,6 +234,8 @@ def create_album_with_version_and_photocards(group: Group, members: List[Member]
         
         # Crear todas las photocards en una sola operación
         Photocard.objects.bulk_create(photocards_to_create)
+        refresh_search_vectors(Photocard, Photocard.objects.filter(album_version=album_version))
+        assign_group_positions(Photocard, Photocard.objects.filter(album_version=album_version))
         logger.info(f"  Creadas {len(photocards_to_create)} photocards para el álbum {album.title}")
         
         return album
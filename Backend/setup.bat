@@ -103,7 +103,7 @@ if not exist ".env" (
 
 REM Ejecutar migraciones
 echo 🗄️  Ejecutando migraciones de la base de datos...
-python manage.py migrate
+python manage.py migrate && python manage.py createcachetable
 if %errorlevel% neq 0 (
     echo ❌ Error al ejecutar las migraciones.
     pause
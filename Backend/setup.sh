@@ -94,7 +94,7 @@ fi
 
 # Ejecutar migraciones
 echo "🗄️  Ejecutando migraciones de la base de datos..."
-python manage.py migrate
+python manage.py migrate && python manage.py createcachetable
 if [ $? -ne 0 ]; then
     echo "❌ Error al ejecutar las migraciones."
     exit 1
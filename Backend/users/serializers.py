@@ -59,22 +59,16 @@ class Meta:
         read_only_fields = ('id', 'username', 'email', 'created_at')
 
     def get_total_albums(self, obj):
-        from collection.models import UserCollectible
-        return UserCollectible.objects.filter(
-            user=obj, collectible_type='photocard'
-        ).values('photocard__album_version__album').distinct().count()
+        from collection.summary import summary_for
+        return summary_for(obj).album_count
 
     def get_total_photocards(self, obj):
-        from collection.models import UserCollectible
-        return UserCollectible.objects.filter(
-            user=obj, collectible_type='photocard'
-        ).count()
+        from collection.summary import summary_for
+        return summary_for(obj).photocard_count
 
     def get_total_lightsticks(self, obj):
-        from collection.models import UserCollectible
-        return UserCollectible.objects.filter(
-            user=obj, collectible_type='lightstick'
-        ).count()
+        from collection.summary import summary_for
+        return summary_for(obj).lightstick_count
 
 
 class UserUpdateSerializer(serializers.ModelSerializer):
@@ -3,7 +3,6 @@
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
-from django.db import models
 from .serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
@@ -98,77 +97,5 @@ def update(self, request, *args, **kwargs):
 @permission_classes([permissions.IsAuthenticated])
 def user_stats_view(request):
     """Vista para obtener estadísticas del usuario"""
-    user = request.user
-    from collection.models import UserCollectible, WishlistItem, UserFavoriteGroup
-    
-    # Estadísticas básicas
-    total_photocards = UserCollectible.objects.filter(
-        user=user, collectible_type='photocard'
-    ).count()
-    
-    total_lightsticks = UserCollectible.objects.filter(
-        user=user, collectible_type='lightstick'
-    ).count()
-    
-    # Álbumes únicos (contando por versión de álbum)
-    albums = UserCollectible.objects.filter(
-        user=user, collectible_type='photocard'
-    ).values('photocard__album_version__album').distinct()
-    total_albums = albums.count()
-    
-    # Valor total de la colección
-    total_value = UserCollectible.objects.filter(
-        user=user
-    ).aggregate(
-        total=models.Sum('purchase_price')
-    )['total'] or 0
-    
-    # Duplicados
-    duplicate_photocards = UserCollectible.objects.filter(
-        user=user, collectible_type='photocard', is_duplicate=True
-    ).count()
-    
-    duplicate_lightsticks = UserCollectible.objects.filter(
-        user=user, collectible_type='lightstick', is_duplicate=True
-    ).count()
-    
-    # Wishlist y favoritos
-    wishlist_items = WishlistItem.objects.filter(user=user).count()
-    favorite_groups = UserFavoriteGroup.objects.filter(user=user).count()
-    
-    # Completitud por grupo
-    from django.db.models import Count, Q
-    from catalog.models import Group, Photocard
-    
-    completion_by_group = []
-    user_groups = UserFavoriteGroup.objects.filter(user=user).values_list('group', flat=True)
-    
-    for group_id in user_groups:
-        group = Group.objects.get(id=group_id)
-        total_photocards_in_group = Photocard.objects.filter(group=group).count()
-        user_photocards_in_group = UserCollectible.objects.filter(
-            user=user, 
-            collectible_type='photocard',
-            photocard__group=group
-        ).count()
-        
-        if total_photocards_in_group > 0:
-            completion_percentage = (user_photocards_in_group / total_photocards_in_group) * 100
-            completion_by_group.append({
-                'group_name': group.name,
-                'total_photocards': total_photocards_in_group,
-                'user_photocards': user_photocards_in_group,
-                'completion_percentage': round(completion_percentage, 2)
-            })
-    
-    return Response({
-        'total_albums': total_albums,
-        'total_photocards': total_photocards,
-        'total_lightsticks': total_lightsticks,
-        'total_value': total_value,
-        'duplicate_photocards': duplicate_photocards,
-        'duplicate_lightsticks': duplicate_lightsticks,
-        'wishlist_items': wishlist_items,
-        'favorite_groups': favorite_groups,
-        'completion_by_group': completion_by_group
-    })
+    from collection.stats import collection_stats
+    return Response(collection_stats(request.user))